@@ -2,8 +2,9 @@
 import random
 from functions import TextFuncs
 import player
-from player_helpers import get_attack_power, use_health_potion
-import os
+from inventory import find_item
+from player_helpers import get_attack_power
+from rng import GameRNG, get_default_rng, stream
 
 try:
     import tkinter as tk
@@ -75,20 +76,222 @@ def enemy_is_fightable(enemy_obj):
         return False
 
 
+def _use_health_potion(target):
+    """Consume the first Health Potion in `target`'s inventory. Returns True if one was used."""
+    if isinstance(target, dict):
+        inv = target.get('inventory', [])
+    else:
+        inv = getattr(target, 'inventory', [])
+    it = find_item(inv, 'Health Potion')
+    if it is not None:
+        it.use(target)
+        return True
+    return False
+
+
+def attack_policy(engine):
+    """Default headless policy: always attack."""
+    return 'attack'
+
+
+class CombatEngine:
+    """Headless turn resolver for a single player-vs-enemy fight.
+
+    The engine is a small state machine (player turn -> enemy turn -> ...) that
+    mutates the player dict and enemy object and returns structured events for
+    every step. It never touches Tkinter, prints or sleeps, so fights can be run
+    in bulk; `Combat` renders the events for the GUI/CLI.
+
+    Each event is a dict with at least `kind`, `actor` and `text` keys, plus
+    `amount` for damage/heal events. Pass `rng` (a `GameRNG` or `random.Random`)
+    to make the fight reproducible.
+    """
+
+    PLAYER_TURN = 'player_turn'
+    ENEMY_TURN = 'enemy_turn'
+    ENDED = 'ended'
+
+    def __init__(self, player_obj, enemy_obj, rng=None):
+        self.player = player_obj
+        self.enemy = enemy_obj
+        # without an explicit context the fight draws from the default one (see `rng.set_default_rng`)
+        self.rng = rng if rng is not None else get_default_rng()
+        self.player_defending = False
+        self.enemy_defending = False
+        self.state = self.PLAYER_TURN
+        # True (victory), False (defeat), 'fled' or None while running
+        self.outcome = None
+        self.turns = 0
+        self.actions = []
+        self.events = []
+
+    def _emit(self, events, kind, actor, text, **data):
+        ev = {'kind': kind, 'actor': actor, 'text': text}
+        ev.update(data)
+        events.append(ev)
+        self.events.append(ev)
+
+    def _finish(self, events, outcome):
+        self.state = self.ENDED
+        self.outcome = outcome
+        self._emit(events, 'end', None, '', outcome=outcome)
+
+    @property
+    def ended(self):
+        return self.state == self.ENDED
+
+    def player_action(self, action):
+        """Resolve the player's `action` ('attack', 'defend', 'potion', 'flee'); returns the new events."""
+        if self.state != self.PLAYER_TURN:
+            raise RuntimeError(f"Cannot act during state '{self.state}'")
+        self.actions.append(action)
+        events = []
+
+        if action == 'attack':
+            dmg = get_attack_power(self.player, self.rng) - getattr(self.enemy, 'armor', 0)
+            dmg = max(1, dmg + stream(self.rng, 'combat').randint(-1, 1))
+            if self.enemy_defending:
+                dmg = dmg // 2
+                self.enemy_defending = False
+            self.enemy.take_damage(dmg)
+            self._emit(events, 'attack', 'player', f"You hit {self.enemy.name} for {dmg} damage.", amount=dmg)
+
+        elif action == 'defend':
+            self.player_defending = True
+            self._emit(events, 'defend', 'player', f"{self.player['name']} braces for incoming attacks.")
+
+        elif action == 'potion':
+            before = self.player.get('health', 0)
+            if _use_health_potion(self.player):
+                self._emit(events, 'potion', 'player', "You used a Health Potion.",
+                           amount=self.player.get('health', 0) - before)
+            else:
+                self._emit(events, 'no_potion', 'player', "No Health Potion to use!")
+
+        elif action == 'flee':
+            if stream(self.rng, 'combat').random() < 0.5:
+                self._emit(events, 'flee', 'player', "You fled successfully.")
+                self._finish(events, 'fled')
+                return events
+            self._emit(events, 'flee_failed', 'player', "Flee failed!")
+
+        else:
+            self._emit(events, 'unknown', 'player', "Unknown action.")
+
+        if not self.enemy.is_alive():
+            self._emit(events, 'defeated', 'enemy', f"{self.enemy.name} has been defeated!")
+            self._finish(events, True)
+            return events
+
+        self.state = self.ENEMY_TURN
+        return events
+
+    def _enemy_hit(self, events):
+        dmg = self.enemy.attack()
+        player_defense = self.player.get('agility', 0) // 3
+        dmg = max(1, dmg - player_defense + stream(self.rng, 'combat').randint(-1, 1))
+        if self.player_defending:
+            dmg = dmg // 2
+            self.player_defending = False
+        self.player['health'] = max(0, self.player['health'] - dmg)
+        self._emit(events, 'attack', 'enemy', f"{self.enemy.name} hits you for {dmg} damage!", amount=dmg)
+
+    def enemy_turn(self):
+        """Resolve the enemy's turn; returns the new events."""
+        if self.state != self.ENEMY_TURN:
+            raise RuntimeError(f"Cannot resolve enemy turn during state '{self.state}'")
+        events = []
+        self._emit(events, 'turn', 'enemy', f"-- Enemy Turn -- {self.enemy.name}")
+
+        try:
+            action = self.enemy.decide_action(self.player, self.rng)
+        except Exception:
+            action = 'attack'
+
+        if action == 'defend':
+            self.enemy_defending = True
+            self._emit(events, 'defend', 'enemy', f"{self.enemy.name} braces for your next attack.")
+
+        elif action == 'heal':
+            prev = self.enemy.health
+            if _use_health_potion(self.enemy):
+                self._emit(events, 'potion', 'enemy', f"{self.enemy.name} uses a Health Potion.",
+                           amount=self.enemy.health - prev)
+            else:
+                # fallback: small self-heal
+                heal_amt = max(1, self.enemy.max_health // 6)
+                self.enemy.heal(heal_amt)
+                self._emit(events, 'heal', 'enemy', f"{self.enemy.name} regenerates {self.enemy.health - prev} HP!",
+                           amount=self.enemy.health - prev)
+
+        else:
+            # 'attack' and any unknown action
+            self._enemy_hit(events)
+
+        if self.player.get('health', 0) <= 0:
+            self._emit(events, 'defeated', 'player', "You were defeated...")
+            self._finish(events, False)
+            return events
+
+        self.turns += 1
+        self.state = self.PLAYER_TURN
+        return events
+
+    def step(self, policy=attack_policy):
+        """Advance one half-turn, asking `policy(engine)` for the player's action."""
+        if self.state == self.PLAYER_TURN:
+            return self.player_action(policy(self))
+        if self.state == self.ENEMY_TURN:
+            return self.enemy_turn()
+        return []
+
+    def run(self, policy=attack_policy, max_turns=1000):
+        """Play the fight to completion and return the outcome.
+
+        The outcome stays None if the fight is still undecided after `max_turns` rounds.
+        """
+        while self.state != self.ENDED:
+            if self.turns >= max_turns:
+                self.state = self.ENDED
+                break
+            self.step(policy)
+        return self.outcome
+
+
 class Combat:
     """Combat manager that supports both CLI and Tkinter GUI flows.
 
+    Turn resolution is delegated to a `CombatEngine`; this class only renders its
+    events and schedules the enemy turn.
     Use `start_gui(parent, on_end=...)` to run combat in a non-blocking GUI window.
     """
 
-    def __init__(self, player_obj, enemy_obj):
+    def __init__(self, player_obj, enemy_obj, rng=None, replay_path=None):
         self.player = player_obj
         self.enemy = enemy_obj
-        self.player_defending = False
-        self.enemy_defending = False
+        # where the finished fight is recorded (None: `replay.get_replay_path()`)
+        self.replay_path = replay_path
+        # Every GUI fight gets its own seed so it can be recorded and replayed
+        if rng is None:
+            rng = GameRNG(random.getrandbits(63))
+        self.seed = getattr(rng, 'seed', None)
+        self.engine = CombatEngine(player_obj, enemy_obj, rng)
+        try:
+            from replay import snapshot_player, snapshot_enemy
+            self._replay_start = (snapshot_player(player_obj), snapshot_enemy(enemy_obj))
+        except Exception:
+            self._replay_start = None
         self._gui_widgets = {}
         self._on_end = None
 
+    @property
+    def player_defending(self):
+        return self.engine.player_defending
+
+    @property
+    def enemy_defending(self):
+        return self.engine.enemy_defending
+
     # --- GUI integration -------------------------------------------------
     def start_gui(self, parent, on_end=None, on_refresh=None):
         if tk is None:
@@ -191,112 +394,43 @@ class Combat:
             el.configure(text=f"{self.enemy.name} HP: {self.enemy.health}")
 
     # --- Gameplay logic -------------------------------------------------
+    def _render_events(self, events):
+        for ev in events:
+            if ev['text']:
+                self.append_message(ev['text'])
+
     def _player_action(self, action):
         # Disable buttons until enemy turn completes
         self._set_buttons_state('disabled')
 
-        if action == 'attack':
-            dmg = get_attack_power() - getattr(self.enemy, 'armor', 0)
-            dmg = max(1, dmg + random.randint(-1, 1))
-            if self.enemy_defending:
-                dmg = dmg // 2
-                self.enemy_defending = False
-            self.enemy.take_damage(dmg)
-            self.append_message(f"You hit {self.enemy.name} for {dmg} damage.")
-
-        elif action == 'defend':
-            self.player_defending = True
-            self.append_message(f"{self.player['name']} braces for incoming attacks.")
-
-        elif action == 'potion':
-            used = use_health_potion()
-            if used:
-                self.append_message("You used a Health Potion.")
-            else:
-                self.append_message("No Health Potion to use!")
-
-        elif action == 'flee':
-            if random.random() < 0.5:
-                self.append_message("You fled successfully.")
-                self._end_combat('fled')
-                return
-            else:
-                self.append_message("Flee failed!")
-
-        else:
-            self.append_message("Unknown action.")
+        self._render_events(self.engine.player_action(action))
+        if self.engine.outcome == 'fled':
+            self._end_combat('fled')
+            return
 
         self._update_labels()
 
         # Check if enemy defeated
-        if not self.enemy.is_alive():
-            self.append_message(f"{self.enemy.name} has been defeated!")
-            self._end_combat(True)
+        if self.engine.ended:
+            self._end_combat(self.engine.outcome)
             return
 
         # Enemy turn after short delay
-        if hasattr(self.win, 'after'):
-            self.win.after(700, self._enemy_turn)
+        win = getattr(self, 'win', None)
+        if hasattr(win, 'after'):
+            win.after(700, self._enemy_turn)
         else:
             # fallback immediate
             self._enemy_turn()
 
     def _enemy_turn(self):
-        self.append_message(f"-- Enemy Turn -- {self.enemy.name}")
-
-        action = 'attack'
-        try:
-            action = self.enemy.decide_action(self.player)
-        except Exception:
-            # fallback
-            action = 'attack'
-
-        if action == 'attack':
-            dmg = self.enemy.attack()
-            player_defense = self.player.get('agility', 0) // 3
-            dmg = max(1, dmg - player_defense + random.randint(-1, 1))
-            if self.player_defending:
-                dmg = dmg // 2
-                self.player_defending = False
-            self.player['health'] = max(0, self.player['health'] - dmg)
-            self.append_message(f"{self.enemy.name} hits you for {dmg} damage!")
-
-        elif action == 'defend':
-            self.enemy_defending = True
-            self.append_message(f"{self.enemy.name} braces for your next attack.")
-
-        elif action == 'heal':
-            used_potion = False
-            for it in list(getattr(self.enemy, 'inventory', [])):
-                if getattr(it, 'name', None) == 'Health Potion':
-                    # Use the potion on the enemy object
-                    it.use(self.enemy)
-                    used_potion = True
-                    healed_amount = getattr(self.enemy, 'health', 0)
-                    self.append_message(f"{self.enemy.name} uses a Health Potion.")
-                    break
-
-            if not used_potion:
-                # fallback: small self-heal
-                heal_amt = max(1, self.enemy.max_health // 6)
-                prev = self.enemy.health
-                self.enemy.heal(heal_amt)
-                self.append_message(f"{self.enemy.name} regenerates {self.enemy.health - prev} HP!")
-
-        else:
-            # unknown action -> attack as fallback
-            dmg = self.enemy.attack()
-            player_defense = self.player.get('agility', 0) // 3
-            dmg = max(1, dmg - player_defense + random.randint(-1, 1))
-            self.player['health'] = max(0, self.player['health'] - dmg)
-            self.append_message(f"{self.enemy.name} hits you for {dmg} damage!")
+        self._render_events(self.engine.enemy_turn())
 
         self._update_labels()
 
         # Check if player defeated
-        if self.player.get('health', 0) <= 0:
-            self.append_message("You were defeated...")
-            self._end_combat(False)
+        if self.engine.ended:
+            self._end_combat(self.engine.outcome)
             return
 
         # Re-enable buttons for next player turn
@@ -312,20 +446,23 @@ class Combat:
         if player_won is True and not fled:
             try:
                 from player_helpers import add_experience, add_gold, add_loot
+                from player_store import batch
                 xp = getattr(self.enemy, 'xp_reward', 0)
                 gold = getattr(self.enemy, 'gold_reward', 0)
                 loot = getattr(self.enemy, 'loot', []) or []
 
-                if xp:
-                    add_experience(xp)
-                    self.append_message(f"Earned {xp} XP.")
-                if gold:
-                    add_gold(gold)
-                    self.append_message(f"Found {gold} gold.")
-                if loot:
-                    add_loot(loot)
-                    for it in loot:
-                        self.append_message(f"Found loot: {it.name}", rarity=getattr(it, 'rarity', 'common'))
+                # one change notification for the whole reward
+                with batch():
+                    if xp:
+                        add_experience(xp, self.player)
+                        self.append_message(f"Earned {xp} XP.")
+                    if gold:
+                        add_gold(gold, self.player)
+                        self.append_message(f"Found {gold} gold.")
+                    if loot:
+                        add_loot(loot, self.player)
+                        for it in loot:
+                            self.append_message(f"Found loot: {it.name}", rarity=getattr(it, 'rarity', 'common'))
             except Exception:
                 # non-fatal if player_helpers fails
                 pass
@@ -340,7 +477,8 @@ class Combat:
         if player_won is True and not fled:
             try:
                 from functions import save_game
-                saved = save_game()
+                # snapshot now, write on the save thread so the UI never waits on disk
+                saved = save_game(background=True)
                 if saved:
                     try:
                         # Use append_message so both GUI and CLI notify the user
@@ -375,14 +513,18 @@ class Combat:
 
         summary_text = " | ".join(summary_lines)
 
-        # Persist to combat log file in the user data directory (non-fatal)
+        # Persist to the combat history of the active persistence backend (non-fatal)
+        try:
+            from persistence import fight_record, get_backend
+            get_backend().record_fight(fight_record(self.player, self.enemy, player_won, summary_text, self.engine.turns))
+        except Exception:
+            pass
+
+        # Record a compact replay of the fight next to the combat log (non-fatal)
         try:
-            from functions import get_data_dir
-            import datetime
-            log_path = os.path.join(get_data_dir(), 'combat_log.txt')
-            with open(log_path, 'a', encoding='utf-8') as fh:
-                ts = datetime.datetime.utcnow().isoformat()
-                fh.write(f"{ts} - {summary_text}\n")
+            if self._replay_start and isinstance(self.seed, int):
+                from replay import FightRecord, append_record
+                append_record(FightRecord.from_engine(self.engine, self.seed, *self._replay_start), self.replay_path)
         except Exception:
             pass
 
@@ -462,7 +604,7 @@ class Combat:
                 try:
                     from player_helpers import get_item_slot, is_better
                     slot = get_item_slot(item)
-                    current = player['equipment'].get(slot)
+                    current = self.player['equipment'].get(slot)
                     # show current equipped in this slot (if any)
                     cur_text = f"Current: {current.name} ({getattr(current, 'rarity', 'common')})" if current else "Current: (None)"
                     tk.Label(top, text=cur_text).pack()
@@ -494,7 +636,7 @@ class Combat:
         """Equip an item and refresh UI; safe for use from tooltips."""
         try:
             from player_helpers import equip_item
-            ok = equip_item(item)
+            ok = equip_item(item, self.player)
         except Exception:
             ok = False
 
@@ -545,7 +687,7 @@ class Combat:
     def _sell_and_refresh(self, item, window_ref):
         try:
             from player_helpers import sell_item
-            gold = sell_item(item)
+            gold = sell_item(item, p=self.player)
             if gold > 0:
                 TextFuncs.var_speed_print(f"Sold {item.name} for {gold} gold.", 0.02, 0.04)
                 try:
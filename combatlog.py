@@ -0,0 +1,445 @@
+"""Structured combat log: buffered JSON Lines with size rotation and an offset index.
+
+Every finished fight is one JSON object per line (see `persistence.fight_record`)
+in `combat_log.jsonl`. `CombatLogWriter` buffers records and writes them in one
+go when `max_buffered` records are waiting or `flush_interval` seconds after the
+first buffered one. When the file would exceed `max_bytes` it is rotated to
+`combat_log.jsonl.1` (older files shift up to `backups`, the oldest is dropped).
+
+Each log file has a sidecar `<file>.idx` of fixed-size `<QdB` entries (byte
+offset, timestamp, outcome code), so readers can filter by time or outcome and
+seek straight to the records they need instead of parsing the whole log.
+
+Logs written before this format (`combat_log.txt`, one `<iso time> - <summary>`
+line per fight) are imported once by `import_text_log`, which readers call on
+first access: the old fights are put in front of the existing records and the
+text file is renamed to `combat_log.txt.imported`.
+"""
+import atexit
+import bisect
+import datetime
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+
+from functions import get_data_dir
+
+LOG_FILENAME = 'combat_log.jsonl'
+LEGACY_FILENAME = 'combat_log.txt'
+INDEX_SUFFIX = '.idx'
+OUTCOMES = ('win', 'defeat', 'fled')
+
+MAX_BYTES = 1024 * 1024
+BACKUPS = 5
+FLUSH_INTERVAL = 2.0
+MAX_BUFFERED = 64
+
+_INDEX_ENTRY = struct.Struct('<QdB')
+
+
+def get_log_path():
+    return os.path.join(get_data_dir(), LOG_FILENAME)
+
+
+def index_path(path):
+    return path + INDEX_SUFFIX
+
+
+def log_files(path=None):
+    """Return the existing files of a rotated log, oldest first (the live file last)."""
+    path = path or get_log_path()
+    import_text_log(path)
+    return _log_files(path)
+
+
+def _log_files(path):
+    files = []
+    i = 1
+    while os.path.exists(f'{path}.{i}'):
+        files.append(f'{path}.{i}')
+        i += 1
+    files.reverse()
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+class CombatLogWriter:
+    """Buffered, rotating writer for one combat log file. Safe to use from several threads."""
+
+    def __init__(self, path=None, max_bytes=MAX_BYTES, backups=BACKUPS, flush_interval=FLUSH_INTERVAL,
+                 max_buffered=MAX_BUFFERED):
+        self.path = path or get_log_path()
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self._lock = threading.RLock()
+        self._buffer = []
+        self._timer = None
+
+    def write(self, record):
+        """Queue one record (a JSON-serializable dict with at least `ts` and `outcome`)."""
+        line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        with self._lock:
+            self._buffer.append((line, record.get('ts', 0.0), record.get('outcome')))
+            if len(self._buffer) >= self.max_buffered:
+                self.flush()
+            elif self._timer is None and self.flush_interval:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write buffered records and their index entries to disk."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._buffer:
+                return
+            pending, self._buffer = self._buffer, []
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            if size and size + sum(len(line) for line, _, _ in pending) > self.max_bytes:
+                self.rotate()
+                size = 0
+            entries = []
+            offset = size
+            for line, ts, outcome in pending:
+                code = OUTCOMES.index(outcome) if outcome in OUTCOMES else 255
+                entries.append(_INDEX_ENTRY.pack(offset, ts, code))
+                offset += len(line)
+            # data first, then the index: an index entry never points past the data
+            with open(self.path, 'ab') as fh:
+                fh.write(b''.join(line for line, _, _ in pending))
+            with open(index_path(self.path), 'ab') as fh:
+                fh.write(b''.join(entries))
+
+    def rotate(self):
+        """Shift `log` -> `log.1` -> ... -> `log.<backups>` (with their indexes)."""
+        with self._lock:
+            for suffix in ('', INDEX_SUFFIX):
+                oldest = f'{self.path}.{self.backups}{suffix}'
+                if os.path.exists(oldest):
+                    os.remove(oldest)
+                for i in range(self.backups - 1, 0, -1):
+                    src = f'{self.path}.{i}{suffix}'
+                    if os.path.exists(src):
+                        os.replace(src, f'{self.path}.{i + 1}{suffix}')
+                if self.backups > 0 and os.path.exists(self.path + suffix):
+                    os.replace(self.path + suffix, f'{self.path}.1{suffix}')
+                elif os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+
+    def close(self):
+        self.flush()
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(path=None):
+    """Return the shared writer for `path` (defaults to the log in the data directory)."""
+    path = path or get_log_path()
+    with _writers_lock:
+        w = _writers.get(path)
+        if w is None:
+            w = _writers[path] = CombatLogWriter(path)
+        return w
+
+
+def flush_all():
+    for w in list(_writers.values()):
+        try:
+            w.flush()
+        except Exception:
+            pass
+
+
+atexit.register(flush_all)
+
+
+# --- pre-JSON text log -------------------------------------------------------
+def _parse_text_line(line):
+    """Turn one `<iso time> - <summary>` line of the old text log into a record (None if unreadable)."""
+    stamp, sep, summary = line.rstrip('\n').partition(' - ')
+    if not sep:
+        return None
+    try:
+        ts = datetime.datetime.fromisoformat(stamp).replace(tzinfo=datetime.timezone.utc).timestamp()
+    except ValueError:
+        return None
+    parts = summary.split(' | ')
+    rec = {'ts': ts, 'outcome': None, 'enemy': None, 'xp': 0, 'gold': 0, 'summary': summary}
+    for prefix, outcome in (('Victory vs ', 'win'), ('Defeat vs ', 'defeat'), ('Fled from ', 'fled')):
+        if parts[0].startswith(prefix):
+            rec['outcome'], rec['enemy'] = outcome, parts[0][len(prefix):]
+    for part in parts[1:]:
+        key, _, value = part.partition(': ')
+        if key in ('XP', 'Gold') and value.isdigit():
+            rec[key.lower()] = int(value)
+    return rec
+
+
+def import_text_log(path=None):
+    """Import the old `combat_log.txt` next to log `path` once. Returns the number of records imported.
+
+    Its fights are older than anything in the JSON log, so they are written in
+    front of the oldest log file (whose index is rebuilt) and the text file is
+    renamed to `combat_log.txt.imported`.
+    """
+    path = path or get_log_path()
+    legacy = os.path.join(os.path.dirname(path), LEGACY_FILENAME)
+    if not os.path.exists(legacy):
+        return 0
+    writer = get_writer(path)
+    with writer._lock:
+        if not os.path.exists(legacy):
+            return 0
+        writer.flush()
+        with open(legacy, 'r', encoding='utf-8', errors='replace') as fh:
+            recs = [r for r in map(_parse_text_line, fh) if r is not None]
+        data = b''.join((json.dumps(r, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+                        for r in recs)
+        oldest = (_log_files(path) or [path])[0]
+        if os.path.exists(oldest):
+            with open(oldest, 'rb') as fh:
+                data += fh.read()
+        tmp = oldest + '.tmp'
+        with open(tmp, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp, oldest)
+        rebuild_index(oldest)
+        os.replace(legacy, legacy + '.imported')
+    return len(recs)
+
+
+# --- reading -----------------------------------------------------------------
+def read_index(path=None):
+    """Return [(offset, ts, outcome), ...] for one log file (outcome is a string or None)."""
+    path = path or get_log_path()
+    try:
+        with open(index_path(path), 'rb') as fh:
+            data = fh.read()
+    except FileNotFoundError:
+        return []
+    usable = len(data) - len(data) % _INDEX_ENTRY.size
+    return [(off, ts, OUTCOMES[code] if code < len(OUTCOMES) else None)
+            for off, ts, code in _INDEX_ENTRY.iter_unpack(data[:usable])]
+
+
+def rebuild_index(path=None):
+    """Recreate the index of `path` by scanning it (e.g. after a crash between data and index writes)."""
+    path = path or get_log_path()
+    entries = []
+    with open(path, 'rb') as fh:
+        offset = 0
+        for line in fh:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break
+            outcome = rec.get('outcome')
+            entries.append(_INDEX_ENTRY.pack(offset, rec.get('ts', 0.0), OUTCOMES.index(outcome) if outcome in OUTCOMES else 255))
+            offset += len(line)
+    with open(index_path(path), 'wb') as fh:
+        fh.write(b''.join(entries))
+    return len(entries)
+
+
+def iter_records(path=None, outcome=None, since=None, until=None):
+    """Yield records from all files of the log, oldest first, filtered with the index."""
+    for fpath in log_files(path):
+        matches = [off for off, ts, out in read_index(fpath)
+                   if (outcome is None or out == outcome)
+                   and (since is None or ts >= since)
+                   and (until is None or ts <= until)]
+        if not matches:
+            continue
+        with open(fpath, 'rb') as fh:
+            for off in matches:
+                fh.seek(off)
+                yield json.loads(fh.readline())
+
+
+def tail(n, path=None):
+    """Return the last `n` records of the log, oldest first, reading only those records."""
+    if n <= 0:
+        return []
+    picked = []
+    for fpath in reversed(log_files(path)):
+        offsets = [off for off, _, _ in read_index(fpath)][-(n - len(picked)):]
+        with open(fpath, 'rb') as fh:
+            recs = []
+            for off in offsets:
+                fh.seek(off)
+                recs.append(json.loads(fh.readline()))
+        picked = recs + picked
+        if len(picked) >= n:
+            break
+    return picked
+
+
+def _search_text(rec):
+    """The lower-cased string values of a record (not its keys), one per line."""
+    out = []
+    stack = [rec]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            out.append(value)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return '\n'.join(out).lower()
+
+
+class LogChanged(Exception):
+    """A log file was rotated or rewritten after the `LogReader` indexed it."""
+
+
+def _file_id(st):
+    return st.st_dev, st.st_ino
+
+
+class LogReader:
+    """Random access to every record of a (rotated) log through memory maps.
+
+    The indexes of all log files are loaded up front (a few bytes per fight);
+    record bytes are only touched when a record is actually requested, so a
+    viewer can show the newest page of a huge log without reading the rest.
+
+    Maps stay open only until `release()`; call it once a page has been read so
+    the writer can rotate the files in the meantime (Windows refuses to rename
+    a mapped file).  If a file was rotated since the indexes were loaded,
+    reading raises `LogChanged` and a fresh reader is needed.
+    """
+
+    def __init__(self, path=None):
+        self.files = log_files(path)
+        self.entries = []
+        self._ids = []
+        self._bounds = []
+        for file_no, fpath in enumerate(self.files):
+            try:
+                self._ids.append(_file_id(os.stat(fpath)))
+            except OSError:
+                self._ids.append(None)
+            first = len(self.entries)
+            self.entries.extend((file_no, off, ts, out) for off, ts, out in read_index(fpath))
+            self._bounds.append((first, len(self.entries)))
+        self._maps = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _map(self, file_no):
+        m = self._maps.get(file_no)
+        if m is None:
+            try:
+                with open(self.files[file_no], 'rb') as fh:
+                    if _file_id(os.fstat(fh.fileno())) != self._ids[file_no]:
+                        raise LogChanged(self.files[file_no])
+                    m = self._maps[file_no] = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError) as e:
+                # gone, or emptied: either way the loaded offsets no longer apply
+                raise LogChanged(self.files[file_no]) from e
+        return m
+
+    def raw(self, i):
+        """Return the JSON bytes of record `i` (0 is the oldest)."""
+        file_no, off, _, _ = self.entries[i]
+        m = self._map(file_no)
+        end = m.find(b'\n', off)
+        return m[off:end if end != -1 else len(m)]
+
+    def record(self, i):
+        return json.loads(self.raw(i))
+
+    def _byte_candidates(self, m, offsets, pattern):
+        """Positions (into `offsets`) of the records whose raw bytes match `pattern`.
+
+        The whole map is scanned by the regex engine; each hit is mapped back to
+        its record through the index offsets and the scan resumes at the next
+        record, so a record is reported at most once.
+        """
+        found = []
+        pos = offsets[0]
+        while True:
+            match = pattern.search(m, pos)
+            if match is None:
+                break
+            k = bisect.bisect_right(offsets, match.start()) - 1
+            end = m.find(b'\n', offsets[k])
+            # (a hit past the last record's newline is in bytes the index does not cover yet)
+            if end == -1 or match.end() <= end:
+                found.append(k)
+            if k + 1 == len(offsets):
+                break
+            pos = offsets[k + 1]
+        return found
+
+    def _search_file(self, file_no, needle, pattern=None, outcome=None):
+        """Indices of the records in one file whose values contain `needle`, oldest first.
+
+        `pattern`, when given, is a fast reject over the raw bytes: only records
+        it hits are decoded. Matching itself is done on the decoded values
+        (`_search_text`), so key names never match and escaped characters do.
+        """
+        first, last = self._bounds[file_no]
+        if first == last:
+            return []
+        offsets = [self.entries[i][1] for i in range(first, last)]
+        m = self._map(file_no)
+        candidates = range(len(offsets)) if pattern is None else self._byte_candidates(m, offsets, pattern)
+        hits = []
+        for k in candidates:
+            if outcome is not None and self.entries[first + k][3] != outcome:
+                continue
+            end = m.find(b'\n', offsets[k])
+            try:
+                rec = json.loads(m[offsets[k]:end if end != -1 else len(m)])
+            except ValueError:
+                continue
+            if needle in _search_text(rec):
+                hits.append(first + k)
+        return hits
+
+    def iter_newest(self, outcome=None, text=None):
+        """Yield indices of matching records, newest first, lazily.
+
+        `outcome` is checked against the index alone; `text` is a case-insensitive
+        substring search over the record's values (enemy, player, tier, loot,
+        summary, ...), run over one whole file at a time.
+        """
+        if not text:
+            for i in range(len(self.entries) - 1, -1, -1):
+                if outcome is None or self.entries[i][3] == outcome:
+                    yield i
+            return
+        needle = text.lower()
+        pattern = None
+        if text.isascii() and not any(c in '"\\' or c < ' ' for c in text):
+            # written the same way inside JSON, so the raw bytes can rule records out
+            pattern = re.compile(re.escape(text.encode('utf-8')), re.IGNORECASE)
+        for file_no in range(len(self.files) - 1, -1, -1):
+            yield from reversed(self._search_file(file_no, needle, pattern, outcome))
+
+    def release(self):
+        """Unmap every file; they are mapped again on the next read."""
+        for m in self._maps.values():
+            m.close()
+        self._maps = {}
+
+    close = release
+
+
+def format_record(rec):
+    """One human-readable line for a record, like the old text log."""
+    ts = datetime.datetime.fromtimestamp(rec.get('ts', 0), datetime.timezone.utc).replace(tzinfo=None).isoformat()
+    return f"{ts} - {rec.get('summary') or rec.get('outcome')}"
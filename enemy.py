@@ -1,13 +1,30 @@
 # Enemy class definition
 
-import random
 import math
+import weakref
+from array import array
 
 from functions import TextFuncs
+from inventory import Inventory, count_named, find_item
 from plugins.registry import PluginRegistry
+from rng import GameRNG, stream
+
+# Enemy AI thresholds (fraction of max HP) and action probabilities used by `decide_action`
+AI_LOW_HP_PCT = 0.30
+AI_MID_HP_PCT = 0.6
+AI_LOW_HEAL_CHANCE = 0.75
+AI_LOW_DEFEND_CHANCE = 0.6
+AI_MID_DEFEND_CHANCE = 0.35
+# Chance that a freshly generated enemy carries a Health Potion
+POTION_CARRY_CHANCE = 0.25
 
 class Enemy:
-    def __init__(self, name, health, attack_power, armor, tier, inventory=None):
+    # Fixed layout: no per-instance __dict__, which matters for large encounter pools
+    __slots__ = ('name', 'health', 'max_health', 'attack_power', 'armor', 'tier', 'inventory',
+                 'xp_reward', 'gold_reward', 'loot')
+
+    def __init__(self, name, health, attack_power, armor, tier, inventory=None,
+                 xp_reward=0, gold_reward=0, loot=None):
         self.name = name
         self.health = health
         self.max_health = health
@@ -15,7 +32,11 @@ class Enemy:
         self.armor = armor
         self.tier = tier
         # simple inventory support for potions, etc.
-        self.inventory = inventory or []
+        self.inventory = Inventory(inventory or ())
+        # rewards granted to the player on defeat
+        self.xp_reward = xp_reward
+        self.gold_reward = gold_reward
+        self.loot = loot or []
 
     def attack(self):
         return self.attack_power
@@ -31,46 +52,239 @@ class Enemy:
     def is_alive(self):
         return self.health > 0
 
-    def decide_action(self, player):
+    def decide_action(self, player, rng=None):
         """Decide the enemy's next action based on current HP and available items.
 
         Returns one of: 'attack', 'defend', 'heal'.
         """
-        import random
+        random = stream(rng, 'ai')
         hp_pct = (self.health / self.max_health) if self.max_health else 0
 
         # If very low on HP prefer to heal (if potion present) or defend
-        has_potion = any(getattr(it, 'name', None) == 'Health Potion' for it in self.inventory)
-        if hp_pct < 0.30:
-            if has_potion and random.random() < 0.75:
+        has_potion = find_item(self.inventory, 'Health Potion') is not None
+        if hp_pct < AI_LOW_HP_PCT:
+            if has_potion and random.random() < AI_LOW_HEAL_CHANCE:
                 return 'heal'
-            if random.random() < 0.6:
+            if random.random() < AI_LOW_DEFEND_CHANCE:
                 return 'defend'
             return 'attack'
 
         # If moderately hurt, sometimes defend
-        if hp_pct < 0.6:
-            if random.random() < 0.35:
+        if hp_pct < AI_MID_HP_PCT:
+            if random.random() < AI_MID_DEFEND_CHANCE:
                 return 'defend'
             return 'attack'
 
         # otherwise attack
         return 'attack'
     
-def get_enemy_templates_for_tier(tier: str, registry: PluginRegistry):
-    """Return all enemy templates (plugin + vanilla) for a tier."""
-    plugin_templates = registry.get_enemies_for_tier(tier)
+class EnemyBatch:
+    """Struct-of-arrays store for many enemies (e.g. pre-generated encounter pools).
+
+    Numeric fields live in compact `array` columns; names and tiers are interned
+    in small lookup tables. Only Health Potions are kept from inventories (as a
+    count), and loot is stored sparsely since most enemies carry none.
+    Index with `batch[i]` to materialize a regular `Enemy`.
+    """
+
+    INT_FIELDS = ('health', 'max_health', 'attack_power', 'armor', 'xp_reward', 'gold_reward')
+
+    def __init__(self):
+        for f in self.INT_FIELDS:
+            setattr(self, f, array('l'))
+        self.potions = array('B')
+        self.name_index = array('H')
+        self.tier_index = array('B')
+        self.names = []
+        self.tiers = []
+        self._name_ids = {}
+        self._tier_ids = {}
+        self.loot = {}
+
+    def __len__(self):
+        return len(self.health)
+
+    @classmethod
+    def from_enemies(cls, enemies):
+        batch = cls()
+        for e in enemies:
+            batch.append(e)
+        return batch
+
+    def _intern(self, value, table, ids):
+        i = ids.get(value)
+        if i is None:
+            i = ids[value] = len(table)
+            table.append(value)
+        return i
+
+    def append(self, e):
+        for f in self.INT_FIELDS:
+            getattr(self, f).append(getattr(e, f))
+        self.potions.append(count_named(e.inventory, 'Health Potion'))
+        self.name_index.append(self._intern(e.name, self.names, self._name_ids))
+        self.tier_index.append(self._intern(e.tier, self.tiers, self._tier_ids))
+        if e.loot:
+            self.loot[len(self.health) - 1] = list(e.loot)
+
+    def __getitem__(self, i):
+        from items import health_potion
+        if i < 0:
+            i += len(self)
+        e = Enemy(self.names[self.name_index[i]], self.health[i], self.attack_power[i], self.armor[i],
+                  self.tiers[self.tier_index[i]], [health_potion] * self.potions[i],
+                  self.xp_reward[i], self.gold_reward[i], list(self.loot.get(i, [])))
+        e.max_health = self.max_health[i]
+        return e
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_arrays(self):
+        """Return NumPy columns in the layout used by `vector_combat.resolve_cohort`."""
+        import numpy as np
+        return {f: np.asarray(getattr(self, f)).astype(np.int64)
+                for f in ('health', 'max_health', 'attack_power', 'armor', 'potions')}
+
+
+def _normalize_template(data):
+    """Return a plugin enemy definition in the vanilla template shape.
+
+    Plugin JSON carries flat `health`/`attack_power`/`armor` fields and an integer
+    tier; vanilla templates use a `base_stats` dict and 'tierN' strings.
+    """
+    tier = data.get("tier")
+    if isinstance(tier, int):
+        tier = f"tier{tier}"
+    stats = data.get("base_stats") or {k: data[k] for k in ("health", "attack_power", "armor")}
+    return {"name": data["name"], "tier": tier, "base_stats": stats, "weight": data.get("weight", 1)}
+
+
+def _build_alias_table(weights):
+    """Vose alias table for O(1) weighted sampling: returns (prob, alias) lists."""
+    n = len(weights)
+    total = float(sum(weights))
+    scaled = [w * n / total for w in weights]
+    prob, alias = [0.0] * n, [0] * n
+    small = [i for i, w in enumerate(scaled) if w < 1.0]
+    large = [i for i, w in enumerate(scaled) if w >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = scaled[s], l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    for i in small + large:
+        prob[i], alias[i] = 1.0, i
+    return prob, alias
+
+
+class TierTable:
+    """Templates of one tier with stats and rewards pre-scaled for one difficulty."""
+
+    __slots__ = ('tier', 'names', 'weights', 'hp_lo', 'hp_hi', 'attack_power', 'armor',
+                 'xp_reward', 'gold_min', 'gold_max', '_prob', '_alias')
+
+    def __init__(self, tier, templates, multiplier):
+        if not templates:
+            raise ValueError(f"No enemy templates for tier {tier!r}")
+        self.tier = tier
+        self.names = [t["name"] for t in templates]
+        self.weights = [t.get("weight", 1) for t in templates]
+        base_hp = [t["base_stats"]["health"] * multiplier for t in templates]
+        self.hp_lo = [hp * 0.9 for hp in base_hp]
+        self.hp_hi = [hp * 1.1 for hp in base_hp]
+        self.attack_power = [max(1, int(t["base_stats"]["attack_power"] * multiplier)) for t in templates]
+        self.armor = [max(0, int(t["base_stats"]["armor"] * multiplier)) for t in templates]
+
+        self.xp_reward = max(1, int(TIER_XP.get(tier, 10) * multiplier))
+        gmin, gmax = TIER_GOLD.get(tier, (5, 10))
+        self.gold_min = max(1, int(gmin * multiplier))
+        self.gold_max = max(self.gold_min, int(gmax * multiplier))
+        self._prob, self._alias = _build_alias_table(self.weights)
+
+    def __len__(self):
+        return len(self.names)
+
+    def pick(self, random):
+        """Pick a template index by weight using a single draw from `random`."""
+        u = random.random() * len(self.names)
+        i = int(u)
+        return i if (u - i) < self._prob[i] else self._alias[i]
+
+
+def _tuning_key(tier):
+    """Snapshot of the module-level tuning data a tier's table is built from."""
+    return (tuple(enemy_stats.get(tier, {}).items()), tuple(enemy_names.get(tier, ())),
+            TIER_XP.get(tier), TIER_GOLD.get(tier))
+
+
+class EnemyCatalog:
+    """Enemy templates of a `PluginRegistry`, indexed by tier, built once per registry version.
+
+    Per-difficulty `TierTable`s are created lazily and cached. A tier's tables are
+    rebuilt when its entries in `enemy_stats`, `enemy_names`, `TIER_XP` or
+    `TIER_GOLD` change, so tuning those dicts in place (e.g. between simulator
+    runs) takes effect at once; `invalidate()` forces a rebuild for changes the
+    catalog cannot see, such as plugin data edited in place.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.invalidate()
+
+    def invalidate(self):
+        """Re-read the registry and the vanilla templates and drop all cached tables."""
+        self.version = self.registry.version
+        self.templates_by_tier = {}
+        for data in self.registry.enemies.values():
+            t = _normalize_template(data)
+            self.templates_by_tier.setdefault(t["tier"], []).append(t)
+        for tier, names in enemy_names.items():
+            bucket = self.templates_by_tier.setdefault(tier, [])
+            for name in names:
+                bucket.append({"name": name, "tier": tier, "base_stats": dict(enemy_stats[tier]), "weight": 1})
+        self._keys = {tier: _tuning_key(tier) for tier in self.templates_by_tier}
+        self._tables = {}
+
+    def templates(self, tier):
+        return self.templates_by_tier.get(tier, [])
+
+    def tier_table(self, tier, difficulty=None):
+        from settings import GameplaySettings
+        d = difficulty if (difficulty is not None) else GameplaySettings.GLOBAL_DIFFICULTY
+        if self._keys.get(tier) != _tuning_key(tier):
+            self.invalidate()
+        table = self._tables.get((tier, d))
+        if table is None:
+            table = self._tables[(tier, d)] = TierTable(tier, self.templates(tier), get_difficulty_multiplier(d))
+        return table
+
+
+_DEFAULT_REGISTRY = PluginRegistry()
+_catalogs = weakref.WeakKeyDictionary()
+
+
+def get_catalog(registry=None):
+    """Return the cached `EnemyCatalog` for `registry`, rebuilding it if plugins changed."""
+    registry = registry if registry is not None else _DEFAULT_REGISTRY
+    catalog = _catalogs.get(registry)
+    if catalog is None or catalog.version != registry.version:
+        catalog = _catalogs[registry] = EnemyCatalog(registry)
+    return catalog
+
+
+def invalidate_catalogs(registry=None):
+    """Drop the cached catalog of `registry` (all registries if None), e.g. after editing plugin data in place."""
+    if registry is None:
+        _catalogs.clear()
+    else:
+        _catalogs.pop(registry, None)
 
-    # Fallback: build vanilla templates from your old tables
-    vanilla = []
-    for name in enemy_names.get(tier, []):
-        vanilla.append({
-            "name": name,
-            "tier": tier,
-            "base_stats": enemy_stats[tier]
-        })
 
-    return plugin_templates + vanilla
+def get_enemy_templates_for_tier(tier: str, registry: PluginRegistry = None):
+    """Return all enemy templates (plugin + vanilla) for a tier."""
+    return list(get_catalog(registry).templates(tier))
 
 enemy_names = {
     "tier1": ["Goblin", "Skeleton", "Zombie", "Bandit", "Wolf", "Slime", "Bat", "Spider", "Rat", "Kobold"],
@@ -88,76 +302,55 @@ enemy_stats = {
     "tier5": {"health": 1200, "attack_power": 120, "armor": 40}
 }
 
+# Base rewards per tier (scaled by difficulty)
+TIER_XP = {"tier1": 8, "tier2": 25, "tier3": 60, "tier4": 150, "tier5": 400}
+TIER_GOLD = {"tier1": (5, 15), "tier2": (20, 50), "tier3": (50, 120), "tier4": (150, 400), "tier5": (500, 1500)}
+
 def get_difficulty_multiplier(difficulty=None):
     """Return the scaling multiplier for a given difficulty (defaults to GameplaySettings.GLOBAL_DIFFICULTY)."""
     from settings import GameplaySettings
     d = difficulty if (difficulty is not None) else GameplaySettings.GLOBAL_DIFFICULTY
     return 1.0 + (d - 3) * 0.15
 
-def generate_enemy(tier, registry: PluginRegistry):
-    import random
+def generate_enemy(tier, registry: PluginRegistry = None, rng=None):
     from items import health_potion
-    from settings import GameplaySettings
-
-    templates = get_enemy_templates_for_tier(tier, registry)
-    template = random.choice(templates)
 
-    stats = template["base_stats"]
+    random = stream(rng, 'enemy')
+    table = get_catalog(registry).tier_table(tier)
+    t = table.pick(random)
 
-    multiplier = get_difficulty_multiplier()
-
-    base_hp = stats["health"] * multiplier
-    base_attack = max(1, int(stats["attack_power"] * multiplier))
-    base_armor = max(0, int(stats["armor"] * multiplier))
-
-    hp = math.ceil(random.uniform(
-        base_hp * 0.9,
-        base_hp * 1.1
-    ))
+    hp = math.ceil(random.uniform(table.hp_lo[t], table.hp_hi[t]))
 
     e = Enemy(
-        template["name"],
+        table.names[t],
         hp,
-        base_attack,
-        base_armor,
-        tier
+        table.attack_power[t],
+        table.armor[t],
+        tier,
+        xp_reward=table.xp_reward,
+        gold_reward=random.randint(table.gold_min, table.gold_max),
     )
 
-    # ---- everything below this line is almost unchanged ----
-
-    xp_table = {"tier1": 8, "tier2": 25, "tier3": 60, "tier4": 150, "tier5": 400}
-    gold_table = {"tier1": (5, 15), "tier2": (20, 50), "tier3": (50, 120), "tier4": (150, 400), "tier5": (500, 1500)}
-
-    base_xp = xp_table.get(tier, 10)
-    e.xp_reward = max(1, int(base_xp * multiplier))
-
-    gmin, gmax = gold_table.get(tier, (5, 10))
-    gmin = max(1, int(gmin * multiplier))
-    gmax = max(gmin, int(gmax * multiplier))
-    e.gold_reward = random.randint(gmin, gmax)
-
-    e.loot = []
-
-    if random.random() < 0.25:
+    if stream(rng, 'loot').random() < POTION_CARRY_CHANCE:
         e.inventory.append(health_potion)
 
     return e
 
 
-def generate_enemy_for_player(player_level: int, registry: PluginRegistry):
+def tier_for_level(player_level: int):
+    """Return the enemy tier a player of `player_level` fights."""
     if player_level <= 3:
-        tier = 'tier1'
+        return 'tier1'
     elif player_level <= 7:
-        tier = 'tier2'
+        return 'tier2'
     elif player_level <= 11:
-        tier = 'tier3'
+        return 'tier3'
     elif player_level <= 15:
-        tier = 'tier4'
-    else:
-        tier = 'tier5'
+        return 'tier4'
+    return 'tier5'
 
-    e = generate_enemy(tier, registry)
 
+def _apply_level_scaling(e, player_level):
     level_mult = 1.0 + max(0, (player_level - 1)) * 0.05
 
     e.max_health = max(1, int(e.max_health * level_mult))
@@ -167,5 +360,41 @@ def generate_enemy_for_player(player_level: int, registry: PluginRegistry):
 
     e.xp_reward = max(1, int(e.xp_reward * (1.0 + (player_level - 1) * 0.02)))
     e.gold_reward = max(0, int(e.gold_reward * (1.0 + (player_level - 1) * 0.02)))
+    return e
 
-    return e
\ No newline at end of file
+
+def generate_enemy_for_player(player_level: int, registry: PluginRegistry = None, rng=None):
+    e = generate_enemy(tier_for_level(player_level), registry, rng)
+    return _apply_level_scaling(e, player_level)
+
+
+def generate_enemies(tier_or_level, count, seed=None, chunk_size=None, registry: PluginRegistry = None):
+    """Lazily generate `count` enemies for a tier ('tier2') or a player level (int).
+
+    Yields `Enemy` objects one at a time, or `EnemyBatch` chunks of up to
+    `chunk_size` enemies when `chunk_size` is given (use `batch.to_arrays()` to feed
+    `vector_combat`). `seed` may be an int/str seed, a `GameRNG` or None for the
+    default context; the same seed always yields the same sequence, however it is chunked.
+    """
+    rng = seed if isinstance(seed, GameRNG) else GameRNG(seed)
+    if isinstance(tier_or_level, str):
+        def make():
+            return generate_enemy(tier_or_level, registry, rng)
+    else:
+        tier = tier_for_level(tier_or_level)
+
+        def make():
+            return _apply_level_scaling(generate_enemy(tier, registry, rng), tier_or_level)
+
+    if not chunk_size:
+        for _ in range(count):
+            yield make()
+        return
+
+    while count > 0:
+        n = min(chunk_size, count)
+        batch = EnemyBatch()
+        for _ in range(n):
+            batch.append(make())
+        count -= n
+        yield batch
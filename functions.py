@@ -1,5 +1,5 @@
 import time
-import random
+import messagebus
 
 class TextFuncs:
     # Optional GUI logger callback that can be set by the UI (main window).
@@ -41,60 +41,215 @@ class TextFuncs:
                     TextFuncs._gui_logger(text)
                     return
                 except Exception:
-                    # If GUI logger fails, fallback to terminal printing
+                    # If GUI logger fails, fallback to the message bus
                     pass
         except Exception:
             pass
 
-        # Fallback: character-by-character terminal print
-        for char in text:
-            print(char, end='', flush=True)
-            time.sleep(delay + random.uniform(0, offset))
-        print()  # For newline after the text is printed
+        # Fallback: queue for the active message sink (a background typewriter by
+        # default) so the caller never waits for the text to be printed
+        messagebus.publish(text, delay, offset)
+
+    @staticmethod
+    def flush_messages(timeout=None):
+        """Wait until queued terminal messages have been printed."""
+        return messagebus.get_sink().flush(timeout)
 
 
 # --- Save / Load Game --------------------------------------------------
+import atexit
+import itertools
 import json
 import os
-from items import get_item_by_name
+import tempfile
+from array import array
+import struct
+import threading
+from items import get_item_by_id, get_item_by_name, get_item_id, instantiate
 import sys
 from pathlib import Path
 
 
-def _serialize_player():
-    """Create a JSON-serializable dict for the current player state."""
-    from player import player
+SAVE_FIELDS = ['name', 'level', 'experience', 'health', 'max_health', 'strength', 'agility', 'gold', 'inventory_capacity', 'attack_power_bonus', 'armor_bonus']
+EQUIPMENT_SLOTS = ('weapon', 'armor', 'accessory')
+
+
+def _serialize_player(p=None, item_ids=False):
+    """Create a JSON-serializable dict for the player state `p` (defaults to the current player).
+
+    Items are stored by name, or by integer ID (see `items.ITEM_IDS`) with `item_ids=True`;
+    see `item_ref` for items with per-instance data.
+    """
+    from player import resolve_player
+    player = resolve_player(p)
     data = {}
     # Primitive fields
-    fields = ['name', 'level', 'experience', 'health', 'max_health', 'strength', 'agility', 'gold', 'inventory_capacity', 'attack_power_bonus', 'armor_bonus']
-    for f in fields:
+    for f in SAVE_FIELDS:
         data[f] = player.get(f)
-    # Inventory as names
-    data['inventory'] = [getattr(it, 'name', None) for it in player.get('inventory', [])]
-    # Equipment as names or None
-    data['equipment'] = {slot: (getattr(it, 'name', None) if it else None) for slot, it in player.get('equipment', {}).items()}
+    ref = lambda it: item_ref(it, item_ids)
+    # Inventory as names/IDs
+    data['inventory'] = [ref(it) for it in player.get('inventory', [])]
+    # Equipment as names/IDs or None
+    data['equipment'] = {slot: (ref(it) if it else None) for slot, it in player.get('equipment', {}).items()}
     return data
 
 
-def _deserialize_player(d):
-    """Load player dict values from deserialized JSON content `d`."""
-    from player import player
+def item_ref(item, item_ids=False):
+    """Return the save reference of `item`: its name (or ID with `item_ids`), or
+    `{'item': <name or ID>, 'data': {...}}` for an item instance with per-instance data."""
+    ref = get_item_id(item) if item_ids else getattr(item, 'name', None)
+    data = getattr(item, 'data', None)
+    return {'item': ref, 'data': dict(data)} if data else ref
+
+
+def _resolve_item(ref):
+    if isinstance(ref, dict):
+        return instantiate(_resolve_item(ref.get('item')), ref.get('data'))
+    if isinstance(ref, int):
+        return get_item_by_id(ref)
+    return get_item_by_name(ref)
+
+
+def _deserialize_player(d, p=None):
+    """Load player dict values from deserialized save content `d` into `p` (defaults to the current player).
+
+    Items may be given by name or by integer ID; each loaded item goes through
+    `items.instantiate`, so non-stackable items become distinct instances.
+    """
+    from player import resolve_player
+    player = resolve_player(p)
     # Primitive fields (only set if present)
-    fields = ['name', 'level', 'experience', 'health', 'max_health', 'strength', 'agility', 'gold', 'inventory_capacity', 'attack_power_bonus', 'armor_bonus']
-    for f in fields:
+    for f in SAVE_FIELDS:
         if f in d:
             player[f] = d[f]
     # Inventory
-    player['inventory'] = []
-    for name in d.get('inventory', []):
-        it = get_item_by_name(name)
-        if it:
-            player['inventory'].append(it)
+    refs = d.get('inventory', [])
+    if all(type(ref) is int for ref in refs):
+        # fast path: integer IDs index straight into the item table (mixed saves take the slow path)
+        player['inventory'] = [instantiate(it) for it in map(get_item_by_id, refs) if it]
+    else:
+        player['inventory'] = [instantiate(it) for it in map(_resolve_item, refs) if it]
     # Equipment
     eq = d.get('equipment', {}) or {}
-    for slot in ('weapon', 'armor', 'accessory'):
-        nm = eq.get(slot)
-        player['equipment'][slot] = get_item_by_name(nm) if nm else None
+    for slot in EQUIPMENT_SLOTS:
+        ref = eq.get(slot)
+        player['equipment'][slot] = instantiate(_resolve_item(ref)) if ref else None
+
+
+# --- Binary save format ---------------------------------------------------
+# Little endian, one fixed-size block followed by three variable parts:
+#   fixed      <4sBH + <q per BINARY_INT_FIELDS + <H per EQUIPMENT_SLOTS + <H
+#              (magic, schema version, presence bitmask of the int fields,
+#               field values, equipped item IDs (0 = empty), inventory count)
+#   inventory  <H item ID per inventory entry
+#   item data  <I length + utf-8 JSON {"inventory": {"<index>": data}, "equipment": {slot: data}}
+#              holding the per-instance data of the items that have any (length 0 if none);
+#              schema version 2 and later
+#   name       utf-8, rest of the file
+# Item IDs come from `items.ITEM_IDS`; unregistered items are dropped, as with JSON saves.
+BINARY_SAVE_MAGIC = b'RPGS'
+BINARY_SAVE_VERSION = 2
+BINARY_INT_FIELDS = SAVE_FIELDS[1:]
+
+_SAVE_FIXED = struct.Struct(f'<4sBH{len(BINARY_INT_FIELDS)}q{len(EQUIPMENT_SLOTS)}HH')
+_SAVE_DATA_LEN = struct.Struct('<I')
+
+
+def _item_id(ref):
+    if isinstance(ref, dict):
+        ref = ref.get('item')
+    return ref if isinstance(ref, int) else get_item_id(ref)
+
+
+def _with_data(item_id, data):
+    return {'item': item_id, 'data': data} if data else item_id
+
+
+def encode_binary_save(data):
+    """Encode save content (`{'player': ...}` with item names or IDs) as binary save bytes."""
+    d = data['player']
+    values = [d.get(f) for f in BINARY_INT_FIELDS]
+    mask = sum(1 << i for i, v in enumerate(values) if v is not None)
+    inv = array('H')
+    item_data = {}
+    for ref in d.get('inventory', []):
+        item_id = _item_id(ref)
+        if item_id:
+            if isinstance(ref, dict) and ref.get('data'):
+                item_data.setdefault('inventory', {})[str(len(inv))] = ref['data']
+            inv.append(item_id)
+    eq = d.get('equipment') or {}
+    eq_ids = [_item_id(eq[s]) if eq.get(s) else 0 for s in EQUIPMENT_SLOTS]
+    for slot, item_id in zip(EQUIPMENT_SLOTS, eq_ids):
+        if item_id and isinstance(eq[slot], dict) and eq[slot].get('data'):
+            item_data.setdefault('equipment', {})[slot] = eq[slot]['data']
+    fixed = _SAVE_FIXED.pack(BINARY_SAVE_MAGIC, BINARY_SAVE_VERSION, mask,
+                             *[v if v is not None else 0 for v in values], *eq_ids, len(inv))
+    if sys.byteorder != 'little':
+        inv.byteswap()
+    extra = json.dumps(item_data, separators=(',', ':')).encode('utf-8') if item_data else b''
+    return fixed + inv.tobytes() + _SAVE_DATA_LEN.pack(len(extra)) + extra + (d.get('name') or '').encode('utf-8')
+
+
+def decode_binary_save(blob):
+    """Decode binary save bytes into save content with integer item IDs
+    (`{'item': ID, 'data': {...}}` for items with per-instance data)."""
+    if blob[:4] != BINARY_SAVE_MAGIC:
+        raise ValueError('Not a binary save file')
+    fields = _SAVE_FIXED.unpack_from(blob, 0)
+    if fields[1] > BINARY_SAVE_VERSION:
+        raise ValueError(f'Unsupported save schema version {fields[1]}')
+    mask, n_fields = fields[2], len(BINARY_INT_FIELDS)
+    d = {f: v for i, (f, v) in enumerate(zip(BINARY_INT_FIELDS, fields[3:3 + n_fields])) if mask & (1 << i)}
+    d['equipment'] = {slot: (i or None) for slot, i in zip(EQUIPMENT_SLOTS, fields[3 + n_fields:-1])}
+    end = _SAVE_FIXED.size + 2 * fields[-1]
+    inv = array('H')
+    inv.frombytes(blob[_SAVE_FIXED.size:end])
+    if sys.byteorder != 'little':
+        inv.byteswap()
+    d['inventory'] = inv.tolist()
+    if fields[1] >= 2:
+        (size,) = _SAVE_DATA_LEN.unpack_from(blob, end)
+        end += _SAVE_DATA_LEN.size
+        if size:
+            item_data = json.loads(blob[end:end + size].decode('utf-8'))
+            end += size
+            for i, data in item_data.get('inventory', {}).items():
+                d['inventory'][int(i)] = _with_data(d['inventory'][int(i)], data)
+            for slot, data in item_data.get('equipment', {}).items():
+                if d['equipment'].get(slot):
+                    d['equipment'][slot] = _with_data(d['equipment'][slot], data)
+    d['name'] = blob[end:].decode('utf-8')
+    return {'player': d}
+
+
+def with_item_names(d):
+    """Return a copy of save content `d` with item IDs resolved back to names (see `item_ref`; for JSON output)."""
+    d = dict(d)
+    d['inventory'] = [item_ref(it) for it in map(_resolve_item, d.get('inventory', [])) if it]
+    d['equipment'] = {slot: (item_ref(_resolve_item(ref)) if ref else None)
+                      for slot, ref in (d.get('equipment') or {}).items()}
+    return d
+
+
+def _read_save(filepath):
+    """Read a save file in either format and return its content."""
+    with open(filepath, 'rb') as fh:
+        blob = fh.read()
+    if blob[:4] == BINARY_SAVE_MAGIC:
+        return decode_binary_save(blob)
+    return json.loads(blob.decode('utf-8'))
+
+
+def convert_save(src, dst, binary=True):
+    """Convert the save at `src` to binary (or JSON with `binary=False`) at `dst`."""
+    data = _read_save(src)
+    if binary:
+        out = encode_binary_save(data)
+    else:
+        out = json.dumps({'player': with_item_names(data['player'])}, separators=(',', ':')).encode('utf-8')
+    write_atomic(dst, out)
+    return dst
 
 
 def get_data_dir(app_name='python-game'):
@@ -127,32 +282,190 @@ def get_data_dir(app_name='python-game'):
             return '.'
 
 
-def save_game(filepath=None):
-    """Write the current player state to `filepath` (JSON). Returns True on success."""
+def write_atomic(filepath, data):
+    """Write `data` (bytes) to `filepath` via a temp file in the same directory and an atomic rename.
+
+    A crash mid-write leaves the previous file intact instead of a truncated one.
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(filepath) + '.', suffix='.tmp')
     try:
-        if not filepath:
-            filepath = os.path.join(get_data_dir(), 'savegame.json')
-        data = {'player': _serialize_player()}
-        with open(filepath, 'w', encoding='utf-8') as fh:
-            json.dump(data, fh, indent=2)
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, filepath)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class SaveWriter:
+    """Background thread that writes save snapshots to disk.
+
+    `submit()` only records the snapshot and returns; bursts of saves to the same
+    path are coalesced so only the newest snapshot is written. Writes carry a
+    sequence number, so an older snapshot never overwrites a newer one (e.g. one
+    written synchronously by `save_game`).
+
+    `stats` holds `requested`, `written`, `coalesced`, `failed`, `queue_depth`,
+    `max_queue_depth` and save latency (submit to file replaced) as
+    `last_latency_ms` / `max_latency_ms`.
+
+    `store(key, data)` does the actual write (default: `write_atomic` to the
+    path `key`); other backends pass their own to get the same queueing.
+    """
+
+    def __init__(self, store=None, name='save-writer'):
+        self._store = store or write_atomic
+        self._name = name
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._pending = {}
+        self._written_seq = {}
+        self._seq = itertools.count(1)
+        self._busy = False
+        self._thread = None
+        self.stats = {'requested': 0, 'written': 0, 'coalesced': 0, 'failed': 0, 'queue_depth': 0,
+                      'max_queue_depth': 0, 'last_latency_ms': 0.0, 'max_latency_ms': 0.0}
+
+    def next_seq(self):
+        return next(self._seq)
+
+    def submit(self, filepath, data, seq=None):
+        """Queue `data` (bytes) for `filepath`, replacing any snapshot still waiting for that path."""
+        with self._cond:
+            if filepath in self._pending:
+                self.stats['coalesced'] += 1
+            self._pending[filepath] = (seq or self.next_seq(), data, time.perf_counter())
+            self.stats['requested'] += 1
+            depth = self.stats['queue_depth'] = len(self._pending)
+            self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], depth)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def write(self, filepath, data, seq, queued_at=None):
+        """Write a snapshot now unless a newer one for `filepath` was already written. Returns True on success."""
+        with self._write_lock:
+            if seq <= self._written_seq.get(filepath, 0):
+                return True
+            try:
+                self._store(filepath, data)
+            except Exception:
+                self.stats['failed'] += 1
+                return False
+            self._written_seq[filepath] = seq
+        self.stats['written'] += 1
+        if queued_at is not None:
+            latency = (time.perf_counter() - queued_at) * 1000.0
+            self.stats['last_latency_ms'] = latency
+            self.stats['max_latency_ms'] = max(self.stats['max_latency_ms'], latency)
         return True
-    except Exception:
-        return False
 
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                filepath, (seq, data, queued_at) = self._pending.popitem()
+                self.stats['queue_depth'] = len(self._pending)
+                self._busy = True
+            try:
+                self.write(filepath, data, seq, queued_at)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Block until every queued snapshot has been written. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+
+SAVE_WRITER = SaveWriter()
+atexit.register(SAVE_WRITER.flush, 5.0)
 
-def load_game(filepath=None):
-    """Load player state from `filepath` (JSON). Returns True on success."""
+
+def flush_saves(timeout=None):
+    """Wait for background saves to reach the disk (call before exiting)."""
+    return SAVE_WRITER.flush(timeout)
+
+
+def save_game(filepath=None, p=None, background=False, binary=None):
+    """Write the player state `p` (defaults to the current player) to `filepath`. Returns True on success.
+
+    Without `filepath` the save goes to the active `persistence` backend. Files
+    are JSON unless `binary=True` (or `binary` is None and the path ends in `.sav`). The file is replaced atomically. With `background=True` a snapshot
+    is taken now and written by the save writer thread; True then means it was queued.
+    """
+    if not filepath:
+        # no explicit file: the configured persistence backend decides where the save goes
+        from persistence import get_backend
+        return get_backend().save_player(p=p, background=background)
     try:
-        if not filepath:
-            filepath = os.path.join(get_data_dir(), 'savegame.json')
+        if binary is None:
+            binary = filepath.endswith('.sav')
+        if binary:
+            data = encode_binary_save({'player': _serialize_player(p, item_ids=True)})
+        else:
+            data = json.dumps({'player': _serialize_player(p)}, separators=(',', ':')).encode('utf-8')
+        seq = SAVE_WRITER.next_seq()
+        if background:
+            SAVE_WRITER.submit(filepath, data, seq)
+            return True
+        return SAVE_WRITER.write(filepath, data, seq)
     except Exception:
-        pass
+        return False
+
+
+def load_game(filepath=None, p=None):
+    """Load player state from `filepath` (JSON or binary) into `p` (defaults to the current player). Returns True on success."""
+    if not filepath:
+        from persistence import get_backend
+        return get_backend().load_player(p=p)
     if not os.path.exists(filepath):
         return False
     try:
-        with open(filepath, 'r', encoding='utf-8') as fh:
-            data = json.load(fh)
-        _deserialize_player(data.get('player', {}))
+        data = _read_save(filepath)
+        _deserialize_player(data.get('player', {}), p)
         return True
     except Exception:
-        return False
\ No newline at end of file
+        return False
+
+
+def benchmark_save_formats(p=None, rounds=2000):
+    """Compare size and load time of indented JSON, compact JSON and binary saves of `p`.
+
+    Returns {format: {'bytes': size, 'load_us': mean decode + deserialize time}}.
+    """
+    from player import resolve_player
+    src = resolve_player(p)
+    blobs = {
+        'json_indent': json.dumps({'player': _serialize_player(src)}, indent=2).encode('utf-8'),
+        'json': json.dumps({'player': _serialize_player(src)}, separators=(',', ':')).encode('utf-8'),
+        'binary': encode_binary_save({'player': _serialize_player(src, item_ids=True)}),
+    }
+    results = {}
+    for fmt, blob in blobs.items():
+        decode = decode_binary_save if fmt == 'binary' else (lambda b: json.loads(b.decode('utf-8')))
+        target = {'inventory': [], 'equipment': {}}
+        start = time.perf_counter()
+        for _ in range(rounds):
+            _deserialize_player(decode(blob)['player'], target)
+        results[fmt] = {'bytes': len(blob), 'load_us': (time.perf_counter() - start) / rounds * 1e6}
+    return results
+
+
+if __name__ == '__main__':
+    from items import ITEM_REGISTRY
+    from player import new_player_state
+    bench_player = new_player_state()
+    bench_player['inventory'] = list(ITEM_REGISTRY.values()) * 2
+    for fmt, r in benchmark_save_formats(bench_player).items():
+        print(f"{fmt:12} {r['bytes']:6d} bytes  {r['load_us']:8.1f} us/load")
\ No newline at end of file
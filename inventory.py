@@ -0,0 +1,311 @@
+"""Inventory container with stacks and O(1) lookups.
+
+`Inventory` behaves like the list it replaces (`len`, iteration, `in`,
+`append`, `remove`, indexing, equality with lists), so existing code keeps
+working, but internally it stores stacks:
+
+- consumables stack: the same item added twice is one stack with quantity 2;
+  every other item is a stack of its own;
+- secondary indexes map item name, `item_type` and equipment slot to their
+  stacks, so `find('Health Potion')`, `remove(item)` and `take(name)` do not
+  scan the inventory;
+- capacity counts units (like `len()`), and `add()` / `append()` refuse items
+  beyond it. The capacity of a player's inventory is the player's
+  `inventory_capacity`; an inventory without one is unbounded.
+
+A player's inventory reports additions and removals to its owner (a
+`player_store.PlayerStore`), which turns them into change events.
+"""
+import itertools
+
+STACKABLE_TYPES = ('consumable',)
+
+
+class InventoryFull(ValueError):
+    pass
+
+
+def item_slot(item):
+    """Return the equipment slot that this item would occupy."""
+    eff = getattr(item, 'effect', {}) or {}
+    if 'attack_power' in eff:
+        return 'weapon'
+    elif 'armor' in eff:
+        return 'armor'
+    else:
+        return 'accessory'
+
+
+def _name(item):
+    return getattr(item, 'name', item)
+
+
+class Inventory:
+    """List-compatible bag of items kept as stacks (see the module docstring)."""
+
+    __slots__ = ('_stacks', '_by_name', '_by_type', '_by_slot', '_count', '_keys', '_capacity', '_owner')
+
+    def __init__(self, items=(), capacity=None, owner=None):
+        # stack key -> [item, quantity], in the order stacks were created
+        self._stacks = {}
+        # name / item_type / slot -> {stack key: None} (insertion-ordered sets)
+        self._by_name = {}
+        self._by_type = {}
+        self._by_slot = {}
+        self._count = 0
+        self._keys = itertools.count()
+        self._capacity = capacity
+        self._owner = None
+        for item in items:
+            self._add(item, 1)
+        self._owner = owner
+
+    def __reduce__(self):
+        return (self.__class__, (list(self), self._capacity))
+
+    # --- capacity ---------------------------------------------------------
+    @property
+    def capacity(self):
+        if self._capacity is not None:
+            return self._capacity
+        if self._owner is not None:
+            return self._owner.get('inventory_capacity')
+        return None
+
+    @capacity.setter
+    def capacity(self, value):
+        self._capacity = value
+
+    def free(self):
+        """Units that still fit (None when unbounded)."""
+        cap = self.capacity
+        return None if cap is None else max(0, cap - self._count)
+
+    def is_full(self):
+        cap = self.capacity
+        return cap is not None and self._count >= cap
+
+    # --- internal stack bookkeeping ---------------------------------------
+    def _stack_key(self, item):
+        if getattr(item, 'item_type', None) in STACKABLE_TYPES:
+            for key in self._by_name.get(_name(item), ()):
+                if self._stacks[key][0] is item:
+                    return key, False
+        return next(self._keys), True
+
+    def _add(self, item, qty):
+        key, new = self._stack_key(item)
+        if new:
+            self._stacks[key] = [item, qty]
+            self._by_name.setdefault(_name(item), {})[key] = None
+            self._by_type.setdefault(getattr(item, 'item_type', None), {})[key] = None
+            if getattr(item, 'item_type', None) == 'equipment':
+                self._by_slot.setdefault(item_slot(item), {})[key] = None
+        else:
+            self._stacks[key][1] += qty
+        self._count += qty
+        if self._owner is not None:
+            for _ in range(qty):
+                self._owner._item_event('add', item)
+
+    def _take_from(self, key):
+        stack = self._stacks[key]
+        item = stack[0]
+        stack[1] -= 1
+        self._count -= 1
+        if stack[1] <= 0:
+            del self._stacks[key]
+            for index, value in ((self._by_name, _name(item)), (self._by_type, getattr(item, 'item_type', None)),
+                                 (self._by_slot, item_slot(item))):
+                keys = index.get(value)
+                if keys is not None and key in keys:
+                    del keys[key]
+                    if not keys:
+                        del index[value]
+        if self._owner is not None:
+            self._owner._item_event('remove', item)
+        return item
+
+    def _find_key(self, item):
+        keys = self._by_name.get(_name(item), ())
+        # the very same object first; an item definition then refers to its first held instance
+        for key in keys:
+            if self._stacks[key][0] is item:
+                return key
+        for key in keys:
+            if getattr(self._stacks[key][0], 'defn', None) is item:
+                return key
+        return None
+
+    # --- lookups ------------------------------------------------------------
+    def find(self, name):
+        """Return the first item called `name`, or None."""
+        for key in self._by_name.get(name, ()):
+            return self._stacks[key][0]
+        return None
+
+    def find_item(self, item):
+        """Return the held object that `item` refers to: `item` itself if it is held, otherwise
+        (for an item definition) the first held instance of it, or None."""
+        key = self._find_key(item)
+        return None if key is None else self._stacks[key][0]
+
+    def quantity(self, name):
+        """Number of units of items called `name`."""
+        return sum(self._stacks[key][1] for key in self._by_name.get(name, ()))
+
+    def by_type(self, item_type):
+        return [self._stacks[key][0] for key in self._by_type.get(item_type, ())]
+
+    def by_slot(self, slot):
+        return [self._stacks[key][0] for key in self._by_slot.get(slot, ())]
+
+    def stacks(self):
+        """Return [(item, quantity), ...] in inventory order."""
+        return [(item, qty) for item, qty in self._stacks.values()]
+
+    # --- mutation -----------------------------------------------------------
+    def add(self, item, qty=1):
+        """Add `qty` units of `item`. Returns False (and adds nothing) if they do not fit."""
+        free = self.free()
+        if free is not None and qty > free:
+            return False
+        self._add(item, qty)
+        return True
+
+    def take(self, name):
+        """Remove and return one item called `name`, or None if there is none."""
+        for key in self._by_name.get(name, ()):
+            return self._take_from(key)
+        return None
+
+    def append(self, item):
+        if not self.add(item):
+            raise InventoryFull(f"No inventory space for {_name(item)}")
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def insert(self, index, item):
+        # stacks keep their own order; the position is not meaningful
+        self.append(item)
+
+    def remove(self, item):
+        key = self._find_key(item)
+        if key is None:
+            raise ValueError(f"{_name(item)!r} is not in the inventory")
+        self._take_from(key)
+
+    def pop(self, index=-1):
+        item = self[index]
+        self.remove(item)
+        return item
+
+    def clear(self):
+        while self._stacks:
+            self._take_from(next(iter(self._stacks)))
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            for item in list(self)[index]:
+                self.remove(item)
+        else:
+            self.pop(index)
+
+    # --- list protocol --------------------------------------------------------
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for item, qty in list(self._stacks.values()):
+            for _ in range(qty):
+                yield item
+
+    def __reversed__(self):
+        return reversed(list(self))
+
+    def __contains__(self, item):
+        return self._find_key(item) is not None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('inventory index out of range')
+        for item, qty in self._stacks.values():
+            if index < qty:
+                return item
+            index -= qty
+
+    def index(self, item):
+        pos = 0
+        for held, qty in self._stacks.values():
+            if held is item or held == item:
+                return pos
+            pos += qty
+        raise ValueError(f"{_name(item)!r} is not in the inventory")
+
+    def count(self, item):
+        return sum(qty for held, qty in (self._stacks[key] for key in self._by_name.get(_name(item), ()))
+                   if held is item or held == item)
+
+    def copy(self):
+        return list(self)
+
+    def __eq__(self, other):
+        if isinstance(other, (Inventory, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Inventory({list(self)!r})"
+
+
+def find_item(items, name):
+    """First item called `name` in an `Inventory` (indexed) or any other iterable of items."""
+    if isinstance(items, Inventory):
+        return items.find(name)
+    for it in items:
+        if getattr(it, 'name', None) == name:
+            return it
+    return None
+
+
+def held_item(items, item):
+    """`Inventory.find_item` for an `Inventory` or any other iterable of items."""
+    if isinstance(items, Inventory):
+        return items.find_item(item)
+    instance = None
+    for it in items:
+        if it is item:
+            return it
+        if instance is None and getattr(it, 'defn', None) is item:
+            instance = it
+    return instance
+
+
+def add_item(items, item, capacity=None):
+    """`Inventory.add` for an `Inventory` or a plain list holding at most `capacity` items
+    (an `Inventory` uses its own capacity). Returns False if the item does not fit."""
+    if isinstance(items, Inventory):
+        return items.add(item)
+    if capacity is not None and len(items) >= capacity:
+        return False
+    items.append(item)
+    return True
+
+
+def count_named(items, name):
+    """Number of items called `name` in an `Inventory` (indexed) or any other iterable of items."""
+    if isinstance(items, Inventory):
+        return items.quantity(name)
+    return sum(1 for it in items if getattr(it, 'name', None) == name)
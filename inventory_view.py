@@ -0,0 +1,138 @@
+"""Inventory list for the main window that scales to thousands of items.
+
+`InventoryView` shows the inventory in a `ttk.Treeview`: rows are lightweight
+tree items rather than a Label + Button pair per item, and Tk only draws the
+rows that are scrolled into view. The view is built once and then kept in sync
+from the `player_store` change events, applying each inventory add / remove
+as a single row insert, delete or quantity update (found through an
+item -> row index) instead of rebuilding the list.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+import player_store
+from inventory import STACKABLE_TYPES
+from player import resolve_player
+
+COLUMNS = (('name', 'Item', 220), ('qty', 'Qty', 40), ('type', 'Type', 90), ('rarity', 'Rarity', 80),
+           ('value', 'Value', 60))
+
+
+def _row_values(item, qty):
+    return (item.name, qty, getattr(item, 'item_type', ''), getattr(item, 'rarity', 'common'),
+            getattr(item, 'value', ''))
+
+
+def _stacks(items):
+    """(item, quantity) pairs in inventory order; a plain list is one row per item."""
+    stacks = getattr(items, 'stacks', None)
+    return stacks() if stacks is not None else [(item, 1) for item in items]
+
+
+class InventoryView:
+    """Treeview over `p['inventory']`; `on_inspect(item)` is called for the selected row.
+
+    Rows mirror the inventory's stacks (one row per stack, with its quantity),
+    in the same order: a new stack is always the last one.
+    """
+
+    def __init__(self, parent, p=None, on_inspect=None, height=15):
+        self.p = resolve_player(p)
+        self.on_inspect = on_inspect
+        self.frame = tk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=[c[0] for c in COLUMNS], show='headings',
+                                 height=height, selectmode='browse')
+        for key, title, width in COLUMNS:
+            self.tree.heading(key, text=title)
+            self.tree.column(key, width=width, stretch=(key == 'name'))
+        scroll = tk.Scrollbar(self.frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scroll.set)
+        self.tree.pack(side='left', fill='both', expand=True)
+        scroll.pack(side='right', fill='y')
+        self.tree.bind('<Double-1>', lambda e: self.inspect_selected())
+        self.tree.bind('<Return>', lambda e: self.inspect_selected())
+        self.tree.bind('<Destroy>', lambda e: self.close() if e.widget is self.tree else None)
+
+        # iid -> [item, quantity] for every row, and id(item) -> its rows' iids in stack order
+        self._rows = {}
+        self._by_item = {}
+        self._count = 0
+        self.reload()
+        player_store.subscribe(self._on_events, self.p)
+
+    # --- rows -----------------------------------------------------------
+    def reload(self):
+        """Rebuild all rows from the inventory (only needed once, or after an unreported change)."""
+        if self._rows:
+            self.tree.delete(*self._rows)
+        self._rows = {}
+        self._by_item = {}
+        self._count = 0
+        for item, qty in _stacks(self.p.get('inventory', [])):
+            self._new_row(item, qty)
+
+    def _new_row(self, item, qty):
+        iid = self.tree.insert('', 'end', values=_row_values(item, qty))
+        self._rows[iid] = [item, qty]
+        self._by_item.setdefault(id(item), []).append(iid)
+        self._count += qty
+
+    def _add(self, item):
+        iids = self._by_item.get(id(item))
+        if iids and getattr(item, 'item_type', None) in STACKABLE_TYPES:
+            # joins the existing stack, like `Inventory` does
+            row = self._rows[iids[0]]
+            row[1] += 1
+            self._count += 1
+            self.tree.item(iids[0], values=_row_values(item, row[1]))
+        else:
+            self._new_row(item, 1)
+
+    def _remove(self, item):
+        """Take one unit of `item` off its first stack (the one `Inventory.remove` takes from)."""
+        iids = self._by_item.get(id(item))
+        if not iids:
+            return False
+        iid = iids[0]
+        row = self._rows[iid]
+        row[1] -= 1
+        self._count -= 1
+        if row[1] > 0:
+            self.tree.item(iid, values=_row_values(item, row[1]))
+        else:
+            del self._rows[iid]
+            del iids[0]
+            if not iids:
+                del self._by_item[id(item)]
+            self.tree.delete(iid)
+        return True
+
+    def _on_events(self, p, events):
+        for ev in events:
+            if ev.op == 'add':
+                self._add(ev.new)
+            elif ev.op == 'remove':
+                self._remove(ev.old)
+            elif ev.path == 'inventory':
+                self.reload()
+                return
+        if self._count != len(self.p.get('inventory', [])):
+            self.reload()
+
+    # --- selection ------------------------------------------------------
+    def selected_item(self):
+        sel = self.tree.selection()
+        row = self._rows.get(sel[0]) if sel else None
+        return row[0] if row else None
+
+    def inspect_selected(self):
+        item = self.selected_item()
+        if item is not None and self.on_inspect is not None:
+            self.on_inspect(item)
+
+    def __len__(self):
+        """Units shown, like `len()` of the inventory."""
+        return self._count
+
+    def close(self):
+        player_store.unsubscribe(self._on_events, self.p)
@@ -1,13 +1,62 @@
-# Item class definition
+"""Item catalog.
+
+Items come in two layers:
+
+- `ItemDef` is an immutable, slotted definition (name, type, effect, value,
+  rarity). Every definition in the catalog below exists exactly once and is
+  shared by everything that refers to it, so memory scales with the number of
+  distinct items rather than with how many the players carry. `Item` is the
+  old name and still works as a constructor.
+- `ItemInstance` is one concrete item in the world: a process-unique `uid`, the
+  `defn` it was made from and optional per-instance `data` (durability, rolled
+  affixes, ...). It reads like its definition (`name`, `effect`, `use()`, ...)
+  but is identified only by its `uid`, so two Iron Swords are two distinct
+  items for `remove()`, equipping and selling. Passing the definition to those
+  picks the first held instance of it (`inventory.held_item`).
+
+`instantiate()` decides which one an acquired item becomes: stackable items
+(consumables) without per-instance data stay the shared definition and are
+counted by `inventory.Inventory` stacks; everything else gets an instance.
+"""
+import itertools
+import types
+
+from inventory import STACKABLE_TYPES
+
+
+class ItemDef:
+    __slots__ = ('name', 'item_type', 'effect', 'value', 'rarity')
 
-class Item:
     def __init__(self, name, item_type, effect, value, rarity='common'):
-        self.name = name
-        self.item_type = item_type  # eg, "consumable", "equipment"
-        self.effect = effect        # eg, {"health": +50}
-        self.value = value          # eg, gold value
+        set_ = object.__setattr__
+        set_(self, 'name', name)
+        set_(self, 'item_type', item_type)  # eg, "consumable", "equipment"
+        set_(self, 'effect', types.MappingProxyType(dict(effect or {})))  # eg, {"health": +50}
+        set_(self, 'value', value)          # eg, gold value
         # Rarity: common, uncommon, rare, epic, legendary
-        self.rarity = rarity
+        set_(self, 'rarity', rarity)
+
+    def __setattr__(self, attr, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    __delattr__ = __setattr__
+
+    def __reduce__(self):
+        # catalog items unpickle to the shared definition
+        if ITEM_REGISTRY.get(self.name) is self:
+            return (get_item_by_name, (self.name,))
+        return (self.__class__, (self.name, self.item_type, dict(self.effect), self.value, self.rarity))
+
+    def __repr__(self):
+        return f"ItemDef({self.name!r})"
+
+    @property
+    def defn(self):
+        return self
+
+    @property
+    def stackable(self):
+        return self.item_type in STACKABLE_TYPES
 
     def description(self):
         """Return a multi-line description of the item for tooltips and UI."""
@@ -47,25 +96,89 @@ class Item:
                     return max_val - current
         return change
 
-    def use(self, target):
+    def apply(self, target):
+        """Apply the item's effect to `target` (a player dict or an object with stat attributes)."""
         for stat, change in self.effect.items():
             if self._has_stat(target, stat):
                 current = self._get_stat(target, stat) or 0
                 delta = self.check_overflow(target, stat, change)
                 self._set_stat(target, stat, current + delta)
 
+    def use(self, target, item=None):
+        """Apply the effect and remove `item` (default: this item) from the target's inventory."""
+        self.apply(target)
+        item = self if item is None else item
         # remove this item from the passed target's inventory if present
         try:
             if self._is_mapping(target) and "inventory" in target:
-                target["inventory"].remove(self)
+                target["inventory"].remove(item)
             elif hasattr(target, "inventory"):
                 inv = getattr(target, "inventory")
                 if hasattr(inv, "remove"):
-                    inv.remove(self)
+                    inv.remove(item)
         except ValueError:
             # ignore if not in inventory
             pass
 
+
+# Backwards-compatible name for item definitions
+Item = ItemDef
+
+_uids = itertools.count(1)
+
+
+class ItemInstance:
+    """One concrete item: `uid`, the shared `defn` and optional per-instance `data`."""
+
+    __slots__ = ('uid', 'defn', 'data')
+
+    def __init__(self, defn, data=None, uid=None):
+        self.uid = next(_uids) if uid is None else uid
+        self.defn = defn
+        self.data = data
+
+    name = property(lambda self: self.defn.name)
+    item_type = property(lambda self: self.defn.item_type)
+    effect = property(lambda self: self.defn.effect)
+    value = property(lambda self: self.defn.value)
+    rarity = property(lambda self: self.defn.rarity)
+    stackable = property(lambda self: False)
+
+    def description(self):
+        text = self.defn.description()
+        if self.data:
+            text += "\n" + "\n".join(f"{k}: {v}" for k, v in self.data.items())
+        return text
+
+    def use(self, target):
+        self.defn.use(target, item=self)
+
+    def __eq__(self, other):
+        if isinstance(other, ItemInstance):
+            return self.uid == other.uid
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.uid)
+
+    def __repr__(self):
+        return f"ItemInstance({self.defn.name!r}, uid={self.uid})"
+
+
+def instantiate(item, data=None):
+    """Return the item to put into an inventory for `item` (a definition or an instance).
+
+    Stackable definitions without `data` are returned as they are (the shared
+    flyweight); other definitions get a new `ItemInstance`. Instances and None
+    are returned unchanged.
+    """
+    if item is None or isinstance(item, ItemInstance):
+        return item
+    if data is None and item.stackable:
+        return item
+    return ItemInstance(item, data)
+
+
 # Potion definitions
 health_potion = Item("Health Potion", "consumable", {"health": 40}, 10, rarity='common')
 mana_potion = Item("Mana Potion", "consumable", {"mana": 10}, 8, rarity='common')
@@ -106,6 +219,24 @@ ITEM_REGISTRY = {
 }
 
 
+# Integer item IDs used by binary saves (0 means "no item"). IDs follow registry
+# order and are persisted, so new items must be appended at the end.
+ITEMS_BY_ID = [None] + list(ITEM_REGISTRY.values())
+ITEM_IDS = {it.name: i for i, it in enumerate(ITEMS_BY_ID) if it is not None}
+
+
 def get_item_by_name(name):
-    """Return an Item instance by name from registry, or None if not found."""
+    """Return the catalog `ItemDef` called `name`, or None if not found."""
     return ITEM_REGISTRY.get(name)
+
+
+def get_item_by_id(item_id):
+    """Return the catalog `ItemDef` with integer ID `item_id`, or None for 0/unknown IDs."""
+    if 0 < item_id < len(ITEMS_BY_ID):
+        return ITEMS_BY_ID[item_id]
+    return None
+
+
+def get_item_id(item):
+    """Return the integer ID of `item` (an item or a name), or 0 if it is not registered."""
+    return ITEM_IDS.get(getattr(item, 'name', item), 0)
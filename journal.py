@@ -0,0 +1,202 @@
+"""Append-only save journal: a full snapshot followed by small delta records.
+
+Instead of rewriting the whole save after every fight, a `SaveJournal`
+subscribes to the `player_store` change events of one player, buffers them and
+appends only the buffered deltas on `commit()`. Every `compact_every` records
+the journal is compacted into a single fresh snapshot (written atomically).
+
+The file is JSON lines. Each record has `seq`, `ts` and `op`:
+
+    snapshot   {"player": <_serialize_player dict>}
+    stats      {"fields": {"gold": 120, ...}}    new values of changed fields
+    item_add / item_remove                       {"item": name}
+    equip      {"slot": "weapon", "item": name}
+    unequip    {"slot": "weapon"}
+
+Items are referenced as in saves: by name, or as `{"item": name, "data": ...}`
+for items with per-instance data (see `functions.item_ref`).
+
+`recover(path, until=...)` replays records up to a timestamp or sequence
+number, giving point-in-time recovery back to the last compaction.
+"""
+import json
+import os
+import time
+
+import player_store
+from functions import SAVE_FIELDS, _deserialize_player, _serialize_player, item_ref, write_atomic
+from player import resolve_player
+
+# Records appended before the journal is rewritten as one snapshot
+COMPACT_EVERY = 500
+
+
+def _apply(d, rec):
+    """Apply one journal record to a serialized player dict `d` in place."""
+    op = rec['op']
+    if op == 'snapshot':
+        d.clear()
+        d.update(json.loads(json.dumps(rec['player'])))
+    elif op == 'stats':
+        d.update(rec['fields'])
+    elif op == 'item_add':
+        d.setdefault('inventory', []).append(rec['item'])
+    elif op == 'item_remove':
+        try:
+            d.setdefault('inventory', []).remove(rec['item'])
+        except ValueError:
+            pass
+    elif op == 'equip':
+        d.setdefault('equipment', {})[rec['slot']] = rec['item']
+    elif op == 'unequip':
+        d.setdefault('equipment', {})[rec['slot']] = None
+    else:
+        raise ValueError(f"Unknown journal op {op!r}")
+
+
+def read_records(path):
+    """Return the records of a journal file; a torn last line (crash mid-append) is ignored."""
+    records = []
+    with open(path, 'r', encoding='utf-8') as fh:
+        for line in fh:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    return records
+
+
+def recover(path, until=None, until_seq=None):
+    """Rebuild the serialized player dict from a journal.
+
+    Records after timestamp `until` or after sequence number `until_seq` are
+    skipped. Returns None if the journal has no snapshot to start from.
+    """
+    d = None
+    for rec in read_records(path):
+        if until is not None and rec['ts'] > until:
+            break
+        if until_seq is not None and rec['seq'] > until_seq:
+            break
+        if rec['op'] == 'snapshot':
+            d = {}
+        if d is not None:
+            _apply(d, rec)
+    return d
+
+
+def load_journal(path, p=None, until=None, until_seq=None):
+    """Load the journal state (optionally as of `until` / `until_seq`) into `p`. Returns True on success."""
+    try:
+        d = recover(path, until, until_seq)
+    except Exception:
+        return False
+    if d is None:
+        return False
+    _deserialize_player(d, p)
+    return True
+
+
+def _torn(path):
+    """True if the last line of `path` was cut short (an append interrupted by a crash)."""
+    with open(path, 'rb') as fh:
+        fh.seek(0, os.SEEK_END)
+        if not fh.tell():
+            return False
+        fh.seek(-1, os.SEEK_END)
+        return fh.read(1) != b'\n'
+
+
+class SaveJournal:
+    """Journals the changes of one player state to `path`.
+
+    Opening an existing journal first replays it into the player, so the
+    deltas appended afterwards continue from the state the journal holds.
+    A journal without a snapshot, or one whose last append was torn, is
+    rewritten as a fresh snapshot.
+    """
+
+    def __init__(self, path, p=None, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.player = resolve_player(p)
+        self.compact_every = compact_every
+        self._pending = []
+        self._seq = 0
+        self._records = 0
+        self._scalars = {}
+        self._replaced = False
+        if os.path.exists(path):
+            records = read_records(path)
+            state = recover(path)
+            if state is not None:
+                _deserialize_player(state, self.player)
+                self._seq = records[-1]['seq']
+                self._records = 0 if _torn(path) else len(records)
+                self._scalars = {f: state.get(f) for f in SAVE_FIELDS}
+        player_store.subscribe(self._on_events, self.player)
+        if not self._records:
+            self.compact()
+
+    def close(self):
+        player_store.unsubscribe(self._on_events, self.player)
+
+    def _record(self, op, data):
+        self._seq += 1
+        rec = {'seq': self._seq, 'ts': time.time(), 'op': op}
+        rec.update(data)
+        self._pending.append(rec)
+
+    def _on_events(self, p, events):
+        fields = {}
+        for ev in events:
+            if ev.op == 'add':
+                self._record('item_add', {'item': item_ref(ev.new)})
+            elif ev.op == 'remove':
+                self._record('item_remove', {'item': item_ref(ev.old)})
+            elif ev.slot is not None:
+                if ev.new is None:
+                    self._record('unequip', {'slot': ev.slot})
+                else:
+                    self._record('equip', {'slot': ev.slot, 'item': item_ref(ev.new)})
+            elif ev.key in ('inventory', 'equipment'):
+                # a whole container was replaced (e.g. by a load): the next commit snapshots
+                self._replaced = True
+            elif ev.key in SAVE_FIELDS:
+                fields[ev.key] = ev.new
+        if fields:
+            self._scalars.update(fields)
+            self._record('stats', {'fields': fields})
+
+    def commit(self):
+        """Append the buffered deltas (plus any field changed without an event,
+        e.g. on a plain dict player). Returns the number of records written."""
+        changed = {f: self.player.get(f) for f in SAVE_FIELDS if self.player.get(f) != self._scalars.get(f)}
+        if changed:
+            self._scalars.update(changed)
+            self._record('stats', {'fields': changed})
+        if not self._pending and not self._replaced:
+            return 0
+        if self._replaced or self._records + len(self._pending) >= self.compact_every:
+            n = len(self._pending)
+            self.compact()
+            return n
+        lines = ''.join(json.dumps(rec, separators=(',', ':')) + '\n' for rec in self._pending)
+        with open(self.path, 'a', encoding='utf-8') as fh:
+            fh.write(lines)
+            fh.flush()
+            os.fsync(fh.fileno())
+        n = len(self._pending)
+        self._records += n
+        self._pending = []
+        return n
+
+    def compact(self):
+        """Replace the journal with a single snapshot of the current state."""
+        self._seq += 1
+        state = _serialize_player(self.player)
+        rec = {'seq': self._seq, 'ts': time.time(), 'op': 'snapshot', 'player': state}
+        write_atomic(self.path, (json.dumps(rec, separators=(',', ':')) + '\n').encode('utf-8'))
+        self._records = 1
+        self._pending = []
+        self._replaced = False
+        self._scalars = {f: state.get(f) for f in SAVE_FIELDS}
@@ -0,0 +1,129 @@
+"""Local load generator for `server.py`.
+
+Opens `--connections` sockets, creates `--sessions` sessions spread over them and
+has every session fight in a loop (start_combat, attack until the fight ends,
+rest) for `--duration` seconds. Prints throughput and latency percentiles.
+
+    python server.py --enemy-delay 0 &
+    python loadgen.py --connections 50 --sessions 2000 --duration 10
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+
+class Connection:
+    """One socket with request-id based reply matching."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count(1)
+        self._waiting = {}
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    @classmethod
+    async def open(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port, limit=2 ** 20)
+        return cls(reader, writer)
+
+    async def _read_loop(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            reply = json.loads(line)
+            fut = self._waiting.pop(reply.get('id'), None)
+            if fut and not fut.done():
+                fut.set_result(reply)
+        for fut in self._waiting.values():
+            if not fut.done():
+                fut.set_exception(ConnectionError('connection closed'))
+
+    async def request(self, msg):
+        rid = next(self._ids)
+        fut = asyncio.get_running_loop().create_future()
+        self._waiting[rid] = fut
+        self.writer.write(json.dumps(dict(msg, id=rid)).encode('utf-8') + b'\n')
+        await self.writer.drain()
+        return await fut
+
+    async def close(self):
+        self.writer.close()
+        self._reader_task.cancel()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+async def _play(conn, session_id, deadline, latencies, counters):
+    async def call(cmd):
+        t0 = time.perf_counter()
+        reply = await conn.request({'cmd': cmd, 'session': session_id})
+        latencies.append(time.perf_counter() - t0)
+        return reply
+
+    while time.perf_counter() < deadline:
+        reply = await call('start_combat')
+        if not reply.get('ok'):
+            await call('rest')
+            continue
+        while True:
+            reply = await call('attack')
+            if not reply.get('ok') or 'outcome' in reply:
+                break
+        counters['fights'] += 1
+        await call('rest')
+
+
+async def run_load(host, port, connections, sessions, duration):
+    conns = [await Connection.open(host, port) for _ in range(connections)]
+    session_ids = []
+    for i in range(sessions):
+        conn = conns[i % connections]
+        reply = await conn.request({'cmd': 'new_session'})
+        session_ids.append((conn, reply['session']))
+
+    latencies, counters = [], {'fights': 0}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(_play(conn, sid, deadline, latencies, counters) for conn, sid in session_ids))
+    elapsed = time.perf_counter() - start
+    for conn in conns:
+        await conn.close()
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'fights': counters['fights'],
+        'elapsed': elapsed,
+        'requests_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+        'fights_per_sec': counters['fights'] / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': (latencies[-1] * 1000) if latencies else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate load against a local game server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--connections', type=int, default=10)
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run_load(args.host, args.port, args.connections, args.sessions, args.duration))
+    for k, v in result.items():
+        print(f"{k}: {v:.2f}" if isinstance(v, float) else f"{k}: {v}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""Aggregate questions over the combat history.
+
+Records are streamed from the combat log (`combatlog.iter_records`, which uses
+the index to skip records outside a time range or outcome) through small
+generator stages and folded by aggregators, so memory stays constant however
+large the log is:
+
+    recs = records(since=time.time() - 86400)
+    recs = where(recs, tier='tier2')
+    per_enemy, rewards = aggregate(recs, OutcomesPerEnemy(), RewardsPerHour())
+
+Each aggregator has `add(rec)` and `result()`; `aggregate()` feeds one stream to
+several of them in a single pass. The convenience functions
+(`outcomes_per_enemy`, `rewards_per_hour`, `loot_rarity_distribution`) run one
+aggregator over a stream.
+
+Command line:
+
+    python log_analytics.py enemies|rewards|loot|summary [--log PATH] [--hours N] [--json]
+"""
+import argparse
+import collections
+import datetime
+import json
+import time
+
+import combatlog
+
+HOUR = 3600
+
+
+# --- pipeline stages ----------------------------------------------------------
+def records(path=None, since=None, until=None, outcome=None):
+    """Yield fight records oldest first; filters are answered from the log index."""
+    return combatlog.iter_records(path, outcome=outcome, since=since, until=until)
+
+
+def where(recs, **fields):
+    """Yield records whose fields equal the given values (e.g. `where(recs, player='Ann')`)."""
+    for rec in recs:
+        if all(rec.get(k) == v for k, v in fields.items()):
+            yield rec
+
+
+# --- aggregators -------------------------------------------------------------
+class OutcomesPerEnemy:
+    """{enemy: {'win': n, 'defeat': n, 'fled': n}}"""
+
+    def __init__(self):
+        self.counts = {}
+
+    def add(self, rec):
+        row = self.counts.get(rec.get('enemy'))
+        if row is None:
+            row = self.counts[rec.get('enemy')] = dict.fromkeys(combatlog.OUTCOMES, 0)
+        outcome = rec.get('outcome')
+        if outcome in row:
+            row[outcome] += 1
+
+    def result(self):
+        return self.counts
+
+
+class RewardsPerHour:
+    """{hour start (epoch seconds): {'fights': n, 'xp': n, 'gold': n}}, in hour order."""
+
+    def __init__(self):
+        self.hours = {}
+
+    def add(self, rec):
+        hour = int(rec.get('ts', 0) // HOUR * HOUR)
+        row = self.hours.get(hour)
+        if row is None:
+            row = self.hours[hour] = {'fights': 0, 'xp': 0, 'gold': 0}
+        row['fights'] += 1
+        row['xp'] += rec.get('xp') or 0
+        row['gold'] += rec.get('gold') or 0
+
+    def result(self):
+        return dict(sorted(self.hours.items()))
+
+
+class LootRarity:
+    """Counter of looted items by rarity (records written before loot was logged contribute nothing)."""
+
+    def __init__(self):
+        self.counts = collections.Counter()
+
+    def add(self, rec):
+        for item in rec.get('loot') or ():
+            self.counts[item.get('rarity', 'common')] += 1
+
+    def result(self):
+        return self.counts
+
+
+def aggregate(recs, *aggregators):
+    """Feed every record to each aggregator in one pass; return their results in order."""
+    adders = [a.add for a in aggregators]
+    for rec in recs:
+        for add in adders:
+            add(rec)
+    return tuple(a.result() for a in aggregators)
+
+
+def outcomes_per_enemy(recs):
+    return aggregate(recs, OutcomesPerEnemy())[0]
+
+
+def rewards_per_hour(recs):
+    return aggregate(recs, RewardsPerHour())[0]
+
+
+def loot_rarity_distribution(recs):
+    return aggregate(recs, LootRarity())[0]
+
+
+def summarize(recs):
+    """All three aggregates from a single pass over `recs`."""
+    per_enemy, per_hour, rarity = aggregate(recs, OutcomesPerEnemy(), RewardsPerHour(), LootRarity())
+    return {'enemies': per_enemy, 'hours': per_hour, 'loot': dict(rarity)}
+
+
+# --- command line ------------------------------------------------------------
+def _print_enemies(per_enemy):
+    print(f"{'Enemy':<24}{'Win':>6}{'Defeat':>8}{'Fled':>6}")
+    for enemy, row in sorted(per_enemy.items(), key=lambda kv: -sum(kv[1].values())):
+        print(f"{str(enemy):<24}{row['win']:>6}{row['defeat']:>8}{row['fled']:>6}")
+
+
+def _print_hours(per_hour):
+    print(f"{'Hour (UTC)':<18}{'Fights':>7}{'XP':>8}{'Gold':>8}")
+    for hour, row in per_hour.items():
+        label = datetime.datetime.fromtimestamp(hour, datetime.timezone.utc).strftime('%Y-%m-%d %H:00')
+        print(f"{label:<18}{row['fights']:>7}{row['xp']:>8}{row['gold']:>8}")
+
+
+def _print_loot(rarity):
+    total = sum(rarity.values()) or 1
+    for name, n in sorted(rarity.items(), key=lambda kv: -kv[1]):
+        print(f"{name:<12}{n:>6}  {100.0 * n / total:5.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Aggregate statistics over the combat log.')
+    parser.add_argument('command', choices=('enemies', 'rewards', 'loot', 'summary'))
+    parser.add_argument('--log', default=None, help='combat log path (defaults to the one in the data directory)')
+    parser.add_argument('--hours', type=float, default=None, help='only fights from the last N hours')
+    parser.add_argument('--json', action='store_true', help='print the result as JSON')
+    args = parser.parse_args(argv)
+
+    since = time.time() - args.hours * HOUR if args.hours else None
+    recs = records(args.log, since=since)
+    if args.command == 'enemies':
+        result, show = outcomes_per_enemy(recs), _print_enemies
+    elif args.command == 'rewards':
+        result, show = rewards_per_hour(recs), _print_hours
+    elif args.command == 'loot':
+        result, show = dict(loot_rarity_distribution(recs)), _print_loot
+    else:
+        result, show = summarize(recs), None
+
+    if args.json or show is None:
+        print(json.dumps(result, indent=2, default=str))
+    else:
+        show(result)
+
+
+if __name__ == '__main__':
+    main()
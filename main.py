@@ -1,13 +1,18 @@
 import tkinter as tk
+import collections
+import itertools
 import math
 
 from combat import RARITY_COLORS, RARITY_EMOJIS
+import messagebus
 from enemy import *
 from player import *
 from items import *
 from functions import *
 from settings import *
 from plugins.loader import load_plugins
+from inventory_view import InventoryView
+import player_store
 
 PLUGIN_REGISTRY = load_plugins()
 
@@ -23,6 +28,7 @@ window.configure(bg="lightgrey")
 # Exit handler: autosave on exit
 def on_exit():
     try:
+        flush_saves(5.0)
         ok = save_game()
         if ok:
             TextFuncs.var_speed_print('Game autosaved.', 0.02, 0.04)
@@ -67,22 +73,16 @@ def view_inventory_gui(parent_frame=None):
     txt_frame = tk.Frame(parent)
     txt_frame.pack(fill='both', expand=True, padx=6, pady=6)
 
-    inv = player['inventory']
-    if not inv:
-        lbl = tk.Label(txt_frame, text='(Inventory is empty)')
-        lbl.pack()
-        return
-
-    # show list of items and create clickable buttons for details
+    # Rows are tree items, updated in place from change notifications (see inventory_view)
     frame = tk.Frame(txt_frame)
-    frame.pack(pady=6)
-    row = 0
-    for it in inv:
-        lbl = tk.Label(frame, text=it.name)
-        lbl.grid(row=row, column=0, sticky='w')
-        btn = tk.Button(frame, text='Inspect', command=lambda itm=it: inspect_item(itm, frame))
-        btn.grid(row=row, column=1, padx=6)
-        row += 1
+    frame.pack(pady=6, fill='both', expand=True)
+    view = InventoryView(frame, player, on_inspect=lambda itm: inspect_item(itm, frame))
+    view.frame.grid(row=0, column=0, sticky='nsew')
+    frame.grid_columnconfigure(0, weight=1)
+    frame.grid_rowconfigure(0, weight=1)
+    btn = tk.Button(frame, text='Inspect', command=view.inspect_selected)
+    btn.grid(row=1, column=0, pady=4, sticky='w')
+    parent.inventory_view = view
 
 
 def inspect_item(item, parent=None):
@@ -156,11 +156,12 @@ def _equip_and_refresh_main(item, window_ref):
             except Exception:
                 pass
 
-            # If equip was done from the Inventory view, refresh it (close + reopen)
+            # The embedded inventory view updates its rows from change notifications;
+            # only a separate Inventory window still needs a close + reopen
             try:
                 parent = getattr(window_ref, 'master', None)
                 if parent and getattr(parent, 'winfo_exists', lambda: False)() and (
-                    getattr(parent, 'title', lambda: '')() == 'Inventory' or getattr(parent, 'is_inventory_view', False)
+                    getattr(parent, 'title', lambda: '')() == 'Inventory'
                 ):
                     try:
                         parent.destroy()
@@ -200,19 +201,16 @@ def _sell_and_refresh_main(item, window_ref):
 def rest_and_heal():
     """Rest at an inn to heal and recover."""
     try:
-        cost_to_heal = player['max_health'] - player['health']
-        if player['gold'] < cost_to_heal:
+        from player_helpers import rest
+        status, cost_to_heal = rest(player)
+        if status == 'no_gold':
             TextFuncs.var_speed_print("You don't have enough gold to heal.", 0.02, 0.04)
-            return
-        elif player['health'] >= player['max_health']:
+        elif status == 'full':
             TextFuncs.var_speed_print("You are already fully healed.", 0.02, 0.04)
-            return
-        elif player.get('health', 0) <= 0:
+        elif status == 'dead':
             TextFuncs.var_speed_print("You are already dead.", 0.02, 0.04)
-            return
-        player['health'] = player['max_health']
-        player['gold'] -= cost_to_heal
-        TextFuncs.var_speed_print(f"You have been fully healed for {cost_to_heal} gold.", 0.02, 0.04)
+        else:
+            TextFuncs.var_speed_print(f"You have been fully healed for {cost_to_heal} gold.", 0.02, 0.04)
     except Exception:
         pass
 
@@ -291,55 +289,89 @@ except Exception:
     except Exception:
         pass
 
-# function to append messages to the messages_box (optional rarity for color)
+# Messages are buffered and written to the messages_box once per Tk idle callback:
+# one state toggle, one multi-segment insert, one trim and one scroll per burst.
+# `_pending_messages` is a ring buffer capped at max_messages_lines (anything older
+# would be trimmed right away) and `_shown_line_counts` tracks how many lines each
+# displayed message takes, so trimming never has to parse widget indices.
+_pending_messages = collections.deque(maxlen=max_messages_lines)
+_shown_line_counts = collections.deque()
+_shown_lines = 0
+_flush_scheduled = False
+
+
 def log_message(text, rarity=None):
+    """Queue a message (optional rarity for color); it is drawn on the next idle callback."""
+    global _pending_messages, _flush_scheduled
     # compute small emoji/icon based on rarity or text
     try:
-        from combat import message_icon, RARITY_COLORS
+        from combat import message_icon
         icon = message_icon(text, rarity)
     except Exception:
         icon = ''
-        RARITY_COLORS = {}
 
-    final_text = f"{icon} {text}" if icon else text
+    if _pending_messages.maxlen != max_messages_lines:
+        _pending_messages = collections.deque(_pending_messages, maxlen=max(1, max_messages_lines))
+    _pending_messages.append((f"{icon} {text}" if icon else text, rarity))
 
-    try:
-        messages_box.configure(state='normal')
-        start_index = messages_box.index('end')
-        messages_box.insert('end', final_text + '\n')
-
-        if rarity:
-            tag = f"rarity_{rarity}"
-            if tag not in messages_box.tag_names():
-                color = RARITY_COLORS.get(rarity, 'black')
-                try:
-                    messages_box.tag_configure(tag, foreground=color, font=(None, 10, 'bold'))
-                except Exception:
-                    messages_box.tag_configure(tag, foreground=color)
-            messages_box.tag_add(tag, start_index, f"{start_index} lineend")
-
-        # Trim if too many lines
+    if not _flush_scheduled:
         try:
-            lines = int(messages_box.index('end-1c').split('.')[0])
-            if lines > max_messages_lines:
-                to_delete = lines - max_messages_lines
-                # delete earliest lines
-                messages_box.delete('1.0', f"{to_delete + 1}.0")
+            window.after_idle(flush_messages)
+            _flush_scheduled = True
         except Exception:
-            pass
+            flush_messages()
+
+
+def flush_messages():
+    """Write all pending messages to the messages_box in one go."""
+    global _flush_scheduled, _shown_lines
+    _flush_scheduled = False
+    if not _pending_messages:
+        return
+    batch = list(_pending_messages)
+    _pending_messages.clear()
+    try:
+        messages_box.configure(state='normal')
+        segments = []
+        for final_text, rarity in batch:
+            tags = ()
+            if rarity:
+                tag = f"rarity_{rarity}"
+                if tag not in messages_box.tag_names():
+                    color = RARITY_COLORS.get(rarity, 'black')
+                    try:
+                        messages_box.tag_configure(tag, foreground=color, font=(None, 10, 'bold'))
+                    except Exception:
+                        messages_box.tag_configure(tag, foreground=color)
+                tags = (tag,)
+            segments.extend((final_text + '\n', tags))
+            n = final_text.count('\n') + 1
+            _shown_line_counts.append(n)
+            _shown_lines += n
+        messages_box.insert('end', *segments)
+
+        # Trim the oldest messages beyond the cap in a single delete
+        to_delete = 0
+        while _shown_lines > max_messages_lines and _shown_line_counts:
+            n = _shown_line_counts.popleft()
+            _shown_lines -= n
+            to_delete += n
+        if to_delete:
+            messages_box.delete('1.0', f"{to_delete + 1}.0")
 
         messages_box.see('end')
         messages_box.configure(state='disabled')
     except Exception:
-        # last-resort fallback to terminal to avoid silent failures
-        try:
-            from functions import TextFuncs
-            TextFuncs.var_speed_print(text, 0.0, 0.0)
-        except Exception:
-            pass
+        # last-resort fallback to the terminal sink to avoid silent failures
+        for final_text, _ in batch:
+            messagebus.publish(final_text)
 
 
 def clear_messages():
+    global _shown_lines
+    _pending_messages.clear()
+    _shown_line_counts.clear()
+    _shown_lines = 0
     try:
         messages_box.configure(state='normal')
         messages_box.delete('1.0', 'end')
@@ -350,6 +382,7 @@ def clear_messages():
 
 def save_messages_to_file(path='messages_log.txt'):
     try:
+        flush_messages()
         messages_box.configure(state='normal')
         content = messages_box.get('1.0', 'end').rstrip('\n')
         messages_box.configure(state='disabled')
@@ -400,59 +433,64 @@ def format_equipment_text(slot, item):
         return f"{slot.capitalize()}: {slot_icon}{space}(None)"
 
 
-def update_equipment_panel():
-    # Clear or create labels
-    for widget in getattr(update_equipment_panel, 'widgets', []):
-        try:
-            widget.destroy()
-        except Exception:
-            pass
-    update_equipment_panel.widgets = []
+# The panel's widgets are created once; updates only reconfigure the slots whose
+# item changed. Equipment and stat changes reach the panel as `player_store`
+# change events, so callers do not have to refresh it.
+EQUIPMENT_PANEL_SLOTS = ('weapon', 'armor', 'accessory')
+_equipment_widgets = {}
+_equipment_shown = {}
 
-    tk.Label(equipment_frame, text='Equipped:', font=(None, 10, 'bold')).grid(row=0, column=0, sticky='w', padx=4)
 
-    # Weapon
-    weapon = player['equipment'].get('weapon')
-    wtxt = format_equipment_text('weapon', weapon)
-    lbl_w = tk.Label(equipment_frame, text=wtxt)
-    lbl_w.grid(row=1, column=0, sticky='w', padx=4)
-    update_equipment_panel.widgets.append(lbl_w)
-    state_w = 'normal' if weapon else 'disabled'
-    btn_w = tk.Button(equipment_frame, text='Unequip', state=state_w, command=lambda: unequip_slot('weapon'))
-    btn_w.grid(row=1, column=1, padx=4)
-    update_equipment_panel.widgets.append(btn_w)
-
-    # Armor
-    armor = player['equipment'].get('armor')
-    atxt = format_equipment_text('armor', armor)
-    lbl_a = tk.Label(equipment_frame, text=atxt)
-    lbl_a.grid(row=2, column=0, sticky='w', padx=4)
-    update_equipment_panel.widgets.append(lbl_a)
-    state_a = 'normal' if armor else 'disabled'
-    btn_a = tk.Button(equipment_frame, text='Unequip', state=state_a, command=lambda: unequip_slot('armor'))
-    btn_a.grid(row=2, column=1, padx=4)
-    update_equipment_panel.widgets.append(btn_a)
-
-    # Accessory
-    acc = player['equipment'].get('accessory')
-    txt_acc = format_equipment_text('accessory', acc)
-    lbl_acc = tk.Label(equipment_frame, text=txt_acc)
-    lbl_acc.grid(row=3, column=0, sticky='w', padx=4)
-    update_equipment_panel.widgets.append(lbl_acc)
-    state_acc = 'normal' if acc else 'disabled'
-    btn_acc = tk.Button(equipment_frame, text='Unequip', state=state_acc, command=lambda: unequip_slot('accessory'))
-    btn_acc.grid(row=3, column=1, padx=4)
-    update_equipment_panel.widgets.append(btn_acc)
-
-    # Stats summary
+def _build_equipment_panel():
+    tk.Label(equipment_frame, text='Equipped:', font=(None, 10, 'bold')).grid(row=0, column=0, sticky='w', padx=4)
+    for row, slot in enumerate(EQUIPMENT_PANEL_SLOTS, start=1):
+        lbl = tk.Label(equipment_frame, text=format_equipment_text(slot, None))
+        lbl.grid(row=row, column=0, sticky='w', padx=4)
+        btn = tk.Button(equipment_frame, text='Unequip', state='disabled', command=lambda s=slot: unequip_slot(s))
+        btn.grid(row=row, column=1, padx=4)
+        _equipment_widgets[slot] = (lbl, btn)
+    stats_lbl = tk.Label(equipment_frame, text='')
+    stats_lbl.grid(row=len(EQUIPMENT_PANEL_SLOTS) + 1, column=0, columnspan=2, pady=4, sticky='w', padx=4)
+    _equipment_widgets['stats'] = stats_lbl
+
+
+def _equipment_stats_text():
     atk = (player.get('strength', 0) // 2) + player.get('attack_power_bonus', 0)
     arm = player.get('armor_bonus', 0)
-    stats_lbl = tk.Label(equipment_frame, text=f"Attack ~ {atk}   Armor bonus: {arm}")
-    stats_lbl.grid(row=4, column=0, columnspan=2, pady=4, sticky='w', padx=4)
-    update_equipment_panel.widgets.append(stats_lbl)
+    return f"Attack ~ {atk}   Armor bonus: {arm}"
+
+
+def update_equipment_panel(slots=EQUIPMENT_PANEL_SLOTS, stats=True):
+    """Bring the panel in line with the player's equipment, touching only changed widgets."""
+    if not _equipment_widgets:
+        _build_equipment_panel()
+    for slot in slots:
+        item = player['equipment'].get(slot)
+        if slot in _equipment_shown and _equipment_shown[slot] is item:
+            continue
+        lbl, btn = _equipment_widgets[slot]
+        lbl.configure(text=format_equipment_text(slot, item))
+        btn.configure(state='normal' if item else 'disabled')
+        _equipment_shown[slot] = item
+    if stats:
+        text = _equipment_stats_text()
+        if _equipment_shown.get('stats') != text:
+            _equipment_widgets['stats'].configure(text=text)
+            _equipment_shown['stats'] = text
+
+
+def _on_player_events(p, events):
+    slots = [ev.slot for ev in events if ev.slot is not None]
+    if any(ev.path == 'equipment' for ev in events):
+        slots = EQUIPMENT_PANEL_SLOTS
+    stats = any(ev.key in ('strength', 'attack_power_bonus', 'armor_bonus') for ev in events)
+    if slots or stats:
+        update_equipment_panel(slots, stats=stats)
+
 
 # Ensure the panel is shown at start
 update_equipment_panel()
+player_store.subscribe(_on_player_events, player)
 
 
 def unequip_slot(slot):
@@ -525,8 +563,8 @@ def start_combat():
         else:
             # Player death consequences
             TextFuncs.var_speed_print("You were defeated...", 0.03, 0.05)
-            player['experience'] = 0
-            player['level'] = max(1, player['level'] - 1)
+            from player_helpers import apply_defeat_penalty
+            apply_defeat_penalty(player)
             show_death_screen()
             return
         try:
@@ -568,38 +606,106 @@ def view_help():
     txt.pack(padx=8, pady=8)
 
 
-def view_combat_log():
+# Fights rendered per page by the combat log viewer
+COMBAT_LOG_PAGE = 100
+
+
+def _build_combat_log_viewer(parent):
+    """Newest-first combat log that renders one page at a time and loads more while scrolling.
+
+    Records are read through `combatlog.LogReader` (memory-mapped, located via the
+    log index), so opening the view costs the same for a short or a huge history.
+    The maps are released after every page so the log can rotate while the view
+    is open; if it did, the view starts over from a fresh reader.
+    """
+    import combatlog
     try:
-        from functions import get_data_dir
-        log_path = os.path.join(get_data_dir(), 'combat_log.txt')
-        with open(log_path, 'r', encoding='utf-8') as fh:
-            content = fh.read()
-    except FileNotFoundError:
-        content = '(No combat log entries found yet)'
+        from persistence import get_backend
+        get_backend().flush()
+    except Exception:
+        pass
+    state = {'reader': combatlog.LogReader(), 'matches': iter(()), 'done': True, 'shown': 0, 'loading': False}
+
+    ctrl = tk.Frame(parent)
+    ctrl.pack(fill='x', padx=8, pady=(8, 0))
+    tk.Label(ctrl, text='Outcome:').pack(side='left')
+    outcome_var = tk.StringVar(value='all')
+    tk.OptionMenu(ctrl, outcome_var, 'all', *combatlog.OUTCOMES, command=lambda _v: reset()).pack(side='left', padx=4)
+    tk.Label(ctrl, text='Search:').pack(side='left', padx=(12, 4))
+    search_var = tk.StringVar()
+    search_entry = tk.Entry(ctrl, textvariable=search_var, width=24)
+    search_entry.pack(side='left')
+    search_entry.bind('<Return>', lambda _e: reset())
+    tk.Button(ctrl, text='Find', command=lambda: reset()).pack(side='left', padx=4)
+    count_lbl = tk.Label(ctrl, text='')
+    count_lbl.pack(side='right')
+
+    body = tk.Frame(parent)
+    body.pack(fill='both', expand=True, padx=8, pady=8)
+    txt = tk.Text(body, wrap='word', height=30, width=80, state='disabled')
+    scroll = tk.Scrollbar(body, command=txt.yview)
+    scroll.pack(side='right', fill='y')
+    txt.pack(side='left', fill='both', expand=True)
+
+    def load_page():
+        if state['done'] or state['loading']:
+            return
+        state['loading'] = True
+        reader = state['reader']
+        try:
+            try:
+                idx = list(itertools.islice(state['matches'], COMBAT_LOG_PAGE))
+                lines = [combatlog.format_record(reader.record(i)) for i in idx]
+            except combatlog.LogChanged:
+                # rotated under us: the indexes are stale, start over
+                state['reader'] = combatlog.LogReader()
+                txt.after_idle(reset)
+                return
+            finally:
+                reader.release()
+            state['done'] = len(idx) < COMBAT_LOG_PAGE
+            if not lines and not state['shown']:
+                lines = ['(No combat log entries found yet)' if not len(reader) else '(No matching fights)']
+            txt.configure(state='normal')
+            txt.insert('end', ''.join(ln + '\n' for ln in lines))
+            txt.configure(state='disabled')
+            state['shown'] += len(idx)
+            more = '' if state['done'] else ' (scroll for more)'
+            count_lbl.config(text=f"Showing {state['shown']} of {len(reader)} fights{more}")
+        finally:
+            state['loading'] = False
+
+    def reset():
+        outcome = outcome_var.get()
+        text = search_var.get().strip() or None
+        state.update(matches=state['reader'].iter_newest(None if outcome == 'all' else outcome, text),
+                     done=False, shown=0)
+        txt.configure(state='normal')
+        txt.delete('1.0', 'end')
+        txt.configure(state='disabled')
+        load_page()
+
+    def on_scroll(first, last):
+        scroll.set(first, last)
+        # fetch the next page once the user nears the bottom of what is rendered
+        if float(last) > 0.9:
+            txt.after_idle(load_page)
+
+    txt.configure(yscrollcommand=on_scroll)
+    txt.bind('<Destroy>', lambda _e: state['reader'].release())
+    reset()
 
+
+def view_combat_log():
     top = tk.Toplevel(window)
     top.title('Combat Log')
-    txt = tk.Text(top, wrap='word', height=30, width=80)
-    txt.insert('end', content)
-    txt.configure(state='disabled')
-    txt.pack(padx=8, pady=8)
+    _build_combat_log_viewer(top)
 
 
 def view_combat_log_in_frame():
     """Display combat log inside the main content_frame."""
     _clear_content_frame()
-    try:
-        from functions import get_data_dir
-        log_path = os.path.join(get_data_dir(), 'combat_log.txt')
-        with open(log_path, 'r', encoding='utf-8') as fh:
-            content = fh.read()
-    except FileNotFoundError:
-        content = '(No combat log entries found yet)'
-
-    txt = tk.Text(content_frame, wrap='word', height=30, width=80)
-    txt.insert('end', content)
-    txt.configure(state='disabled')
-    txt.pack(padx=8, pady=8)
+    _build_combat_log_viewer(content_frame)
 
 
 def view_help_in_frame():
@@ -0,0 +1,131 @@
+"""Message bus between game logic and whatever presents its messages.
+
+`TextFuncs.var_speed_print` publishes to the active sink and returns at once;
+how (and how fast) a message is shown is up to the sink:
+
+- `TypewriterSink` (terminal default): a daemon thread prints queued messages
+  character by character with the requested delays, so combat, level-ups and
+  loot handling never wait for the typewriter effect;
+- `CallbackSink`: hands each message to a function (e.g. the GUI message box);
+- `NullSink`: drops everything, for headless servers and benchmarks.
+
+Pending typewriter output is printed without delays at interpreter exit.
+"""
+import atexit
+import queue
+import random
+import threading
+import time
+
+
+class MessageSink:
+    """Interface of a message sink."""
+
+    def emit(self, text, delay=0.0, offset=0.0, rarity=None):
+        raise NotImplementedError
+
+    def flush(self, timeout=None, hurry=False):
+        """Wait until queued messages have been presented. Returns True if nothing is left."""
+        return True
+
+
+class NullSink(MessageSink):
+    def emit(self, text, delay=0.0, offset=0.0, rarity=None):
+        pass
+
+
+class CallbackSink(MessageSink):
+    """Calls `func(text, rarity=None)` on the publishing thread."""
+
+    def __init__(self, func):
+        self.func = func
+
+    def emit(self, text, delay=0.0, offset=0.0, rarity=None):
+        self.func(text, rarity=rarity)
+
+
+class TypewriterSink(MessageSink):
+    """Prints messages character by character from a background thread."""
+
+    def __init__(self, write=None):
+        self._write = write or (lambda s: print(s, end='', flush=True))
+        self._queue = queue.Queue()
+        self._hurry = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='typewriter', daemon=True)
+                    self._thread.start()
+
+    def emit(self, text, delay=0.0, offset=0.0, rarity=None):
+        self._queue.put((str(text), delay, offset))
+        self._ensure_thread()
+
+    def _run(self):
+        while True:
+            text, delay, offset = self._queue.get()
+            try:
+                if self._hurry.is_set() or (delay <= 0 and offset <= 0):
+                    self._write(text)
+                else:
+                    for i, char in enumerate(text):
+                        if self._hurry.is_set():
+                            self._write(text[i:])
+                            break
+                        self._write(char)
+                        time.sleep(delay + random.uniform(0, offset))
+                self._write('\n')
+            except Exception:
+                pass
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout=None, hurry=False):
+        """Wait for the queue to drain; with `hurry` the remaining text is printed without delays."""
+        if hurry:
+            self._hurry.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while self._queue.unfinished_tasks:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.005)
+            return True
+        finally:
+            self._hurry.clear()
+
+
+_sink = TypewriterSink()
+
+
+def get_sink():
+    return _sink
+
+
+def set_sink(sink):
+    """Replace the active sink (None installs a fresh `TypewriterSink`). Returns the previous one."""
+    global _sink
+    previous, _sink = _sink, sink if sink is not None else TypewriterSink()
+    return previous
+
+
+def publish(text, delay=0.0, offset=0.0, rarity=None):
+    """Hand a message to the active sink; presentation errors never reach the caller."""
+    try:
+        _sink.emit(text, delay, offset, rarity)
+    except Exception:
+        pass
+
+
+def _flush_at_exit():
+    try:
+        _sink.flush(2.0, hurry=True)
+    except Exception:
+        pass
+
+
+atexit.register(_flush_at_exit)
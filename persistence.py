@@ -0,0 +1,341 @@
+"""Pluggable persistence for player saves and combat history.
+
+`save_game()` / `load_game()` without an explicit path and the combat log written
+by `Combat._end_combat` go through the active backend:
+
+- `JsonFileBackend` (default): one JSON save file per slot and the rotating
+  `combat_log.jsonl` written by `combatlog`. It answers the hosting queries by
+  scanning the save files and (through the log index) the combat log;
+- `SQLiteBackend`: one database in WAL mode with `players` and `fights` tables,
+  indexed for the hosting queries (`top_players`, `fights_per_tier`,
+  `recent_defeats`). Fight rows are buffered and inserted with `executemany`
+  in one transaction per batch. Commits run on the backend's writer thread
+  (a `functions.SaveWriter`), never on the thread that saves or records. Every fight is also written to the
+  `combat_log.jsonl` next to the database, so the log viewer and
+  `log_analytics` see the same history whichever backend is active.
+
+The backend is chosen with `[PersistenceSettings] BACKEND = json | sqlite` or
+replaced at runtime with `set_backend()`.
+"""
+import atexit
+import collections
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import combatlog
+from functions import SaveWriter, _deserialize_player, _serialize_player, get_data_dir, load_game, save_game
+from settings import PersistenceSettings
+
+DEFAULT_SLOT = 'default'
+
+
+def fight_record(p, enemy, outcome, summary='', turns=None):
+    """Build the combat history row for a finished fight of player dict `p`."""
+    if outcome is True:
+        result = 'win'
+    elif outcome == 'fled':
+        result = 'fled'
+    else:
+        result = 'defeat'
+    won = result == 'win'
+    return {
+        'ts': time.time(),
+        'player': p.get('name'),
+        'level': p.get('level'),
+        'enemy': getattr(enemy, 'name', None),
+        'tier': getattr(enemy, 'tier', None),
+        'outcome': result,
+        'xp': getattr(enemy, 'xp_reward', 0) if won else 0,
+        'gold': getattr(enemy, 'gold_reward', 0) if won else 0,
+        'turns': turns,
+        'loot': [{'name': it.name, 'rarity': getattr(it, 'rarity', 'common')}
+                 for it in (getattr(enemy, 'loot', None) or [])] if won else [],
+        'summary': summary,
+    }
+
+
+class PersistenceBackend:
+    """Interface of a persistence backend."""
+
+    def save_player(self, slot=DEFAULT_SLOT, p=None, background=False):
+        """Save player state `p` (defaults to the current player) to `slot`. Returns True on success."""
+        raise NotImplementedError
+
+    def load_player(self, slot=DEFAULT_SLOT, p=None):
+        """Load `slot` into `p` (defaults to the current player). Returns True on success."""
+        raise NotImplementedError
+
+    def record_fight(self, fight):
+        """Store one `fight_record()` row."""
+        raise NotImplementedError
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def top_players(self, limit=10):
+        """Return [(slot, name, level, gold), ...] ordered by level."""
+        raise NotImplementedError
+
+    def fights_per_tier(self):
+        """Return {tier: {'win': n, 'defeat': n, 'fled': n}}."""
+        raise NotImplementedError
+
+    def recent_defeats(self, limit=20):
+        """Return the latest defeats as fight row dicts, newest first."""
+        raise NotImplementedError
+
+
+# columns of the `recent_defeats` rows
+DEFEAT_FIELDS = ('ts', 'player', 'level', 'enemy', 'tier', 'turns', 'summary')
+
+
+class JsonFileBackend(PersistenceBackend):
+    """Saves as JSON files in the data directory and a `combatlog` JSON Lines combat log."""
+
+    def __init__(self, directory=None):
+        self.directory = directory
+
+    def _dir(self):
+        return self.directory or get_data_dir()
+
+    def save_path(self, slot=DEFAULT_SLOT):
+        name = 'savegame.json' if slot == DEFAULT_SLOT else f'savegame-{slot}.json'
+        return os.path.join(self._dir(), name)
+
+    def save_player(self, slot=DEFAULT_SLOT, p=None, background=False):
+        return save_game(self.save_path(slot), p, background=background)
+
+    def load_player(self, slot=DEFAULT_SLOT, p=None):
+        return load_game(self.save_path(slot), p)
+
+    def log_writer(self):
+        return combatlog.get_writer(os.path.join(self._dir(), combatlog.LOG_FILENAME))
+
+    def record_fight(self, fight):
+        self.log_writer().write(fight)
+
+    def flush(self):
+        self.log_writer().flush()
+
+    # --- queries (scans) --------------------------------------------------
+    def _slots(self):
+        for fname in os.listdir(self._dir()):
+            if fname == 'savegame.json':
+                yield DEFAULT_SLOT, fname
+            elif fname.startswith('savegame-') and fname.endswith('.json'):
+                yield fname[len('savegame-'):-len('.json')], fname
+
+    def top_players(self, limit=10):
+        rows = []
+        for slot, fname in self._slots():
+            try:
+                with open(os.path.join(self._dir(), fname), 'r', encoding='utf-8') as fh:
+                    d = json.load(fh).get('player', {})
+            except Exception:
+                continue
+            rows.append((slot, d.get('name'), d.get('level'), d.get('gold')))
+        rows.sort(key=lambda r: (r[2] or 0, r[3] or 0), reverse=True)
+        return rows[:limit]
+
+    def fights_per_tier(self):
+        self.flush()
+        out = {}
+        for rec in combatlog.iter_records(self.log_writer().path):
+            if rec.get('outcome') in combatlog.OUTCOMES:
+                out.setdefault(rec.get('tier'), {'win': 0, 'defeat': 0, 'fled': 0})[rec['outcome']] += 1
+        return out
+
+    def recent_defeats(self, limit=20):
+        self.flush()
+        rows = collections.deque(maxlen=limit)
+        for rec in combatlog.iter_records(self.log_writer().path, outcome='defeat'):
+            rows.append({k: rec.get(k) for k in DEFEAT_FIELDS})
+        return list(reversed(rows))
+
+
+class SQLiteBackend(PersistenceBackend):
+    """SQLite database in WAL mode; safe to share between threads."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS players (
+            slot TEXT PRIMARY KEY,
+            name TEXT,
+            level INTEGER,
+            gold INTEGER,
+            data TEXT NOT NULL,
+            updated REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS players_level ON players (level DESC);
+        CREATE TABLE IF NOT EXISTS fights (
+            id INTEGER PRIMARY KEY,
+            ts REAL NOT NULL,
+            player TEXT,
+            level INTEGER,
+            enemy TEXT,
+            tier TEXT,
+            outcome TEXT NOT NULL,
+            xp INTEGER,
+            gold INTEGER,
+            turns INTEGER,
+            summary TEXT,
+            loot TEXT
+        );
+        CREATE INDEX IF NOT EXISTS fights_tier ON fights (tier, outcome);
+        CREATE INDEX IF NOT EXISTS fights_outcome_ts ON fights (outcome, ts DESC);
+    """
+    # Constant SQL text, so sqlite3's statement cache reuses the prepared statements
+    UPSERT_PLAYER = ("INSERT INTO players (slot, name, level, gold, data, updated) VALUES (?, ?, ?, ?, ?, ?) "
+                     "ON CONFLICT(slot) DO UPDATE SET name=excluded.name, level=excluded.level, "
+                     "gold=excluded.gold, data=excluded.data, updated=excluded.updated")
+    SELECT_PLAYER = "SELECT data FROM players WHERE slot = ?"
+    INSERT_FIGHT = ("INSERT INTO fights (ts, player, level, enemy, tier, outcome, xp, gold, turns, summary, loot) "
+                    "VALUES (:ts, :player, :level, :enemy, :tier, :outcome, :xp, :gold, :turns, :summary, :loot)")
+    FIGHT_COLUMNS = ('ts', 'player', 'level', 'enemy', 'tier', 'outcome', 'xp', 'gold', 'turns', 'summary')
+
+    def __init__(self, path=None, batch_size=100, log_path=None):
+        self.path = path or os.path.join(get_data_dir(), PersistenceSettings.DATABASE)
+        self.log_path = log_path or os.path.join(os.path.dirname(os.path.abspath(self.path)), combatlog.LOG_FILENAME)
+        self.batch_size = batch_size
+        self._lock = threading.RLock()
+        self._pending_fights = []
+        self._fight_batches = itertools.count()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(self.SCHEMA)
+        # databases created before fights had a loot column
+        if 'loot' not in [row[1] for row in self.conn.execute('PRAGMA table_info(fights)')]:
+            with self.conn:
+                self.conn.execute('ALTER TABLE fights ADD COLUMN loot TEXT')
+        # commits run on this thread, off the (Tk) thread that saves and records fights;
+        # keys are ('player', slot), coalesced like save files, or ('fights', n), one per batch
+        self.writer = SaveWriter(self._store, name='sqlite-writer')
+        atexit.register(self.flush)
+
+    def _store(self, key, data):
+        with self._lock, self.conn:
+            if key[0] == 'player':
+                self.conn.execute(self.UPSERT_PLAYER, data)
+            else:
+                self.conn.executemany(self.INSERT_FIGHT, data)
+
+    def save_player(self, slot=DEFAULT_SLOT, p=None, background=False):
+        """Save `p` to `slot`; with `background=True` the row is queued and True means it was queued."""
+        try:
+            d = _serialize_player(p)
+            row = (slot, d.get('name'), d.get('level'), d.get('gold'), json.dumps(d, separators=(',', ':')), time.time())
+            seq = self.writer.next_seq()
+            if background:
+                self.writer.submit(('player', slot), row, seq)
+                return True
+            return self.writer.write(('player', slot), row, seq)
+        except Exception:
+            return False
+
+    def load_player(self, slot=DEFAULT_SLOT, p=None):
+        try:
+            self.writer.flush()
+            with self._lock:
+                row = self.conn.execute(self.SELECT_PLAYER, (slot,)).fetchone()
+            if row is None:
+                return False
+            _deserialize_player(json.loads(row[0]), p)
+            return True
+        except Exception:
+            return False
+
+    def _fight_row(self, fight):
+        row = {k: fight.get(k) for k in self.FIGHT_COLUMNS}
+        row['loot'] = json.dumps(fight.get('loot') or [], separators=(',', ':'))
+        return row
+
+    def _submit_fights(self):
+        """Hand the buffered fight rows to the writer thread as one transaction."""
+        with self._lock:
+            rows, self._pending_fights = self._pending_fights, []
+        if rows:
+            self.writer.submit(('fights', next(self._fight_batches)), rows)
+
+    def record_fight(self, fight):
+        combatlog.get_writer(self.log_path).write(fight)
+        with self._lock:
+            self._pending_fights.append(self._fight_row(fight))
+            full = len(self._pending_fights) >= self.batch_size
+        if full:
+            self._submit_fights()
+
+    def record_fights(self, fights):
+        """Insert many fight rows in a single transaction (on the writer thread)."""
+        writer = combatlog.get_writer(self.log_path)
+        with self._lock:
+            for fight in fights:
+                writer.write(fight)
+                self._pending_fights.append(self._fight_row(fight))
+        self._submit_fights()
+
+    def flush(self):
+        """Write everything buffered or queued and wait for it."""
+        combatlog.get_writer(self.log_path).flush()
+        self._submit_fights()
+        self.writer.flush()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self.conn.close()
+        atexit.unregister(self.flush)
+
+    # --- queries ----------------------------------------------------------
+    def top_players(self, limit=10):
+        """Return [(slot, name, level, gold), ...] ordered by level."""
+        self.flush()
+        with self._lock:
+            return self.conn.execute('SELECT slot, name, level, gold FROM players ORDER BY level DESC, gold DESC LIMIT ?',
+                                     (limit,)).fetchall()
+
+    def fights_per_tier(self):
+        """Return {tier: {'win': n, 'defeat': n, 'fled': n}}."""
+        self.flush()
+        with self._lock:
+            rows = self.conn.execute('SELECT tier, outcome, COUNT(*) FROM fights GROUP BY tier, outcome').fetchall()
+        out = {}
+        for tier, outcome, n in rows:
+            out.setdefault(tier, {'win': 0, 'defeat': 0, 'fled': 0})[outcome] = n
+        return out
+
+    def recent_defeats(self, limit=20):
+        """Return the latest defeats as fight row dicts, newest first."""
+        self.flush()
+        with self._lock:
+            cur = self.conn.execute("SELECT ts, player, level, enemy, tier, turns, summary FROM fights "
+                                    "WHERE outcome = 'defeat' ORDER BY ts DESC LIMIT ?", (limit,))
+            cols = [c[0] for c in cur.description]
+            return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+
+_backend = None
+
+
+def get_backend():
+    """Return the active backend, creating it from `PersistenceSettings` on first use."""
+    global _backend
+    if _backend is None:
+        if PersistenceSettings.BACKEND == 'sqlite':
+            _backend = SQLiteBackend()
+        else:
+            _backend = JsonFileBackend()
+    return _backend
+
+
+def set_backend(backend):
+    """Replace the active backend (None goes back to the configured default). Returns the previous one."""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
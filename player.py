@@ -2,27 +2,43 @@
 
 from settings import PlayerSettings, GameplaySettings
 from functions import TextFuncs
+from player_store import PlayerStore
+
+def new_player_state():
+    """Return a fresh player state (an observable `PlayerStore` dict) with the configured starting values."""
+    return PlayerStore({
+        "name": PlayerSettings.PLAYER_NAME,
+        "level": 1,
+        "health": 100,
+        "max_health": 100,
+        "mana": 50,
+        "max_mana": 50,
+        "strength": 10,
+        "agility": 10,
+        "intelligence": 10,
+        "experience": 0,
+        "gold": PlayerSettings.STARTING_GOLD,
+        "inventory": [],
+        "inventory_capacity": PlayerSettings.INVENTORY_CAPACITY,
+        "equipment": {"weapon": None, "armor": None, "accessory": None},
+        "attack_power_bonus": 0,
+        "armor_bonus": 0,
+        "skills": [],
+        "effects": []
+    })
+
+# State of the default (single-player) session; hosted sessions get their own dict
+player = new_player_state()
+
+
+def resolve_player(p=None):
+    """Return the player dict for `p`: a dict, a `GameSession`, or None for the default player."""
+    if p is None:
+        return player
+    if isinstance(p, dict):
+        return p
+    return p.player
 
-player = {
-    "name": PlayerSettings.PLAYER_NAME,
-    "level": 1,
-    "health": 100,
-    "max_health": 100,
-    "mana": 50,
-    "max_mana": 50,
-    "strength": 10,
-    "agility": 10,
-    "intelligence": 10,
-    "experience": 0,
-    "gold": PlayerSettings.STARTING_GOLD,
-    "inventory": [],
-    "inventory_capacity": PlayerSettings.INVENTORY_CAPACITY,
-    "equipment": {"weapon": None, "armor": None, "accessory": None},
-    "attack_power_bonus": 0,
-    "armor_bonus": 0,
-    "skills": [],
-    "effects": []
-}
 
 @staticmethod
 def calculate_experience_to_next_level(level):
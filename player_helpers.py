@@ -1,150 +1,194 @@
-"""Helper functions for combat that operate on the module-level `player` dict.
-Kept separate so we don't need to refactor the original `player.py` structure.
+"""Helper functions for combat and player progression.
+
+Every helper takes an optional `p`: a player dict or a `GameSession`. When it is
+omitted the module-level `player` dict (the default single-player session) is used.
+Each mutating helper is one `player_store` batch, so subscribers get a single
+notification per action.
 """
-import random
 from functions import TextFuncs
-from player import player
+from inventory import add_item, find_item, held_item, item_slot
+from items import instantiate
+from player import resolve_player
+from player_store import batched
+from rng import stream
+
 
+def is_alive(p=None):
+    p = resolve_player(p)
+    return p.get('health', 0) > 0
 
-def is_alive():
-    return player.get('health', 0) > 0
 
+@batched
+def take_damage(amount, p=None):
+    p = resolve_player(p)
+    p['health'] = max(0, p.get('health', 0) - amount)
 
-def take_damage(amount):
-    player['health'] = max(0, player.get('health', 0) - amount)
 
+def get_attack_power(p=None, rng=None):
+    """Roll the attack power of `p` (defaults to the module-level player)."""
+    p = resolve_player(p)
+    base = p.get('strength', 10)
+    bonus = p.get('attack_power_bonus', 0)
+    return max(1, base // 2 + bonus + stream(rng, 'combat').randint(-2, 2))
 
-def get_attack_power():
-    base = player.get('strength', 10)
-    bonus = player.get('attack_power_bonus', 0)
-    return max(1, base // 2 + bonus + random.randint(-2, 2))
 
+@batched
+def equip_item(item, p=None):
+    """Equip an equipment item. Returns True on success.
 
-def equip_item(item):
-    """Equip an equipment item. Returns True on success."""
+    An item definition equips the first instance of it held in the inventory."""
+    p = resolve_player(p)
+    held = held_item(p['inventory'], item)
+    if held is not None:
+        item = held
     itype = getattr(item, 'item_type', None)
     if itype != 'equipment':
         return False
 
-    # choose slot by effect
-    slot = 'accessory'
-    eff = getattr(item, 'effect', {}) or {}
-    if 'attack_power' in eff:
-        slot = 'weapon'
-    elif 'armor' in eff:
-        slot = 'armor'
-
-    # unequip existing to inventory
-    current = player['equipment'].get(slot)
-    if current:
-        # try to add back to inventory
-        if len(player['inventory']) < player.get('inventory_capacity', 0):
-            player['inventory'].append(current)
-        else:
-            # no space to unequip
-            return False
-
-    # remove item from inventory if present
-    try:
-        player['inventory'].remove(item)
-    except ValueError:
-        pass
+    slot = item_slot(item)
+    current = p['equipment'].get(slot)
+    # take the item out first: swapping with a held item always has room for the old one
+    if held is not None:
+        p['inventory'].remove(held)
+    if current and not add_item(p['inventory'], current, p.get('inventory_capacity', 0)):
+        # no space to unequip
+        if held is not None:
+            p['inventory'].append(held)
+        return False
 
-    player['equipment'][slot] = item
+    p['equipment'][slot] = item
+    eff = getattr(item, 'effect', {}) or {}
 
     # apply stat bonuses
     if 'attack_power' in eff:
-        player['attack_power_bonus'] = player.get('attack_power_bonus', 0) + eff['attack_power']
+        p['attack_power_bonus'] = p.get('attack_power_bonus', 0) + eff['attack_power']
     if 'armor' in eff:
-        player['armor_bonus'] = player.get('armor_bonus', 0) + eff['armor']
+        p['armor_bonus'] = p.get('armor_bonus', 0) + eff['armor']
 
     # Return the slot name as a truthy success value (UI layers may display messages)
     return slot
 
 
-def unequip_item(slot):
+@batched
+def unequip_item(slot, p=None):
     """Unequip item from slot and place into inventory if space; returns True if successful."""
-    if slot not in player['equipment']:
+    p = resolve_player(p)
+    if slot not in p['equipment']:
         return False
-    itm = player['equipment'][slot]
+    itm = p['equipment'][slot]
     if itm is None:
         return False
 
+    if not add_item(p['inventory'], itm, p.get('inventory_capacity', 0)):
+        return False
+    p['equipment'][slot] = None
+
     eff = getattr(itm, 'effect', {}) or {}
     # remove bonuses
     if 'attack_power' in eff:
-        player['attack_power_bonus'] = max(0, player.get('attack_power_bonus', 0) - eff['attack_power'])
+        p['attack_power_bonus'] = max(0, p.get('attack_power_bonus', 0) - eff['attack_power'])
     if 'armor' in eff:
-        player['armor_bonus'] = max(0, player.get('armor_bonus', 0) - eff['armor'])
-
-    if len(player['inventory']) < player.get('inventory_capacity', 0):
-        player['inventory'].append(itm)
-        player['equipment'][slot] = None
-        return True
-    else:
-        return False
+        p['armor_bonus'] = max(0, p.get('armor_bonus', 0) - eff['armor'])
+    return True
 
 
-def sell_item(item, sell_ratio=0.5):
+@batched
+def sell_item(item, sell_ratio=0.5, p=None):
     """Sell an item from inventory or equipped; returns gold gained or 0."""
+    p = resolve_player(p)
     # if equipped, unequip and then sell
-    for slot, itm in player['equipment'].items():
+    for slot, itm in p['equipment'].items():
         if itm is item:
             # remove bonuses
-            unequip_item(slot)
+            unequip_item(slot, p)
             break
 
-    # remove from inventory
-    try:
-        player['inventory'].remove(item)
-    except ValueError:
+    # remove from inventory (a definition sells the first held instance of it)
+    held = held_item(p['inventory'], item)
+    if held is None:
         return 0
+    p['inventory'].remove(held)
 
     gold = int(item.value * sell_ratio)
-    player['gold'] = player.get('gold', 0) + gold
+    p['gold'] = p.get('gold', 0) + gold
     return gold
 
 
-def attack_target(target):
-    dmg = get_attack_power() - getattr(target, 'armor', 0)
+def attack_target(target, p=None):
+    p = resolve_player(p)
+    dmg = get_attack_power(p) - getattr(target, 'armor', 0)
     dmg = max(1, dmg)
     target.take_damage(dmg)
-    TextFuncs.var_speed_print(f"{player['name']} attacks {target.name} for {dmg} damage.", 0.02, 0.04)
+    TextFuncs.var_speed_print(f"{p['name']} attacks {target.name} for {dmg} damage.", 0.02, 0.04)
 
 
-def use_health_potion():
-    for it in list(player.get('inventory', [])):
-        if getattr(it, 'name', None) == 'Health Potion':
-            it.use(player)
-            TextFuncs.var_speed_print("You used a Health Potion.", 0.03, 0.05)
-            return True
+@batched
+def use_health_potion(p=None):
+    p = resolve_player(p)
+    it = find_item(p.get('inventory', []), 'Health Potion')
+    if it is not None:
+        it.use(p)
+        TextFuncs.var_speed_print("You used a Health Potion.", 0.03, 0.05)
+        return True
     return False
 
 
 # --- XP / gold / loot helpers ------------------------------------------
 
-def add_experience(amount):
+@batched
+def add_experience(amount, p=None):
     """Add experience and handle level-ups."""
+    p = resolve_player(p)
     from player import calculate_experience_to_next_level
-    player['experience'] = player.get('experience', 0) + amount
+    p['experience'] = p.get('experience', 0) + amount
     TextFuncs.var_speed_print(f"Gained {amount} XP.", 0.02, 0.04)
 
     # Level up loop
-    while player['experience'] >= calculate_experience_to_next_level(player['level']):
-        threshold = calculate_experience_to_next_level(player['level'])
-        player['experience'] -= threshold
-        player['level'] += 1
+    while p['experience'] >= calculate_experience_to_next_level(p['level']):
+        threshold = calculate_experience_to_next_level(p['level'])
+        p['experience'] -= threshold
+        p['level'] += 1
         # simple stat increases
-        player['max_health'] = player.get('max_health', 100) + 10
-        player['strength'] = player.get('strength', 10) + 2
-        player['agility'] = player.get('agility', 10) + 1
+        p['max_health'] = p.get('max_health', 100) + 10
+        p['strength'] = p.get('strength', 10) + 2
+        p['agility'] = p.get('agility', 10) + 1
         # heal some on level up
-        player['health'] = min(player['max_health'], player.get('health', 0) + player['max_health'] // 4)
-        TextFuncs.var_speed_print(f"Leveled up! Now level {player['level']}", 0.02, 0.04)
+        p['health'] = min(p['max_health'], p.get('health', 0) + p['max_health'] // 4)
+        TextFuncs.var_speed_print(f"Leveled up! Now level {p['level']}", 0.02, 0.04)
+
 
+@batched
+def apply_defeat_penalty(p=None):
+    """Consequences of losing a fight: XP is reset and one level is lost."""
+    p = resolve_player(p)
+    p['experience'] = 0
+    p['level'] = max(1, p['level'] - 1)
 
-def add_gold(amount):
-    player['gold'] = player.get('gold', 0) + amount
+
+@batched
+def rest(p=None):
+    """Pay gold to heal to full at an inn.
+
+    Returns a (status, cost) tuple where status is one of 'healed', 'no_gold',
+    'full' or 'dead'. Only 'healed' changes the player.
+    """
+    p = resolve_player(p)
+    cost_to_heal = p['max_health'] - p['health']
+    if p['gold'] < cost_to_heal:
+        return 'no_gold', cost_to_heal
+    elif p['health'] >= p['max_health']:
+        return 'full', 0
+    elif p.get('health', 0) <= 0:
+        return 'dead', cost_to_heal
+    p['health'] = p['max_health']
+    p['gold'] -= cost_to_heal
+    return 'healed', cost_to_heal
+
+
+@batched
+def add_gold(amount, p=None):
+    p = resolve_player(p)
+    p['gold'] = p.get('gold', 0) + amount
     TextFuncs.var_speed_print(f"Found {amount} gold.", 0.02, 0.04)
 
 
@@ -152,13 +196,7 @@ def add_gold(amount):
 
 def get_item_slot(item):
     """Return the equipment slot that this item would occupy."""
-    eff = getattr(item, 'effect', {}) or {}
-    if 'attack_power' in eff:
-        return 'weapon'
-    elif 'armor' in eff:
-        return 'armor'
-    else:
-        return 'accessory'
+    return item_slot(item)
 
 
 def get_item_score(item):
@@ -191,29 +229,27 @@ def is_better(item, current):
         return False
 
 
-def add_loot(items):
+@batched
+def add_loot(items, p=None):
     """Try to add loot items to player's inventory; report if inventory full.
 
     If an equipment item is acquired and it is better than the currently equipped
-    item for that slot, auto-equip it (best-effort)."""
+    item for that slot, auto-equip it (best-effort). Items are added through
+    `items.instantiate`, so each acquired weapon or armor is its own instance."""
+    p = resolve_player(p)
     for it in items:
-        if len(player.get('inventory', [])) < player.get('inventory_capacity', 10):
-            player['inventory'].append(it)
+        it = instantiate(it)
+        if add_item(p['inventory'], it, p.get('inventory_capacity', 10)):
             TextFuncs.var_speed_print(f"Acquired {it.name}.", 0.02, 0.04)
 
             # Auto-equip equipment if it's better than the current
             if getattr(it, 'item_type', None) == 'equipment':
                 slot = get_item_slot(it)
-                current = player['equipment'].get(slot)
+                current = p['equipment'].get(slot)
                 try:
                     if is_better(it, current):
-                        equip_item(it)
+                        equip_item(it, p)
                         TextFuncs.var_speed_print(f"Auto-equipped {it.name} (better than current {current.name if current else 'None'}).", 0.02, 0.04)
-                        try:
-                            from main import update_equipment_panel
-                            update_equipment_panel()
-                        except Exception:
-                            pass
                 except Exception:
                     pass
         else:
@@ -0,0 +1,209 @@
+"""Observable player state.
+
+`PlayerStore` is the dict behind every player (see `player.new_player_state`).
+Writes to it, to its `inventory` (an `inventory.Inventory`) and to its
+`equipment` dict are reported to subscribers as `ChangeEvent`s, whoever makes
+them: helpers, the combat engine or a load. Paths name what changed:
+
+    'gold', 'health', ...          scalar field set (old -> new)
+    'inventory[+Iron Sword]'       item added       (new is the item)
+    'inventory[-Iron Sword]'       item removed     (old is the item)
+    'equipment.weapon'             slot changed     (old -> new item)
+    'inventory' / 'equipment'      container replaced, e.g. by a load
+
+Events are delivered in batches. Outside `batch()` every change is its own
+batch; inside it (and in functions decorated with `@batched`, such as the
+`player_helpers` actions) changes are collected and delivered once when the
+outermost batch ends, one call per store. Repeated sets of the same field are
+coalesced into one event and dropped if the value ended up unchanged, so
+subscribers do work proportional to what actually changed.
+"""
+import functools
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+from inventory import Inventory
+
+_MISSING = object()
+
+
+class ChangeEvent(namedtuple('ChangeEvent', 'path op old new')):
+    """One change; `op` is 'set', 'add' or 'remove'."""
+    __slots__ = ()
+
+    @property
+    def key(self):
+        """Top-level field: 'gold', 'inventory', 'equipment', ..."""
+        return self.path.split('.', 1)[0].split('[', 1)[0]
+
+    @property
+    def slot(self):
+        return self.path.split('.', 1)[1] if self.path.startswith('equipment.') else None
+
+
+# --- subscribers and batching -------------------------------------------
+# subscribers to every store; the ones bound to one store live on that store
+_subscribers = []
+_local = threading.local()
+
+
+def subscribe(func, p=None):
+    """Call `func(store, events)` for every batch of changes (of store `p` only, if given).
+
+    A store-bound subscription lives and dies with the store. Only `PlayerStore`s
+    report changes, so subscribing to any other dict does nothing.
+    """
+    if p is None:
+        _subscribers.append(func)
+    elif isinstance(p, PlayerStore):
+        p._subscribers.append(func)
+    return func
+
+
+def unsubscribe(func, p=None):
+    """Remove `func` from the subscribers to every store, or to store `p` if given."""
+    if p is None:
+        _subscribers[:] = [f for f in _subscribers if f != func]
+    elif isinstance(p, PlayerStore):
+        p._subscribers[:] = [f for f in p._subscribers if f != func]
+
+
+def _deliver(store, events):
+    for func in _subscribers + list(store._subscribers):
+        try:
+            func(store, events)
+        except Exception:
+            pass
+
+
+def _emit(store, event):
+    pending = getattr(_local, 'pending', None)
+    if pending is None:
+        if _subscribers or store._subscribers:
+            _deliver(store, [event])
+        return
+    pending.setdefault(id(store), (store, []))[1].append(event)
+
+
+def _unchanged(ev):
+    if ev.op != 'set' or ev.path in ('inventory', 'equipment'):
+        return False
+    if ev.path.startswith('equipment.'):
+        return ev.old is ev.new
+    try:
+        return ev.old is ev.new or ev.old == ev.new
+    except Exception:
+        return False
+
+
+def _coalesce(events):
+    """Merge repeated sets of one field or slot (first old, last new) and drop the ones that cancel out."""
+    out = []
+    index = {}
+    for ev in events:
+        if ev.op == 'set' and ev.path not in ('inventory', 'equipment'):
+            i = index.get(ev.path)
+            if i is not None:
+                out[i] = out[i]._replace(new=ev.new)
+                continue
+            index[ev.path] = len(out)
+        out.append(ev)
+    return [ev for ev in out if not _unchanged(ev)]
+
+
+@contextmanager
+def batch():
+    """Collect changes made in this thread and deliver them once at the end of the outermost batch."""
+    if getattr(_local, 'pending', None) is not None:
+        yield
+        return
+    _local.pending = pending = {}
+    try:
+        yield
+    finally:
+        _local.pending = None
+        for store, events in pending.values():
+            events = _coalesce(events)
+            if events:
+                _deliver(store, events)
+
+
+def batched(func):
+    """Decorator: run `func` inside `batch()`."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with batch():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+# --- observed containers -------------------------------------------------
+class ObservedDict(dict):
+    """The equipment dict of a `PlayerStore`; slot changes become 'equipment.<slot>' events."""
+
+    def __init__(self, slots=(), owner=None):
+        super().__init__(slots)
+        self._owner = owner
+
+    def __setitem__(self, slot, item):
+        old = self.get(slot)
+        super().__setitem__(slot, item)
+        owner = getattr(self, '_owner', None)
+        if owner is not None and old is not item:
+            _emit(owner, ChangeEvent(f'equipment.{slot}', 'set', old, item))
+
+    def update(self, *args, **kwargs):
+        for slot, item in dict(*args, **kwargs).items():
+            self[slot] = item
+
+
+class PlayerStore(dict):
+    """A player state dict that reports its changes (see the module docstring)."""
+
+    # store-bound subscribers (see `subscribe`); never pickled or copied with the state
+    _subscribers = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._subscribers = []
+        self.update(*args, **kwargs)
+
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if k != '_subscribers'}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._subscribers = []
+
+    def __setitem__(self, key, value):
+        if key == 'inventory' and not isinstance(value, Inventory):
+            value = Inventory(value or (), owner=self)
+        elif key == 'equipment' and not isinstance(value, ObservedDict):
+            value = ObservedDict(value or {}, self)
+        elif isinstance(value, (Inventory, ObservedDict)):
+            value._owner = self
+        old = self.get(key, _MISSING)
+        super().__setitem__(key, value)
+        if key in ('inventory', 'equipment'):
+            if old is not value:
+                _emit(self, ChangeEvent(key, 'set', None if old is _MISSING else old, value))
+        else:
+            ev = ChangeEvent(key, 'set', None if old is _MISSING else old, value)
+            if old is _MISSING or not _unchanged(ev):
+                _emit(self, ev)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def _item_event(self, op, item):
+        """Called by the `Inventory` for every unit added or removed."""
+        sign = '+' if op == 'add' else '-'
+        _emit(self, ChangeEvent(f'inventory[{sign}{getattr(item, "name", item)}]', op,
+                                None if op == 'add' else item, item if op == 'add' else None))
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
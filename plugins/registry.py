@@ -2,9 +2,13 @@ class PluginRegistry:
     def __init__(self):
         self.enemies = {}
         self.enemies_by_tier = {}
+        self.items = {}
+        # bumped on every registration so caches built from the registry can tell they are stale
+        self.version = 0
 
     def register_enemy(self, enemy_id, data):
         self.enemies[enemy_id] = data
+        self.version += 1
 
         tier = data.get("tier")
         if tier:
@@ -15,6 +19,7 @@ class PluginRegistry:
 
     def register_item(self, item_id, data):
         self.items[item_id] = data
+        self.version += 1
 
     def get_enemy_data(self, enemy_id):
         return self.enemies.get(enemy_id)
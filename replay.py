@@ -0,0 +1,253 @@
+"""Compact binary recording and headless replay of fights.
+
+Every fight resolved with a seeded `GameRNG` can be stored as one record: the
+seed, a snapshot of the player and enemy at the start of the fight, the player's
+actions and the (kind, actor, amount) of every engine event. Replaying feeds the
+same actions to a fresh `CombatEngine` with the same seed and checks that every
+event comes out identical.
+
+Records are appended to `combat_replays.bin` in the user data directory, or to
+`[ReplaySettings] PATH`. Like the combat log, the file is rotated once it would
+grow past `MAX_BYTES` (`file` -> `file.1` -> ... -> `file.<BACKUPS>`).
+
+Record layout (little endian), prefixed by its body length as `<I`:
+
+    header   <4sBqdB   magic, version, seed, timestamp, outcome
+    player   <I + utf-8 JSON snapshot
+    enemy    <I + utf-8 JSON snapshot
+    actions  <I + one byte per action (255 for an action the engine does not know)
+    events   <I + <BBi (kind, actor, amount; -1 when the event has no amount)
+"""
+import argparse
+import json
+import os
+import struct
+import time
+
+from combat import CombatEngine
+from enemy import Enemy
+from items import get_item_by_name
+from rng import GameRNG
+from settings import ReplaySettings
+
+MAGIC = b'RPGR'
+VERSION = 1
+REPLAY_FILENAME = 'combat_replays.bin'
+
+ACTIONS = ('attack', 'defend', 'potion', 'flee')
+# code of any action not in ACTIONS (the engine answers it with an 'unknown' event)
+UNKNOWN_ACTION = 255
+EVENT_KINDS = ('attack', 'defend', 'potion', 'no_potion', 'flee', 'flee_failed', 'unknown',
+               'defeated', 'turn', 'heal', 'end')
+ACTORS = (None, 'player', 'enemy')
+OUTCOMES = (None, True, False, 'fled')
+
+_LEN = struct.Struct('<I')
+_HEADER = struct.Struct('<4sBqdB')
+_EVENT = struct.Struct('<BBi')
+
+PLAYER_FIELDS = ('name', 'level', 'health', 'max_health', 'strength', 'agility', 'attack_power_bonus', 'armor_bonus')
+
+
+def get_replay_path():
+    if ReplaySettings.PATH:
+        return ReplaySettings.PATH
+    from functions import get_data_dir
+    return os.path.join(get_data_dir(), REPLAY_FILENAME)
+
+
+def _action_code(action):
+    return ACTIONS.index(action) if action in ACTIONS else UNKNOWN_ACTION
+
+
+def _action_name(code):
+    return ACTIONS[code] if code < len(ACTIONS) else 'unknown'
+
+
+def snapshot_player(p):
+    """Return the combat-relevant part of a player dict as plain JSON data."""
+    snap = {f: p.get(f) for f in PLAYER_FIELDS if f in p}
+    snap['inventory'] = [getattr(it, 'name', None) for it in p.get('inventory', [])]
+    return snap
+
+
+def snapshot_enemy(e):
+    return {
+        'name': e.name,
+        'health': e.health,
+        'max_health': e.max_health,
+        'attack_power': e.attack_power,
+        'armor': e.armor,
+        'tier': e.tier,
+        'inventory': [getattr(it, 'name', None) for it in getattr(e, 'inventory', [])],
+    }
+
+
+def _items(names):
+    return [it for it in (get_item_by_name(n) for n in names) if it]
+
+
+def restore_player(snap):
+    p = {k: v for k, v in snap.items() if k != 'inventory'}
+    p['inventory'] = _items(snap.get('inventory', []))
+    p.setdefault('equipment', {'weapon': None, 'armor': None, 'accessory': None})
+    return p
+
+
+def restore_enemy(snap):
+    e = Enemy(snap['name'], snap['health'], snap['attack_power'], snap['armor'], snap['tier'],
+              _items(snap.get('inventory', [])))
+    e.max_health = snap['max_health']
+    return e
+
+
+class FightRecord:
+    """One decoded fight: seed, start snapshots, player actions and expected events."""
+
+    def __init__(self, seed, player, enemy, actions, events, outcome=None, timestamp=None):
+        self.seed = seed
+        self.player = player
+        self.enemy = enemy
+        self.actions = actions
+        self.events = events
+        self.outcome = outcome
+        self.timestamp = timestamp if timestamp is not None else time.time()
+
+    @classmethod
+    def from_engine(cls, engine, seed, player_snapshot, enemy_snapshot):
+        """Build a record from a finished engine and the snapshots taken before the first turn."""
+        events = [(ev['kind'], ev['actor'], ev.get('amount')) for ev in engine.events]
+        return cls(seed, player_snapshot, enemy_snapshot, list(engine.actions), events, engine.outcome)
+
+    def encode(self):
+        player = json.dumps(self.player, separators=(',', ':')).encode('utf-8')
+        enemy = json.dumps(self.enemy, separators=(',', ':')).encode('utf-8')
+        parts = [
+            _HEADER.pack(MAGIC, VERSION, self.seed, self.timestamp, OUTCOMES.index(self.outcome)),
+            _LEN.pack(len(player)), player,
+            _LEN.pack(len(enemy)), enemy,
+            _LEN.pack(len(self.actions)), bytes(_action_code(a) for a in self.actions),
+            _LEN.pack(len(self.events)),
+        ]
+        parts.extend(_EVENT.pack(EVENT_KINDS.index(k), ACTORS.index(a), -1 if amt is None else amt)
+                     for k, a, amt in self.events)
+        body = b''.join(parts)
+        return _LEN.pack(len(body)) + body
+
+    @classmethod
+    def decode(cls, body):
+        magic, version, seed, ts, outcome = _HEADER.unpack_from(body, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Not a replay record (bad magic or version)')
+        pos = _HEADER.size
+
+        def _blob(pos):
+            (n,) = _LEN.unpack_from(body, pos)
+            pos += _LEN.size
+            return body[pos:pos + n], pos + n
+
+        player, pos = _blob(pos)
+        enemy, pos = _blob(pos)
+        actions, pos = _blob(pos)
+        (n_events,) = _LEN.unpack_from(body, pos)
+        pos += _LEN.size
+        events = []
+        for _ in range(n_events):
+            k, a, amt = _EVENT.unpack_from(body, pos)
+            pos += _EVENT.size
+            events.append((EVENT_KINDS[k], ACTORS[a], None if amt == -1 else amt))
+        return cls(seed, json.loads(player), json.loads(enemy), [_action_name(i) for i in actions], events,
+                   OUTCOMES[outcome], ts)
+
+
+def rotate(path, backups=None):
+    """Shift `path` -> `path.1` -> ... -> `path.<backups>`, dropping the oldest."""
+    backups = ReplaySettings.BACKUPS if backups is None else backups
+    oldest = f'{path}.{backups}'
+    if os.path.exists(oldest):
+        os.remove(oldest)
+    for i in range(backups - 1, 0, -1):
+        if os.path.exists(f'{path}.{i}'):
+            os.replace(f'{path}.{i}', f'{path}.{i + 1}')
+    if backups > 0:
+        os.replace(path, f'{path}.1')
+    else:
+        os.remove(path)
+
+
+def append_record(record, path=None, max_bytes=None, backups=None):
+    """Append `record` to the replay file (see the module docstring), rotating it when full."""
+    path = path or get_replay_path()
+    max_bytes = ReplaySettings.MAX_BYTES if max_bytes is None else max_bytes
+    data = record.encode()
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    if size and size + len(data) > max_bytes:
+        rotate(path, backups)
+    with open(path, 'ab') as fh:
+        fh.write(data)
+
+
+def iter_records(path=None):
+    """Yield `FightRecord`s from a replay file one at a time."""
+    path = path or get_replay_path()
+    with open(path, 'rb') as fh:
+        while True:
+            head = fh.read(_LEN.size)
+            if len(head) < _LEN.size:
+                return
+            (n,) = _LEN.unpack(head)
+            body = fh.read(n)
+            if len(body) < n:
+                # truncated tail (e.g. crash mid-write); stop cleanly
+                return
+            yield FightRecord.decode(body)
+
+
+def replay_fight(record):
+    """Re-execute `record` headlessly. Returns (ok, engine, first_mismatch_index or None)."""
+    engine = CombatEngine(restore_player(record.player), restore_enemy(record.enemy), GameRNG(record.seed))
+    for action in record.actions:
+        if engine.state != CombatEngine.PLAYER_TURN:
+            break
+        engine.player_action(action)
+        if engine.state == CombatEngine.ENEMY_TURN:
+            engine.enemy_turn()
+    got = [(ev['kind'], ev['actor'], ev.get('amount')) for ev in engine.events]
+    for i, (a, b) in enumerate(zip(got, record.events)):
+        if a != b:
+            return False, engine, i
+    if len(got) != len(record.events) or engine.outcome != record.outcome:
+        return False, engine, min(len(got), len(record.events))
+    return True, engine, None
+
+
+def verify_file(path=None):
+    """Replay every record in `path`; returns (total, list of indices that did not replay identically)."""
+    total, bad = 0, []
+    for i, rec in enumerate(iter_records(path)):
+        total += 1
+        ok, _, _ = replay_fight(rec)
+        if not ok:
+            bad.append(i)
+    return total, bad
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect or verify recorded fights.')
+    parser.add_argument('command', choices=('verify', 'show'))
+    parser.add_argument('path', nargs='?', default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == 'verify':
+        total, bad = verify_file(args.path)
+        print(f"{total - len(bad)}/{total} fights replayed identically")
+        if bad:
+            print(f"Mismatches at records: {bad[:20]}")
+    else:
+        for rec in iter_records(args.path):
+            print(f"seed={rec.seed} {rec.player.get('name')} vs {rec.enemy['name']}: "
+                  f"{len(rec.actions)} actions, outcome={rec.outcome}")
+
+
+if __name__ == '__main__':
+    main()
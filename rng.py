@@ -0,0 +1,122 @@
+"""Injectable random number streams for combat, enemy generation and loot.
+
+Game functions take an optional `rng` argument and resolve it with `stream()`:
+
+- None uses the default context, which draws from the global `random` module
+  (so existing `patch('random.randint')` style tests keep working);
+- a `GameRNG` hands out an independent, reproducible sub-stream per subsystem;
+- any other object is used directly as a `random.Random`-like stream.
+
+Use `GameRNG(seed)` for reproducible runs and `GameRNG.from_numpy(generator)` to
+drive the same code from a NumPy `Generator`.
+"""
+import random
+
+SUBSYSTEMS = ('combat', 'ai', 'enemy', 'loot')
+
+
+class NumpyStream:
+    """Adapter exposing the `random.Random` methods the game uses on top of a NumPy Generator."""
+
+    def __init__(self, generator):
+        self.generator = generator
+
+    def random(self):
+        return float(self.generator.random())
+
+    def randint(self, a, b):
+        return int(self.generator.integers(a, b + 1))
+
+    def uniform(self, a, b):
+        return float(self.generator.uniform(a, b))
+
+    def choice(self, seq):
+        return seq[int(self.generator.integers(len(seq)))]
+
+    def choices(self, population, weights=None, k=1):
+        if weights is None:
+            return [self.choice(population) for _ in range(k)]
+        total = float(sum(weights))
+        picks = self.generator.choice(len(population), size=k, p=[w / total for w in weights])
+        return [population[int(i)] for i in picks]
+
+
+class GameRNG:
+    """A seeded set of independent random streams, one per subsystem.
+
+    With `seed=None` every stream is the global `random` module.
+    """
+
+    def __init__(self, seed=None):
+        self.seed = seed
+        self._streams = {}
+        self._factory = None
+
+    @classmethod
+    def from_numpy(cls, generator):
+        """Build a context whose sub-streams are spawned from a NumPy `Generator`."""
+        import numpy as np
+        ctx = cls(seed=None)
+        ctx._factory = lambda name: NumpyStream(np.random.default_rng(int(generator.integers(2 ** 63))))
+        return ctx
+
+    def stream(self, name):
+        """Return the stream for subsystem `name`, creating it on first use."""
+        s = self._streams.get(name)
+        if s is None:
+            if self._factory is not None:
+                s = self._factory(name)
+            elif self.seed is None:
+                s = random
+            else:
+                # str seeds are hashed deterministically (sha512), independent of PYTHONHASHSEED
+                s = random.Random(f"{self.seed}:{name}")
+            self._streams[name] = s
+        return s
+
+    def spawn(self, key):
+        """Derive a reproducible child context (e.g. one per shard or fight) from a seeded one.
+
+        Unseeded contexts have no seed to derive from and return themselves.
+        """
+        if self.seed is None:
+            return self
+        return GameRNG(f"{self.seed}/{key}")
+
+    @property
+    def combat(self):
+        return self.stream('combat')
+
+    @property
+    def ai(self):
+        return self.stream('ai')
+
+    @property
+    def enemy(self):
+        return self.stream('enemy')
+
+    @property
+    def loot(self):
+        return self.stream('loot')
+
+
+DEFAULT_RNG = GameRNG()
+
+
+def get_default_rng():
+    return DEFAULT_RNG
+
+
+def set_default_rng(rng):
+    """Replace the context used when callers pass no `rng` (e.g. to replay a session)."""
+    global DEFAULT_RNG
+    DEFAULT_RNG = rng if rng is not None else GameRNG()
+
+
+def stream(rng, name):
+    """Resolve an `rng` argument to the `random.Random`-like stream for subsystem `name`."""
+    if rng is None:
+        rng = DEFAULT_RNG
+    if isinstance(rng, GameRNG):
+        return rng.stream(name)
+    return rng
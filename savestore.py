@@ -0,0 +1,212 @@
+"""Multi-slot save store: one append-only data file plus a small index.
+
+Saves are binary save blobs (see `functions.encode_binary_save`) appended to
+`saves-<generation>.dat`. `saves.index.json` maps every slot name to the
+offset/size of its latest blob together with a timestamp, player name and level,
+so listing saves only reads the index and loading one reads a single blob.
+
+Writers append the blob first and then atomically replace the index, and blobs
+are never modified in place, so readers need no locks: whatever index they read
+points at complete data. Writers are serialized with a lock (plus `fcntl.flock`
+on a lock file across processes where available). `compact()` copies live blobs
+into a new generation file; the previous one is kept until the next compaction
+so readers holding an older index can still finish.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from functions import (_deserialize_player, _read_save, _serialize_player, decode_binary_save,
+                       encode_binary_save, get_data_dir, with_item_names, write_atomic)
+
+try:
+    import fcntl
+except Exception:
+    fcntl = None
+
+INDEX_FILENAME = 'saves.index.json'
+LOCK_FILENAME = 'saves.lock'
+INDEX_VERSION = 1
+
+
+class SaveStore:
+    """Named save slots in `directory` (defaults to `<data dir>/saves`)."""
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(get_data_dir(), 'saves')
+        os.makedirs(self.directory, exist_ok=True)
+        self.index_path = os.path.join(self.directory, INDEX_FILENAME)
+        self._lock = threading.RLock()
+        self._index = None
+        self._index_stamp = None
+
+    # --- index ------------------------------------------------------------
+    def _read_index(self):
+        """Return the index, re-reading it only when the file changed on disk."""
+        try:
+            st = os.stat(self.index_path)
+        except FileNotFoundError:
+            return {'version': INDEX_VERSION, 'generation': 0, 'slots': {}}
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if stamp != self._index_stamp:
+            with open(self.index_path, 'r', encoding='utf-8') as fh:
+                self._index = json.load(fh)
+            self._index_stamp = stamp
+        return self._index
+
+    def _write_index(self, index):
+        write_atomic(self.index_path, json.dumps(index, separators=(',', ':')).encode('utf-8'))
+
+    def _data_path(self, generation):
+        return os.path.join(self.directory, f'saves-{generation}.dat')
+
+    @contextmanager
+    def _write_lock(self):
+        """Serialize writers in this process and, where `fcntl` exists, across processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.directory, LOCK_FILENAME), 'a') as fh:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    # --- slots ------------------------------------------------------------
+    def list_slots(self):
+        """Return [{'slot', 'timestamp', 'name', 'level', 'size'}, ...], newest first."""
+        slots = self._read_index()['slots']
+        rows = [dict(slot=slot, timestamp=e['timestamp'], name=e.get('name'), level=e.get('level'), size=e['size'])
+                for slot, e in slots.items()]
+        rows.sort(key=lambda r: r['timestamp'], reverse=True)
+        return rows
+
+    def __contains__(self, slot):
+        return slot in self._read_index()['slots']
+
+    def _put_many(self, items):
+        """Append (slot, blob, serialized player dict) tuples and publish them in one index update."""
+        with self._write_lock():
+            self._index_stamp = None
+            index = self._read_index()
+            index = dict(index, slots=dict(index['slots']))
+            path = self._data_path(index['generation'])
+            with open(path, 'ab') as fh:
+                offset = fh.seek(0, os.SEEK_END)
+                for slot, blob, d in items:
+                    fh.write(blob)
+                    index['slots'][slot] = {'offset': offset, 'size': len(blob), 'timestamp': time.time(),
+                                            'name': d.get('name'), 'level': d.get('level')}
+                    offset += len(blob)
+                fh.flush()
+                os.fsync(fh.fileno())
+            self._write_index(index)
+
+    def save(self, slot, p=None):
+        """Save player state `p` (defaults to the current player) to `slot`. Returns True on success."""
+        try:
+            d = _serialize_player(p, item_ids=True)
+            return self.put(slot, encode_binary_save({'player': d}), d)
+        except Exception:
+            return False
+
+    def put(self, slot, blob, d):
+        """Store an already encoded save `blob` (of serialized player dict `d`) in `slot`.
+        Returns True on success."""
+        try:
+            self._put_many([(slot, blob, d)])
+            return True
+        except Exception:
+            return False
+
+    def read(self, slot):
+        """Return the save content of `slot` (item references are IDs), or None if it does not exist."""
+        index = self._read_index()
+        entry = index['slots'].get(slot)
+        if entry is None:
+            return None
+        with open(self._data_path(index['generation']), 'rb') as fh:
+            fh.seek(entry['offset'])
+            return decode_binary_save(fh.read(entry['size']))
+
+    def load(self, slot, p=None):
+        """Load `slot` into `p` (defaults to the current player). Returns True on success."""
+        try:
+            data = self.read(slot)
+        except Exception:
+            return False
+        if data is None:
+            return False
+        _deserialize_player(data['player'], p)
+        return True
+
+    def delete(self, slot):
+        with self._write_lock():
+            self._index_stamp = None
+            index = self._read_index()
+            if slot not in index['slots']:
+                return False
+            slots = dict(index['slots'])
+            del slots[slot]
+            self._write_index(dict(index, slots=slots))
+            return True
+
+    def compact(self):
+        """Copy live blobs into a new data file, dropping overwritten and deleted saves."""
+        with self._write_lock():
+            self._index_stamp = None
+            index = self._read_index()
+            old_gen = index['generation']
+            if not os.path.exists(self._data_path(old_gen)):
+                return
+            new_gen = old_gen + 1
+            slots = {}
+            with open(self._data_path(old_gen), 'rb') as src, open(self._data_path(new_gen), 'wb') as dst:
+                for slot, entry in index['slots'].items():
+                    src.seek(entry['offset'])
+                    slots[slot] = dict(entry, offset=dst.tell())
+                    dst.write(src.read(entry['size']))
+                dst.flush()
+                os.fsync(dst.fileno())
+            self._write_index(dict(index, generation=new_gen, slots=slots))
+            # keep the previous generation for readers that still hold the old index
+            try:
+                os.remove(self._data_path(old_gen - 1))
+            except OSError:
+                pass
+
+    # --- bulk export / import --------------------------------------------
+    def export_to(self, path, slots=None):
+        """Write the given slots (default: all) to one JSON file. Returns the number exported."""
+        out = {}
+        for slot in (slots if slots is not None else list(self._read_index()['slots'])):
+            data = self.read(slot)
+            if data is not None:
+                out[slot] = with_item_names(data['player'])
+        write_atomic(path, json.dumps({'version': INDEX_VERSION, 'slots': out}, separators=(',', ':')).encode('utf-8'))
+        return len(out)
+
+    def import_from(self, path, overwrite=True):
+        """Import slots from a file written by `export_to`. Returns the number imported."""
+        with open(path, 'r', encoding='utf-8') as fh:
+            data = json.load(fh)
+        existing = self._read_index()['slots']
+        items = []
+        for slot, d in data.get('slots', {}).items():
+            if not overwrite and slot in existing:
+                continue
+            items.append((slot, encode_binary_save({'player': d}), d))
+        if items:
+            self._put_many(items)
+        return len(items)
+
+    def import_file(self, slot, filepath):
+        """Import a single JSON or binary save file (e.g. the old `savegame.json`) as `slot`."""
+        data = _read_save(filepath)
+        d = data['player']
+        self._put_many([(slot, encode_binary_save(data), d)])
+        return True
@@ -0,0 +1,353 @@
+"""asyncio game server hosting many concurrent sessions on one event loop.
+
+Clients send one JSON object per line and get one JSON object per line back:
+
+    {"cmd": "start_combat"}
+    {"cmd": "attack"} / "defend" / "potion" / "flee"
+    {"cmd": "equip", "item": "Iron Sword"} / {"cmd": "sell", "item": "Iron Sword"}
+    {"cmd": "rest"} / {"cmd": "state"} / {"cmd": "new_session"}
+    {"cmd": "save", "slot": "alice"} / {"cmd": "load", "slot": "alice"} / {"cmd": "list_saves"}
+
+Every connection starts with its own `GameSession`; a command may carry
+`"session": <id>` to drive another session created with `new_session` on the
+same connection, so one socket can multiplex many players. Sessions of other
+connections cannot be addressed. Replies are `{"ok": true, ...}` or
+`{"ok": false, "error": "..."}`; an `"id"` sent with a request is echoed back,
+since replies for different sessions may arrive out of order.
+
+Save commands need the server to be started with a `SaveStore`. The player is
+serialized on the event loop and only the encoded bytes go to a worker thread
+for the disk I/O. The slot defaults to `session-<id>`; a slot is claimed by the
+first session that saves or loads it and other live sessions are refused it
+until that session closes.
+
+The enemy turn delay that the Tk UI implements with `win.after(700, ...)` is an
+`asyncio.sleep` here, so waiting sessions never block each other.
+
+Run with `python server.py --port 8765`; see `loadgen.py` for a load generator.
+"""
+import argparse
+import asyncio
+import json
+
+from combat import CombatEngine
+from enemy import generate_enemy_for_player
+from functions import _deserialize_player, _serialize_player, encode_binary_save
+from inventory import find_item
+import messagebus
+from persistence import SQLiteBackend, fight_record
+from plugins.registry import PluginRegistry
+from player_helpers import (add_experience, add_gold, add_loot, apply_defeat_penalty, equip_item,
+                            rest, sell_item)
+from rng import GameRNG
+from savestore import SaveStore
+from session import GameSession
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Same pause the GUI leaves before the enemy acts (seconds)
+ENEMY_TURN_DELAY = 0.7
+
+
+def _player_view(p):
+    return {
+        'name': p['name'], 'level': p['level'], 'experience': p['experience'],
+        'health': p['health'], 'max_health': p['max_health'], 'gold': p['gold'],
+        'inventory': [it.name for it in p['inventory']],
+        'equipment': {slot: (it.name if it else None) for slot, it in p['equipment'].items()},
+    }
+
+
+def _events_view(events):
+    return [dict(ev) for ev in events if ev['kind'] != 'end']
+
+
+class GameServer:
+    """Holds all hosted sessions and their in-progress fights."""
+
+    def __init__(self, registry=None, enemy_turn_delay=ENEMY_TURN_DELAY, seed=None, store=None, history=None):
+        self.registry = registry or PluginRegistry()
+        self.enemy_turn_delay = enemy_turn_delay
+        self.store = store
+        # optional persistence backend that records every finished fight
+        self.history = history
+        self.sessions = {}
+        self.fights = {}
+        # save slot -> id of the live session that claimed it
+        self.slot_owners = {}
+        self._rng = GameRNG(seed)
+        self._server = None
+
+    # --- session management -----------------------------------------------
+    def new_session(self):
+        s = GameSession()
+        s.rng = self._rng.spawn(s.id)
+        self.sessions[s.id] = s
+        return s
+
+    def close_session(self, session):
+        session.close()
+        self.sessions.pop(session.id, None)
+        self.fights.pop(session.id, None)
+        for slot in [k for k, owner in self.slot_owners.items() if owner == session.id]:
+            del self.slot_owners[slot]
+
+    # --- command handling -------------------------------------------------
+    async def handle_command(self, msg, default_session, owned=None):
+        cmd = msg.get('cmd')
+        session = default_session
+        if owned is None:
+            owned = {default_session}
+        if 'session' in msg:
+            session = self.sessions.get(msg['session'])
+            # only sessions created over this connection can be driven from it
+            if session is None or session not in owned:
+                return {'ok': False, 'error': f"unknown session {msg['session']!r}"}
+
+        if cmd == 'new_session':
+            s = self.new_session()
+            owned.add(s)
+            return {'ok': True, 'session': s.id}
+
+        handler = getattr(self, f"cmd_{cmd}", None) if isinstance(cmd, str) else None
+        if handler is None:
+            return {'ok': False, 'error': f"unknown command {cmd!r}"}
+        return await handler(session, msg)
+
+    async def cmd_state(self, session, msg):
+        fight = self.fights.get(session.id)
+        return {'ok': True, 'session': session.id, 'player': _player_view(session.player),
+                'in_combat': fight is not None}
+
+    async def cmd_start_combat(self, session, msg):
+        p = session.player
+        if p.get('health', 0) <= 0:
+            return {'ok': False, 'error': 'player is dead'}
+        if session.id in self.fights:
+            return {'ok': False, 'error': 'already in combat'}
+        e = generate_enemy_for_player(p.get('level', 1), self.registry, session.rng)
+        self.fights[session.id] = CombatEngine(p, e, session.rng)
+        return {'ok': True, 'enemy': {'name': e.name, 'health': e.health, 'max_health': e.max_health,
+                                      'attack_power': e.attack_power, 'armor': e.armor, 'tier': e.tier}}
+
+    async def _combat_action(self, session, action):
+        engine = self.fights.get(session.id)
+        if engine is None:
+            return {'ok': False, 'error': 'not in combat'}
+        if engine.state != CombatEngine.PLAYER_TURN:
+            return {'ok': False, 'error': 'not your turn'}
+
+        events = engine.player_action(action)
+        if engine.state == CombatEngine.ENEMY_TURN:
+            if self.enemy_turn_delay:
+                await asyncio.sleep(self.enemy_turn_delay)
+            events = events + engine.enemy_turn()
+
+        reply = {'ok': True, 'events': _events_view(events), 'player_health': session.player['health'],
+                 'enemy_health': engine.enemy.health}
+        if engine.ended:
+            reply['outcome'] = engine.outcome
+            reply.update(self._finish_fight(session, engine))
+        return reply
+
+    def _finish_fight(self, session, engine):
+        self.fights.pop(session.id, None)
+        p = session.player
+        if self.history is not None:
+            self.history.record_fight(fight_record(p, engine.enemy, engine.outcome, turns=engine.turns))
+        if engine.outcome is True:
+            e = engine.enemy
+            if e.xp_reward:
+                add_experience(e.xp_reward, p)
+            if e.gold_reward:
+                add_gold(e.gold_reward, p)
+            if e.loot:
+                add_loot(e.loot, p)
+            return {'rewards': {'xp': e.xp_reward, 'gold': e.gold_reward, 'loot': [it.name for it in e.loot]}}
+        if engine.outcome is False:
+            apply_defeat_penalty(p)
+        return {}
+
+    async def cmd_attack(self, session, msg):
+        return await self._combat_action(session, 'attack')
+
+    async def cmd_defend(self, session, msg):
+        return await self._combat_action(session, 'defend')
+
+    async def cmd_potion(self, session, msg):
+        return await self._combat_action(session, 'potion')
+
+    async def cmd_flee(self, session, msg):
+        return await self._combat_action(session, 'flee')
+
+    async def cmd_equip(self, session, msg):
+        it = find_item(session.player['inventory'], msg.get('item'))
+        if it is None:
+            return {'ok': False, 'error': 'item not in inventory'}
+        slot = equip_item(it, session.player)
+        if not slot:
+            return {'ok': False, 'error': 'could not equip item'}
+        return {'ok': True, 'slot': slot}
+
+    async def cmd_sell(self, session, msg):
+        p = session.player
+        it = (find_item(p['inventory'], msg.get('item'))
+              or find_item([i for i in p['equipment'].values() if i], msg.get('item')))
+        if it is None:
+            return {'ok': False, 'error': 'item not owned'}
+        gold = sell_item(it, p=p)
+        return {'ok': gold > 0, 'gold': gold}
+
+    async def cmd_rest(self, session, msg):
+        if session.id in self.fights:
+            return {'ok': False, 'error': 'cannot rest during combat'}
+        p = session.player
+        if p.get('health', 0) <= 0:
+            # hosted players are revived by resting, like the Continue button in the Tk UI
+            p['health'] = p['max_health']
+            return {'ok': True, 'status': 'revived', 'cost': 0}
+        status, cost = rest(p)
+        return {'ok': status in ('healed', 'full'), 'status': status, 'cost': cost}
+
+    def _slot(self, session, msg):
+        return str(msg.get('slot') or f"session-{session.id}")
+
+    def _claim_slot(self, session, slot):
+        """Claim `slot` for `session`; False if another live session holds it or it is
+        another session's default slot."""
+        owner = self.slot_owners.get(slot)
+        if owner is not None and owner != session.id:
+            return False
+        if slot.startswith('session-') and slot != f"session-{session.id}":
+            return False
+        self.slot_owners[slot] = session.id
+        return True
+
+    def _visible_slot(self, session, slot):
+        owner = self.slot_owners.get(slot)
+        return (owner is None or owner == session.id) and (
+            not slot.startswith('session-') or slot == f"session-{session.id}")
+
+    async def cmd_save(self, session, msg):
+        if self.store is None:
+            return {'ok': False, 'error': 'saving is disabled'}
+        if session.id in self.fights:
+            return {'ok': False, 'error': 'cannot save during combat'}
+        slot = self._slot(session, msg)
+        if not self._claim_slot(session, slot):
+            return {'ok': False, 'error': f"slot {slot!r} belongs to another session"}
+        # snapshot on the loop: other commands may change the player while the thread writes
+        d = _serialize_player(session.player, item_ids=True)
+        blob = encode_binary_save({'player': d})
+        ok = await asyncio.to_thread(self.store.put, slot, blob, d)
+        return {'ok': ok, 'slot': slot}
+
+    async def cmd_load(self, session, msg):
+        if self.store is None:
+            return {'ok': False, 'error': 'saving is disabled'}
+        if session.id in self.fights:
+            return {'ok': False, 'error': 'cannot load during combat'}
+        slot = self._slot(session, msg)
+        if not self._claim_slot(session, slot):
+            return {'ok': False, 'error': f"slot {slot!r} belongs to another session"}
+        data = await asyncio.to_thread(self.store.read, slot)
+        if data is None:
+            return {'ok': False, 'error': f"no save in slot {slot!r}"}
+        _deserialize_player(data['player'], session.player)
+        return {'ok': True, 'slot': slot, 'player': _player_view(session.player)}
+
+    async def cmd_list_saves(self, session, msg):
+        if self.store is None:
+            return {'ok': False, 'error': 'saving is disabled'}
+        rows = await asyncio.to_thread(self.store.list_slots)
+        return {'ok': True, 'saves': [r for r in rows if self._visible_slot(session, r['slot'])]}
+
+    # --- networking -------------------------------------------------------
+    async def _respond(self, line, session, owned, writer, write_lock):
+        msg = None
+        try:
+            msg = json.loads(line)
+            if not isinstance(msg, dict):
+                raise ValueError('expected a JSON object')
+        except ValueError as e:
+            reply = {'ok': False, 'error': f"bad request: {e}"}
+        else:
+            try:
+                reply = await self.handle_command(msg, session, owned)
+            except Exception as e:
+                reply = {'ok': False, 'error': f"internal error: {e}"}
+        # echo a client-supplied request id so out-of-order replies can be matched
+        if isinstance(msg, dict) and 'id' in msg:
+            reply['id'] = msg['id']
+        async with write_lock:
+            writer.write(json.dumps(reply).encode('utf-8') + b'\n')
+            await writer.drain()
+
+    async def handle_client(self, reader, writer):
+        """Serve one connection. Requests run as concurrent tasks, so one socket
+        can drive many sessions while some of them wait out enemy turns."""
+        session = self.new_session()
+        # sessions created over this connection are dropped when it closes
+        owned = {session}
+        write_lock = asyncio.Lock()
+        pending = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.create_task(self._respond(line, session, owned, writer, write_lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            for task in pending:
+                task.cancel()
+        finally:
+            for s in owned:
+                self.close_session(s)
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Start listening; returns the asyncio server (port 0 picks a free port)."""
+        self._server = await asyncio.start_server(self.handle_client, host, port)
+        return self._server
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1] if self._server else None
+
+    async def serve_forever(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the line-delimited JSON game server.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--enemy-delay', type=float, default=ENEMY_TURN_DELAY)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--saves', default=None, help='directory of the save store (enables save/load)')
+    parser.add_argument('--db', default=None, help='SQLite database that records fight history')
+    args = parser.parse_args(argv)
+
+    # Helpers announce level-ups and loot through TextFuncs; nobody reads them on a server
+    messagebus.set_sink(messagebus.NullSink())
+    store = SaveStore(args.saves) if args.saves else None
+    history = SQLiteBackend(args.db) if args.db else None
+    server = GameServer(enemy_turn_delay=args.enemy_delay, seed=args.seed, store=store, history=history)
+    print(f"Listening on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if history is not None:
+            history.close()
+
+
+if __name__ == '__main__':
+    main()
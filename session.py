@@ -0,0 +1,87 @@
+"""Game sessions: one player's state plus the per-player context helpers need.
+
+The Tk app keeps using the module-level `player` dict through `DEFAULT_SESSION`.
+Hosted players each get their own `GameSession`, which is passed explicitly to the
+`player_helpers` functions (or used through the convenience methods below), so
+many players can live in one process without sharing state.
+"""
+import itertools
+
+import player_helpers
+from functions import save_game, load_game
+from journal import COMPACT_EVERY, SaveJournal
+from player import new_player_state, player
+
+_session_ids = itertools.count(1)
+
+
+class GameSession:
+    """Holds a player state dict, an optional RNG context and a session id."""
+
+    def __init__(self, player_state=None, rng=None, session_id=None):
+        self.player = player_state if player_state is not None else new_player_state()
+        self.rng = rng
+        self.id = session_id if session_id is not None else next(_session_ids)
+        self.journal = None
+
+    def __repr__(self):
+        return f"GameSession(id={self.id!r}, name={self.player.get('name')!r}, level={self.player.get('level')})"
+
+    # --- convenience wrappers around player_helpers ----------------------
+    def equip_item(self, item):
+        return player_helpers.equip_item(item, self.player)
+
+    def unequip_item(self, slot):
+        return player_helpers.unequip_item(slot, self.player)
+
+    def sell_item(self, item, sell_ratio=0.5):
+        return player_helpers.sell_item(item, sell_ratio, self.player)
+
+    def use_health_potion(self):
+        return player_helpers.use_health_potion(self.player)
+
+    def add_experience(self, amount):
+        return player_helpers.add_experience(amount, self.player)
+
+    def add_gold(self, amount):
+        return player_helpers.add_gold(amount, self.player)
+
+    def add_loot(self, items):
+        return player_helpers.add_loot(items, self.player)
+
+    def enable_journal(self, path, compact_every=COMPACT_EVERY):
+        """Persist this session through an append-only `SaveJournal` at `path` instead of full saves."""
+        if self.journal is not None:
+            self.journal.close()
+        self.journal = SaveJournal(path, self.player, compact_every)
+        return self.journal
+
+    def close(self):
+        """Detach the journal (committing what it buffered) so nothing keeps this session's state alive."""
+        if self.journal is not None:
+            try:
+                self.journal.commit()
+            except Exception:
+                pass
+            self.journal.close()
+            self.journal = None
+
+    def save(self, filepath=None):
+        if self.journal is not None and filepath is None:
+            try:
+                self.journal.commit()
+                return True
+            except Exception:
+                return False
+        return save_game(filepath, self.player)
+
+    def load(self, filepath=None):
+        return load_game(filepath, self.player)
+
+
+# Shim for the single-player app: wraps the module-level `player` dict
+DEFAULT_SESSION = GameSession(player, session_id='default')
+
+
+def get_default_session():
+    return DEFAULT_SESSION
@@ -31,3 +31,13 @@ class PlayerSettings:
     STARTING_GOLD = config.getint("PlayerSettings", "STARTING_GOLD", fallback=0)
     INVENTORY_CAPACITY = config.getint("PlayerSettings", "INVENTORY_CAPACITY", fallback=20)
     PLAYER_NAME = config.get("PlayerSettings", "PLAYER_NAME", fallback="Hero")
+
+class PersistenceSettings:
+    BACKEND = config.get("PersistenceSettings", "BACKEND", fallback="json")
+    DATABASE = config.get("PersistenceSettings", "DATABASE", fallback="game.db")
+
+class ReplaySettings:
+    # empty PATH: combat_replays.bin in the user data directory
+    PATH = config.get("ReplaySettings", "PATH", fallback="")
+    MAX_BYTES = config.getint("ReplaySettings", "MAX_BYTES", fallback=4 * 1024 * 1024)
+    BACKUPS = config.getint("ReplaySettings", "BACKUPS", fallback=2)
@@ -0,0 +1,172 @@
+"""Batch Monte Carlo combat simulator for balance passes.
+
+Fights are resolved headlessly with `CombatEngine`, so they use exactly the same
+damage formulas, enemy AI and enemy generation as the game. Work is split into
+fixed-size shards, each with its own `GameRNG` derived from the seed, which makes the aggregate result depend
+only on `seed` and not on how many worker processes were used.
+"""
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from combat import CombatEngine
+from enemy import generate_enemy, invalidate_catalogs
+from inventory import Inventory, find_item
+from rng import GameRNG
+
+# Fights per shard handed to a worker process
+SHARD_SIZE = 2000
+
+
+class ThresholdPolicy:
+    """Simple scripted player: drink a potion when low, optionally flee when very low.
+
+    Implemented as a class (not a closure) so it can be pickled to worker processes.
+    """
+
+    def __init__(self, potion_below=0.3, flee_below=None):
+        self.potion_below = potion_below
+        self.flee_below = flee_below
+
+    def __call__(self, engine):
+        p = engine.player
+        hp_pct = p.get('health', 0) / p['max_health'] if p.get('max_health') else 0
+        if self.flee_below is not None and hp_pct < self.flee_below:
+            return 'flee'
+        if hp_pct < self.potion_below and find_item(p.get('inventory', []), 'Health Potion') is not None:
+            return 'potion'
+        return 'attack'
+
+
+def _clone_player(template):
+    """Copy a player dict deeply enough that a fight cannot leak into the template."""
+    p = dict(template)
+    p['inventory'] = Inventory(template.get('inventory', []))
+    p['equipment'] = dict(template.get('equipment', {}) or {})
+    return p
+
+
+def _empty_stats():
+    return {
+        'fights': 0,
+        'wins': 0,
+        'defeats': 0,
+        'fled': 0,
+        'undecided': 0,
+        'flee_attempts': 0,
+        'flee_successes': 0,
+        'turns_to_kill': Counter(),
+        'potions_used': Counter(),
+    }
+
+
+def _merge_stats(total, part):
+    for k, v in part.items():
+        if isinstance(v, Counter):
+            total[k].update(v)
+        else:
+            total[k] += v
+    return total
+
+
+def run_fight(player_template, tier, registry=None, policy=None, max_turns=1000, rng=None):
+    """Run a single headless fight and return the finished `CombatEngine`."""
+    policy = policy or ThresholdPolicy()
+    engine = CombatEngine(_clone_player(player_template), generate_enemy(tier, registry, rng), rng)
+    engine.run(policy, max_turns=max_turns)
+    return engine
+
+
+def _run_shard(args):
+    player_template, tier, count, rng, policy, registry, max_turns = args
+    stats = _empty_stats()
+    for _ in range(count):
+        engine = run_fight(player_template, tier, registry, policy, max_turns, rng)
+        stats['fights'] += 1
+        if engine.outcome is True:
+            stats['wins'] += 1
+            stats['turns_to_kill'][engine.turns + 1] += 1
+        elif engine.outcome is False:
+            stats['defeats'] += 1
+        elif engine.outcome == 'fled':
+            stats['fled'] += 1
+        else:
+            stats['undecided'] += 1
+        potions = 0
+        for ev in engine.events:
+            if ev['actor'] != 'player':
+                continue
+            if ev['kind'] == 'potion':
+                potions += 1
+            elif ev['kind'] in ('flee', 'flee_failed'):
+                stats['flee_attempts'] += 1
+                if ev['kind'] == 'flee':
+                    stats['flee_successes'] += 1
+        stats['potions_used'][potions] += 1
+    return stats
+
+
+def simulate_fights(player_template, tier, n, seed=0, workers=1, policy=None, registry=None, max_turns=1000):
+    """Simulate `n` fights of `player_template` against enemies of `tier`.
+
+    `workers > 1` fans the shards out over a `ProcessPoolExecutor`. Returns a dict
+    with outcome counts and rates plus `turns_to_kill` and `potions_used`
+    histograms (value -> number of fights).
+    """
+    policy = policy or ThresholdPolicy()
+    # every run starts from the current enemy data, including plugin data edited in place
+    invalidate_catalogs(registry)
+    root = GameRNG(seed)
+    shards = []
+    remaining, index = n, 0
+    while remaining > 0:
+        count = min(SHARD_SIZE, remaining)
+        shards.append((player_template, tier, count, root.spawn(index), policy, registry, max_turns))
+        remaining -= count
+        index += 1
+
+    total = _empty_stats()
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(_run_shard, shards):
+                _merge_stats(total, part)
+    else:
+        for shard in shards:
+            _merge_stats(total, _run_shard(shard))
+
+    fights = total['fights'] or 1
+    return {
+        'fights': total['fights'],
+        'wins': total['wins'],
+        'defeats': total['defeats'],
+        'fled': total['fled'],
+        'undecided': total['undecided'],
+        'win_rate': total['wins'] / fights,
+        'flee_attempts': total['flee_attempts'],
+        'flee_successes': total['flee_successes'],
+        'flee_success_rate': (total['flee_successes'] / total['flee_attempts']) if total['flee_attempts'] else 0.0,
+        'turns_to_kill': dict(sorted(total['turns_to_kill'].items())),
+        'potions_used': dict(sorted(total['potions_used'].items())),
+    }
+
+
+def main(argv=None):
+    from player import player
+
+    parser = argparse.ArgumentParser(description='Simulate fights against a tier using the current player stats.')
+    parser.add_argument('--tier', default='tier1')
+    parser.add_argument('-n', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--potion-below', type=float, default=0.3)
+    parser.add_argument('--flee-below', type=float, default=None)
+    args = parser.parse_args(argv)
+
+    result = simulate_fights(player, args.tier, args.n, seed=args.seed, workers=args.workers,
+                             policy=ThresholdPolicy(args.potion_below, args.flee_below))
+    for k, v in result.items():
+        print(f"{k}: {v}")
+
+
+if __name__ == '__main__':
+    main()
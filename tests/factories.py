@@ -0,0 +1,30 @@
+"""Player factories shared by the tests.
+
+Keyword arguments replace fields of the default player; list and dict values
+are copied, so one set of overrides can be reused across tests.
+"""
+from items import health_potion, iron_sword
+from player import new_player_state
+
+
+def make_player(**overrides):
+    """A plain player dict ready for the combat engine, with no items."""
+    p = {'name': 'Tester', 'level': 1, 'health': 100, 'max_health': 100, 'strength': 10, 'agility': 9,
+         'attack_power_bonus': 0, 'inventory': [], 'equipment': {}}
+    p.update({k: v.copy() if isinstance(v, (list, dict)) else v for k, v in overrides.items()})
+    return p
+
+
+def make_template(**overrides):
+    """A simulation template: `make_player` named 'Sim' with two health potions."""
+    fields = {'name': 'Sim', 'agility': 10, 'inventory': [health_potion, health_potion]}
+    fields.update(overrides)
+    return make_player(**fields)
+
+
+def make_saved_player(name, level, gold=0):
+    """A full `new_player_state()` with a potion and an equipped sword, as the save stores see them."""
+    p = new_player_state()
+    p.update(name=name, level=level, gold=gold, inventory=[health_potion])
+    p['equipment']['weapon'] = iron_sword
+    return p
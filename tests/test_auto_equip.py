@@ -22,8 +22,8 @@ class AutoEquipTests(unittest.TestCase):
 
         # acquire a better steel axe
         add_loot([steel_axe])
-        # steel_axe should be auto-equipped
-        self.assertEqual(p['equipment']['weapon'], steel_axe)
+        # (an instance of) steel_axe should be auto-equipped
+        self.assertIs(p['equipment']['weapon'].defn, steel_axe)
 
     def test_does_not_auto_equip_worse_item(self):
         p = player.player
@@ -1,4 +1,6 @@
 import unittest
+import os
+import tempfile
 from unittest.mock import patch
 import combat
 import main
@@ -7,7 +9,7 @@ import main
 class AutoSaveTests(unittest.TestCase):
     def test_save_called_on_combat_end(self):
         # Patch save_game where functions.save_game is imported
-        with patch('functions.save_game') as mock_save:
+        with patch('functions.save_game') as mock_save, tempfile.TemporaryDirectory() as d:
             mock_save.return_value = True
             # create minimal player/enemy
             player = {'name': 'Tester', 'health': 10, 'max_health': 10}
@@ -18,7 +20,7 @@ class AutoSaveTests(unittest.TestCase):
                 def is_alive(self):
                     return False
             e = DummyEnemy()
-            c = combat.Combat(player, e)
+            c = combat.Combat(player, e, replay_path=os.path.join(d, 'replays.bin'))
             c._end_combat(True)
             mock_save.assert_called()
 
@@ -0,0 +1,93 @@
+import unittest
+import json
+import os
+import struct
+import tempfile
+from items import ITEMS_BY_ID, get_item_by_id, get_item_id, health_potion, iron_sword, silver_ring
+from functions import (_deserialize_player, save_game, load_game, convert_save, encode_binary_save, decode_binary_save,
+                       benchmark_save_formats, BINARY_SAVE_MAGIC)
+from factories import make_player
+
+
+# every saved field set, a non-ASCII name and a stacked inventory
+SAVED = {'name': 'Bïnary', 'level': 5, 'experience': 30, 'health': 80, 'max_health': 120, 'strength': 12,
+         'agility': 11, 'gold': 123456, 'inventory_capacity': 20, 'attack_power_bonus': 10, 'armor_bonus': 0,
+         'inventory': [health_potion, health_potion, silver_ring],
+         'equipment': {'weapon': iron_sword, 'armor': None, 'accessory': None}}
+
+
+def empty_player():
+    return {'inventory': [], 'equipment': {'weapon': None, 'armor': None, 'accessory': None}}
+
+
+class BinarySaveTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def assertSamePlayer(self, a, b):
+        for k in ('name', 'level', 'experience', 'health', 'max_health', 'gold', 'attack_power_bonus'):
+            self.assertEqual(a[k], b[k], k)
+        # loaded weapons and armor are new instances of the same definitions
+        self.assertEqual([it.defn for it in a['inventory']], [it.defn for it in b['inventory']])
+        self.assertEqual({s: getattr(it, 'defn', None) for s, it in a['equipment'].items()},
+                         {s: getattr(it, 'defn', None) for s, it in b['equipment'].items()})
+
+    def test_item_ids_roundtrip(self):
+        self.assertIsNone(get_item_by_id(0))
+        self.assertIsNone(get_item_by_id(len(ITEMS_BY_ID)))
+        for it in ITEMS_BY_ID[1:]:
+            self.assertIs(get_item_by_id(get_item_id(it)), it)
+        self.assertEqual(get_item_id('No Such Item'), 0)
+
+    def test_binary_save_roundtrip(self):
+        src = make_player(**SAVED)
+        path = self.path('slot.sav')
+        self.assertTrue(save_game(path, src))
+        with open(path, 'rb') as fh:
+            self.assertEqual(fh.read(4), BINARY_SAVE_MAGIC)
+        dst = empty_player()
+        self.assertTrue(load_game(path, dst))
+        self.assertSamePlayer(src, dst)
+
+    def test_convert_both_ways(self):
+        src = make_player(**SAVED)
+        json_path, bin_path, back_path = self.path('a.json'), self.path('b.sav'), self.path('c.json')
+        self.assertTrue(save_game(json_path, src))
+        convert_save(json_path, bin_path)
+        convert_save(bin_path, back_path, binary=False)
+        with open(json_path) as a, open(back_path) as b:
+            self.assertEqual(json.load(a), json.load(b))
+        dst = empty_player()
+        self.assertTrue(load_game(bin_path, dst))
+        self.assertSamePlayer(src, dst)
+        self.assertLess(os.path.getsize(bin_path), os.path.getsize(json_path))
+
+    def test_missing_fields_and_newer_schema(self):
+        blob = encode_binary_save({'player': {'name': 'X', 'level': 2, 'inventory': ['Unknown'], 'equipment': {}}})
+        d = decode_binary_save(blob)['player']
+        self.assertEqual(d['level'], 2)
+        self.assertNotIn('gold', d)
+        self.assertEqual(d['inventory'], [])
+        newer = blob[:4] + struct.pack('<B', 99) + blob[5:]
+        with self.assertRaises(ValueError):
+            decode_binary_save(newer)
+
+    def test_mixed_ids_and_names_load(self):
+        dst = empty_player()
+        _deserialize_player({'inventory': [get_item_id(health_potion), 'Silver Ring', 'Unknown', 0]}, dst)
+        self.assertEqual([it.defn for it in dst['inventory']], [health_potion, silver_ring])
+
+    def test_benchmark_reports_sizes(self):
+        res = benchmark_save_formats(make_player(**SAVED), rounds=10)
+        self.assertLess(res['binary']['bytes'], res['json']['bytes'])
+        self.assertLess(res['json']['bytes'], res['json_indent']['bytes'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import patch
+from combat import CombatEngine, Combat
+from enemy import Enemy
+from factories import make_player
+from items import health_potion, iron_sword, steel_axe
+from rng import get_default_rng
+
+
+class FakeWidget:
+    """Records the widgets a Tk-free tooltip builds."""
+    created = []
+
+    def __init__(self, *args, **kwargs):
+        self.kwargs = kwargs
+        FakeWidget.created.append(self)
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class CombatEngineTests(unittest.TestCase):
+    def test_attack_emits_damage_event_and_passes_turn(self):
+        e = Enemy('Dummy', 50, 5, 2, 'tier1')
+        engine = CombatEngine(make_player(), e)
+        with patch('random.randint', return_value=0):
+            events = engine.player_action('attack')
+        self.assertEqual(events[0]['kind'], 'attack')
+        self.assertEqual(events[0]['amount'], 3)  # 10 // 2 - 2 armor
+        self.assertEqual(e.health, 47)
+        self.assertEqual(engine.state, CombatEngine.ENEMY_TURN)
+
+    def test_enemy_turn_respects_player_defend(self):
+        e = Enemy('Dummy', 50, 10, 0, 'tier1')
+        p = make_player()
+        engine = CombatEngine(p, e)
+        engine.player_action('defend')
+        with patch('random.randint', return_value=0):
+            events = engine.enemy_turn()
+        hit = [ev for ev in events if ev['kind'] == 'attack'][0]
+        self.assertEqual(hit['amount'], (10 - 3) // 2)
+        self.assertEqual(p['health'], 100 - hit['amount'])
+        self.assertEqual(engine.state, CombatEngine.PLAYER_TURN)
+
+    def test_enemy_decides_with_the_engines_rng(self):
+        e = Enemy('Dummy', 50, 10, 0, 'tier1')
+        p = make_player()
+        engine = CombatEngine(p, e)
+        self.assertIs(engine.rng, get_default_rng())
+        engine.player_action('defend')
+        with patch.object(Enemy, 'decide_action', autospec=True, return_value='defend') as decide:
+            events = engine.enemy_turn()
+        decide.assert_called_once_with(e, p, engine.rng)
+        self.assertEqual(events[-1]['kind'], 'defend')
+
+    def test_potion_uses_inventory_of_engine_player(self):
+        p = make_player(health=10, inventory=[health_potion])
+        engine = CombatEngine(p, Enemy('Dummy', 50, 5, 2, 'tier1'))
+        events = engine.player_action('potion')
+        self.assertEqual(events[0]['kind'], 'potion')
+        self.assertEqual(p['health'], 50)
+        self.assertEqual(p['inventory'], [])
+
+    def test_run_to_victory_without_gui(self):
+        e = Enemy('Dummy', 5, 1, 0, 'tier1')
+        engine = CombatEngine(make_player(strength=40), e)
+        outcome = engine.run()
+        self.assertIs(outcome, True)
+        self.assertTrue(engine.ended)
+        self.assertEqual(engine.events[-1]['kind'], 'end')
+
+    def test_acting_out_of_turn_raises(self):
+        engine = CombatEngine(make_player(), Enemy('Dummy', 50, 5, 2, 'tier1'))
+        with self.assertRaises(RuntimeError):
+            engine.enemy_turn()
+
+    def test_combat_renders_engine_events(self):
+        e = Enemy('Dummy', 50, 5, 2, 'tier1')
+        c = Combat(make_player(), e)
+        messages = []
+        c.append_message = lambda text, rarity=None: messages.append(text)
+        with patch('random.randint', return_value=0):
+            c._player_action('defend')
+        self.assertIn('Tester braces for incoming attacks.', messages)
+        self.assertIn('-- Enemy Turn -- Dummy', messages)
+
+    def test_item_tooltip_compares_with_the_fights_player(self):
+        p = make_player(equipment={'weapon': iron_sword, 'armor': None, 'accessory': None})
+        c = Combat(p, Enemy('Dummy', 50, 5, 2, 'tier1'))
+        c.win = None
+        FakeWidget.created = []
+        fake_tk = type('tk', (), {name: FakeWidget for name in ('Toplevel', 'Label', 'Text', 'Frame', 'Button')})
+        with patch('combat.tk', fake_tk):
+            c._show_item_tooltip(steel_axe)
+        texts = [w.kwargs.get('text') for w in FakeWidget.created]
+        self.assertIn('Current: Iron Sword (uncommon)', texts)
+        self.assertIn('Equip (Recommended)', texts)
+
+
+if __name__ == '__main__':
+    unittest.main()
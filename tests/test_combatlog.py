@@ -0,0 +1,136 @@
+import unittest
+import os
+import tempfile
+import time
+import combatlog
+from combatlog import CombatLogWriter, LogReader, iter_records, log_files, read_index, rebuild_index, tail
+
+
+def rec(i, outcome='win'):
+    return {'ts': 1000.0 + i, 'outcome': outcome, 'enemy': f'Goblin {i}', 'summary': f'fight {i} 🟣'}
+
+
+class CombatLogTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'combat_log.jsonl')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_writes_are_buffered_until_flush(self):
+        w = CombatLogWriter(self.path, flush_interval=0, max_buffered=3)
+        w.write(rec(0))
+        w.write(rec(1))
+        self.assertFalse(os.path.exists(self.path))
+        w.write(rec(2))
+        self.assertEqual(len(read_index(self.path)), 3)
+        w.write(rec(3))
+        w.flush()
+        self.assertEqual([r['enemy'] for r in iter_records(self.path)], [f'Goblin {i}' for i in range(4)])
+
+    def test_timer_flushes_in_background(self):
+        w = CombatLogWriter(self.path, flush_interval=0.05)
+        w.write(rec(0))
+        for _ in range(100):
+            if os.path.exists(self.path):
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(read_index(self.path)), 1)
+
+    def test_rotation_and_filters(self):
+        w = CombatLogWriter(self.path, max_bytes=400, backups=2, flush_interval=0, max_buffered=1)
+        for i in range(30):
+            w.write(rec(i, 'defeat' if i % 3 == 0 else 'win'))
+        files = log_files(self.path)
+        self.assertEqual(len(files), 3)
+        self.assertTrue(all(os.path.getsize(f) <= 400 for f in files))
+        kept = list(iter_records(self.path))
+        # oldest records were rotated out; the rest are in order
+        self.assertEqual([r['ts'] for r in kept], sorted(r['ts'] for r in kept))
+        self.assertEqual(kept[-1]['enemy'], 'Goblin 29')
+        defeats = list(iter_records(self.path, outcome='defeat', since=1020))
+        self.assertEqual([r['enemy'] for r in defeats], ['Goblin 21', 'Goblin 24', 'Goblin 27'])
+        self.assertEqual([r['enemy'] for r in tail(4, self.path)], [f'Goblin {i}' for i in range(26, 30)])
+
+    def test_rebuild_index(self):
+        w = CombatLogWriter(self.path, flush_interval=0)
+        for i in range(5):
+            w.write(rec(i))
+        w.flush()
+        os.remove(combatlog.index_path(self.path))
+        self.assertEqual(rebuild_index(self.path), 5)
+        self.assertEqual(tail(1, self.path)[0]['summary'], 'fight 4 🟣')
+        self.assertEqual(tail(0, self.path), [])
+        self.assertEqual(combatlog.format_record(rec(0)), '1970-01-01T00:16:40 - fight 0 🟣')
+
+    def test_old_text_log_is_imported_once(self):
+        with open(os.path.join(self.dir.name, 'combat_log.txt'), 'w', encoding='utf-8') as fh:
+            fh.write('1970-01-01T00:00:10 - Victory vs Rat | XP: 8 | Gold: 12\n')
+            fh.write('1970-01-01T00:00:20 - Fled from Wolf\n')
+        w = CombatLogWriter(self.path, flush_interval=0)
+        w.write(rec(0))
+        w.flush()
+        recs = list(iter_records(self.path))
+        self.assertEqual([(r['enemy'], r['outcome']) for r in recs], [('Rat', 'win'), ('Wolf', 'fled'), ('Goblin 0', 'win')])
+        self.assertEqual((recs[0]['ts'], recs[0]['xp'], recs[0]['gold']), (10.0, 8, 12))
+        self.assertFalse(os.path.exists(os.path.join(self.dir.name, 'combat_log.txt')))
+        self.assertEqual(len(tail(10, self.path)), 3)
+
+    def test_reader_pages_newest_first_with_filters(self):
+        w = CombatLogWriter(self.path, max_bytes=500, backups=3, flush_interval=0, max_buffered=1)
+        for i in range(20):
+            w.write(rec(i, 'fled' if i % 4 == 0 else 'win'))
+        reader = LogReader(self.path)
+        try:
+            self.assertEqual(len(reader), len(list(iter_records(self.path))))
+            newest = [reader.record(i)['enemy'] for i in list(reader.iter_newest())[:3]]
+            self.assertEqual(newest, ['Goblin 19', 'Goblin 18', 'Goblin 17'])
+            fled = [reader.record(i)['enemy'] for i in reader.iter_newest(outcome='fled')]
+            self.assertEqual(fled[0], 'Goblin 16')
+            self.assertTrue(all(int(name.split()[1]) % 4 == 0 for name in fled))
+            found = [reader.record(i)['enemy'] for i in reader.iter_newest(text='GOBLIN 1')]
+            self.assertEqual(found[0], 'Goblin 19')
+            self.assertNotIn('Goblin 9', found)
+        finally:
+            reader.close()
+
+    def test_reader_search_matches_values_not_keys(self):
+        w = CombatLogWriter(self.path, flush_interval=0)
+        w.write({'ts': 1.0, 'outcome': 'win', 'enemy': 'Rat', 'gold': 5, 'summary': 'easy'})
+        w.write({'ts': 2.0, 'outcome': 'win', 'enemy': 'Gold Golem', 'summary': 'shiny'})
+        w.write({'ts': 3.0, 'outcome': 'defeat', 'enemy': 'The "Quoted" Rat\\', 'summary': 'Élan perdu'})
+        w.flush()
+        reader = LogReader(self.path)
+        try:
+            self.assertEqual(list(reader.iter_newest(text='gold')), [1])
+            self.assertEqual(list(reader.iter_newest(text='enemy')), [])
+            self.assertEqual(list(reader.iter_newest(text='"quoted" rat\\')), [2])
+            self.assertEqual(list(reader.iter_newest(text='élan')), [2])
+            self.assertEqual(list(reader.iter_newest(outcome='win', text='rat')), [0])
+        finally:
+            reader.close()
+
+    def test_reader_releases_maps_and_notices_rotation(self):
+        w = CombatLogWriter(self.path, max_bytes=300, backups=3, flush_interval=0, max_buffered=1)
+        for i in range(4):
+            w.write(rec(i))
+        w.write({'ts': 2000.0, 'outcome': 'win', 'enemy': 'Rat', 'summary': 'rat bites'})
+        reader = LogReader(self.path)
+        # the record matches twice but is reported once
+        self.assertEqual(list(reader.iter_newest(text='RAT')), [4])
+        self.assertEqual(reader.record(0)['enemy'], 'Goblin 0')
+        reader.release()
+        self.assertEqual(reader._maps, {})
+        for i in range(5, 12):
+            w.write(rec(i))
+        with self.assertRaises(combatlog.LogChanged):
+            reader.record(0)
+        reader.release()
+        fresh = LogReader(self.path)
+        self.assertEqual(fresh.record(len(fresh) - 1)['enemy'], 'Goblin 11')
+        fresh.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
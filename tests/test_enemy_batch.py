@@ -0,0 +1,66 @@
+import unittest
+import types
+from enemy import Enemy, EnemyBatch, generate_enemies, generate_enemy_for_player
+from items import health_potion, iron_sword
+from rng import GameRNG
+import vector_combat
+
+
+class EnemySlotsTests(unittest.TestCase):
+    def test_enemy_has_fixed_layout(self):
+        e = Enemy('Goblin', 50, 5, 2, 'tier1')
+        self.assertFalse(hasattr(e, '__dict__'))
+        self.assertEqual((e.xp_reward, e.gold_reward, e.loot), (0, 0, []))
+        with self.assertRaises(AttributeError):
+            e.unexpected = 1
+
+    def test_batch_roundtrip(self):
+        enemies = [Enemy('Goblin', 50, 5, 2, 'tier1', [health_potion], 8, 10),
+                   Enemy('Orc', 150, 15, 5, 'tier2', None, 25, 40, [iron_sword])]
+        enemies[0].health = 30
+        batch = EnemyBatch.from_enemies(enemies)
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch.names, ['Goblin', 'Orc'])
+        g, o = batch[0], batch[-1]
+        self.assertEqual((g.name, g.health, g.max_health, g.tier), ('Goblin', 30, 50, 'tier1'))
+        self.assertEqual(g.inventory, [health_potion])
+        self.assertEqual((o.xp_reward, o.gold_reward, o.loot), (25, 40, [iron_sword]))
+        self.assertEqual([e.name for e in batch], ['Goblin', 'Orc'])
+
+    @unittest.skipIf(vector_combat.np is None, 'NumPy not installed')
+    def test_batch_to_arrays_matches_enemy_arrays(self):
+        enemies = [Enemy('Goblin', 50, 5, 2, 'tier1', [health_potion]), Enemy('Orc', 150, 15, 5, 'tier2')]
+        a = vector_combat.enemy_arrays(enemies)
+        b = vector_combat.enemy_arrays(EnemyBatch.from_enemies(enemies))
+        for k in a:
+            self.assertEqual(a[k].tolist(), b[k].tolist())
+
+
+class GenerateEnemiesTests(unittest.TestCase):
+    def _key(self, e):
+        return (e.name, e.health, e.attack_power, e.armor, e.xp_reward, e.gold_reward)
+
+    def test_is_lazy_and_reproducible(self):
+        gen = generate_enemies('tier2', 10 ** 9, seed=7)
+        self.assertIsInstance(gen, types.GeneratorType)
+        first = [self._key(next(gen)) for _ in range(5)]
+        again = [self._key(e) for e in generate_enemies('tier2', 5, seed=7)]
+        self.assertEqual(first, again)
+
+    def test_chunks_match_single_stream(self):
+        single = [self._key(e) for e in generate_enemies('tier1', 25, seed=3)]
+        chunks = list(generate_enemies('tier1', 25, seed=3, chunk_size=10))
+        self.assertEqual([len(c) for c in chunks], [10, 10, 5])
+        self.assertTrue(all(isinstance(c, EnemyBatch) for c in chunks))
+        self.assertEqual([self._key(e) for c in chunks for e in c], single)
+
+    def test_level_matches_generate_enemy_for_player(self):
+        bulk = [self._key(e) for e in generate_enemies(9, 5, seed=1)]
+        rng = GameRNG(1)
+        one_by_one = [self._key(generate_enemy_for_player(9, rng=rng)) for _ in range(5)]
+        self.assertEqual(bulk, one_by_one)
+        self.assertTrue(all(e.tier == 'tier3' for e in generate_enemies(9, 5, seed=1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
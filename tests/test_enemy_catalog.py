@@ -0,0 +1,83 @@
+import random
+import unittest
+from collections import Counter
+
+import enemy
+from enemy import get_catalog, generate_enemy, get_enemy_templates_for_tier
+from plugins.registry import PluginRegistry
+from rng import GameRNG
+
+
+class EnemyCatalogTests(unittest.TestCase):
+    def test_catalog_is_cached_until_registry_changes(self):
+        reg = PluginRegistry()
+        cat = get_catalog(reg)
+        self.assertIs(get_catalog(reg), cat)
+        self.assertIs(cat.tier_table('tier1', 3), cat.tier_table('tier1', 3))
+
+        reg.register_enemy('slime_king', {'id': 'slime_king', 'name': 'Slime King', 'tier': 1,
+                                          'health': 80, 'attack_power': 7, 'armor': 3})
+        cat2 = get_catalog(reg)
+        self.assertIsNot(cat2, cat)
+        self.assertIn('Slime King', cat2.tier_table('tier1', 3).names)
+
+    def test_editing_enemy_stats_in_place_takes_effect(self):
+        reg = PluginRegistry()
+        before = get_catalog(reg).tier_table('tier1', 3).attack_power[0]
+        original = dict(enemy.enemy_stats['tier1'])
+        self.addCleanup(enemy.enemy_stats['tier1'].update, original)
+        enemy.enemy_stats['tier1']['attack_power'] = 50
+        self.assertEqual(generate_enemy('tier1', reg, GameRNG(1)).attack_power, 50)
+        self.assertNotEqual(before, 50)
+        enemy.enemy_stats['tier1'].update(original)
+        self.assertEqual(get_catalog(reg).tier_table('tier1', 3).attack_power[0], before)
+
+    def test_invalidate_picks_up_plugin_data_edited_in_place(self):
+        reg = PluginRegistry()
+        reg.register_enemy('slime_king', {'id': 'slime_king', 'name': 'Slime King', 'tier': 7,
+                                          'health': 80, 'attack_power': 7, 'armor': 3})
+        self.assertEqual(get_catalog(reg).tier_table('tier7', 3).attack_power, [7])
+        reg.enemies['slime_king']['attack_power'] = 9
+        enemy.invalidate_catalogs(reg)
+        self.assertEqual(get_catalog(reg).tier_table('tier7', 3).attack_power, [9])
+
+    def test_plugin_templates_are_normalized(self):
+        reg = PluginRegistry()
+        reg.register_enemy('slime_king', {'id': 'slime_king', 'name': 'Slime King', 'tier': 1,
+                                          'health': 80, 'attack_power': 7, 'armor': 3})
+        t = get_enemy_templates_for_tier('tier1', reg)[0]
+        self.assertEqual(t['name'], 'Slime King')
+        self.assertEqual(t['base_stats'], {'health': 80, 'attack_power': 7, 'armor': 3})
+        # the plugin enemy can actually be generated
+        names = {generate_enemy('tier1', reg, GameRNG(i)).name for i in range(300)}
+        self.assertIn('Slime King', names)
+
+    def test_tier_table_prescales_stats_and_rewards(self):
+        table = get_catalog().tier_table('tier2', 5)
+        m = enemy.get_difficulty_multiplier(5)
+        i = table.names.index('Orc')
+        self.assertAlmostEqual(table.hp_lo[i], 150 * m * 0.9)
+        self.assertEqual(table.attack_power[i], int(15 * m))
+        self.assertEqual(table.xp_reward, int(enemy.TIER_XP['tier2'] * m))
+
+        e = generate_enemy('tier2', rng=GameRNG(1))
+        self.assertIn(e.name, enemy.enemy_names['tier2'])
+
+    def test_weighted_pick_follows_template_weights(self):
+        reg = PluginRegistry()
+        for name, weight in (('Rare', 1), ('Common', 3)):
+            reg.register_enemy(name, {'id': name, 'name': name, 'tier': 9, 'weight': weight,
+                                      'health': 10, 'attack_power': 1, 'armor': 0})
+        table = get_catalog(reg).tier_table('tier9', 3)
+        rnd = random.Random(0)
+        counts = Counter(table.names[table.pick(rnd)] for _ in range(20000))
+        self.assertEqual(set(counts), {'Rare', 'Common'})
+        self.assertAlmostEqual(counts['Common'] / 20000, 0.75, delta=0.02)
+
+    def test_unknown_tier_raises(self):
+        with self.assertRaises(ValueError):
+            generate_enemy('tier99', PluginRegistry())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import patch
+import main
+from items import Item, health_potion, iron_sword, plate_armor
+from player_helpers import add_loot, equip_item, unequip_item
+
+
+class EquipmentPanelTests(unittest.TestCase):
+    def setUp(self):
+        self.p = main.player
+        self.p['inventory'] = [iron_sword, plate_armor]
+        self.p['equipment'] = {'weapon': None, 'armor': None, 'accessory': None}
+        self.p['inventory_capacity'] = 20
+        patcher = patch('functions.TextFuncs.var_speed_print')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        main.update_equipment_panel()
+
+    def _text(self, slot):
+        return main._equipment_widgets[slot][0].cget('text')
+
+    def test_equip_updates_only_that_slot(self):
+        widgets = dict(main._equipment_widgets)
+        with patch.object(main, 'format_equipment_text', wraps=main.format_equipment_text) as fmt:
+            equip_item(iron_sword, self.p)
+        # the widgets are reused and only the weapon label was re-rendered
+        self.assertEqual(main._equipment_widgets, widgets)
+        self.assertEqual([c.args[0] for c in fmt.call_args_list], ['weapon'])
+        self.assertIn('Iron Sword', self._text('weapon'))
+        self.assertEqual(str(main._equipment_widgets['weapon'][1].cget('state')), 'normal')
+
+        unequip_item('weapon', self.p)
+        self.assertIn('(None)', self._text('weapon'))
+        self.assertEqual(str(main._equipment_widgets['weapon'][1].cget('state')), 'disabled')
+
+    def test_loot_burst_auto_equip_reaches_panel(self):
+        self.p['inventory'] = []
+        add_loot([health_potion, plate_armor, Item('Gem', 'misc', {}, 5)], self.p)
+        self.assertIn('Plate Armor', self._text('armor'))
+        self.assertIn(f"Armor bonus: {self.p['armor_bonus']}", main._equipment_widgets['stats'].cget('text'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import pickle
+import player_store
+from inventory import Inventory, InventoryFull, add_item, count_named, find_item
+from items import health_potion, iron_sword, mana_potion, plate_armor, silver_ring, steel_axe
+from player import new_player_state
+from player_helpers import equip_item, unequip_item
+
+
+class InventoryTests(unittest.TestCase):
+    def test_consumables_stack_and_len_counts_units(self):
+        inv = Inventory([health_potion, iron_sword, health_potion, mana_potion])
+        self.assertEqual(len(inv), 4)
+        self.assertEqual(inv.stacks(), [(health_potion, 2), (iron_sword, 1), (mana_potion, 1)])
+        self.assertEqual(list(inv), [health_potion, health_potion, iron_sword, mana_potion])
+        self.assertEqual(inv[1], health_potion)
+        self.assertEqual(inv[-1], mana_potion)
+        self.assertEqual(inv.count(health_potion), 2)
+
+    def test_equipment_does_not_stack(self):
+        inv = Inventory([iron_sword, iron_sword])
+        self.assertEqual(inv.stacks(), [(iron_sword, 1), (iron_sword, 1)])
+        self.assertEqual(inv.quantity('Iron Sword'), 2)
+
+    def test_lookups_by_name_type_and_slot(self):
+        inv = Inventory([health_potion, iron_sword, plate_armor, silver_ring, health_potion])
+        self.assertIs(inv.find('Plate Armor'), plate_armor)
+        self.assertIsNone(inv.find('Steel Axe'))
+        self.assertEqual(inv.quantity('Health Potion'), 2)
+        self.assertEqual(inv.by_type('consumable'), [health_potion])
+        self.assertEqual(inv.by_type('equipment'), [iron_sword, plate_armor, silver_ring])
+        self.assertEqual(inv.by_slot('weapon'), [iron_sword])
+        self.assertEqual(inv.by_slot('armor'), [plate_armor])
+        self.assertEqual(inv.by_slot('accessory'), [silver_ring])
+
+    def test_remove_and_take_keep_indexes_in_sync(self):
+        inv = Inventory([health_potion, health_potion, iron_sword])
+        self.assertIs(inv.take('Health Potion'), health_potion)
+        self.assertEqual(inv.quantity('Health Potion'), 1)
+        inv.remove(health_potion)
+        self.assertNotIn(health_potion, inv)
+        self.assertEqual(inv.by_type('consumable'), [])
+        self.assertIsNone(inv.take('Health Potion'))
+        inv.remove(iron_sword)
+        self.assertEqual(inv.by_slot('weapon'), [])
+        self.assertEqual(len(inv), 0)
+        with self.assertRaises(ValueError):
+            inv.remove(iron_sword)
+
+    def test_capacity(self):
+        inv = Inventory([iron_sword], capacity=2)
+        self.assertTrue(inv.add(health_potion))
+        self.assertTrue(inv.is_full())
+        self.assertFalse(inv.add(health_potion))
+        with self.assertRaises(InventoryFull):
+            inv.append(plate_armor)
+        self.assertEqual(len(inv), 2)
+        self.assertEqual(inv.free(), 0)
+        self.assertIsNone(Inventory().free())
+
+    def test_capacity_comes_from_the_owner(self):
+        p = new_player_state()
+        p['inventory_capacity'] = 1
+        p['inventory'] = [health_potion]
+        self.assertFalse(p['inventory'].add(mana_potion))
+        p['inventory_capacity'] = 3
+        self.assertTrue(p['inventory'].add(mana_potion, 2))
+
+    def test_list_compatibility(self):
+        inv = Inventory([health_potion, iron_sword])
+        self.assertEqual(inv, [health_potion, iron_sword])
+        self.assertNotEqual(inv, [iron_sword, health_potion])
+        self.assertEqual(inv.index(iron_sword), 1)
+        self.assertIs(inv.pop(), iron_sword)
+        inv += [plate_armor]
+        self.assertEqual(inv[:], [health_potion, plate_armor])
+        del inv[0]
+        self.assertEqual(inv.copy(), [plate_armor])
+        clone = pickle.loads(pickle.dumps(Inventory([health_potion, health_potion])))
+        self.assertEqual([(it.name, n) for it, n in clone.stacks()], [('Health Potion', 2)])
+
+    def test_helpers_work_on_lists_too(self):
+        for items in ([health_potion, iron_sword, health_potion], Inventory([health_potion, iron_sword, health_potion])):
+            self.assertIs(find_item(items, 'Iron Sword'), iron_sword)
+            self.assertIsNone(find_item(items, 'Steel Axe'))
+            self.assertEqual(count_named(items, 'Health Potion'), 2)
+
+    def test_add_item_on_lists_and_inventories(self):
+        items = [health_potion]
+        self.assertFalse(add_item(items, iron_sword, capacity=1))
+        self.assertTrue(add_item(items, iron_sword))
+        self.assertEqual(items, [health_potion, iron_sword])
+        inv = Inventory([health_potion], capacity=1)
+        self.assertFalse(add_item(inv, iron_sword, capacity=5))
+
+    def test_equipping_from_a_full_inventory_swaps(self):
+        p = new_player_state()
+        p['inventory_capacity'] = 2
+        p['inventory'] = [steel_axe, health_potion]
+        p['equipment']['weapon'] = iron_sword
+        self.assertEqual(equip_item(steel_axe, p), 'weapon')
+        self.assertIs(p['equipment']['weapon'], steel_axe)
+        self.assertEqual(p['inventory'].stacks(), [(health_potion, 1), (iron_sword, 1)])
+        # no room to unequip: nothing changes, bonuses included
+        bonus = p['attack_power_bonus']
+        self.assertFalse(unequip_item('weapon', p))
+        self.assertIs(p['equipment']['weapon'], steel_axe)
+        self.assertEqual(p['attack_power_bonus'], bonus)
+
+    def test_player_inventory_reports_every_unit(self):
+        p = new_player_state()
+        p['inventory'] = []
+        seen = []
+        sub = player_store.subscribe(lambda store, events: seen.extend((ev.op, ev.path) for ev in events), p)
+        self.addCleanup(player_store.unsubscribe, sub, p)
+        p['inventory'].add(health_potion, 2)
+        p['inventory'].take('Health Potion')
+        self.assertEqual(seen, [('add', 'inventory[+Health Potion]'), ('add', 'inventory[+Health Potion]'),
+                                ('remove', 'inventory[-Health Potion]')])
+
+
+if __name__ == '__main__':
+    unittest.main()
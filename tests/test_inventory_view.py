@@ -0,0 +1,71 @@
+import unittest
+import tkinter as tk
+from unittest.mock import patch
+from inventory_view import InventoryView
+from items import Item, health_potion, iron_sword
+from player import new_player_state
+from player_helpers import add_loot, equip_item, sell_item, use_health_potion
+
+
+class InventoryViewTests(unittest.TestCase):
+    def setUp(self):
+        self.root = tk.Tk()
+        self.root.withdraw()
+        self.p = new_player_state()
+        self.p['inventory_capacity'] = 5000
+        self.p['inventory'] = [Item(f'Pebble {i}', 'misc', {}, 1) for i in range(3000)]
+        self.view = InventoryView(self.root, self.p)
+        patcher = patch('functions.TextFuncs.var_speed_print')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.view.close()
+        self.root.destroy()
+
+    def test_changes_are_applied_as_row_diffs(self):
+        self.assertEqual(len(self.view), 3000)
+        with patch.object(self.view, 'reload') as reload:
+            add_loot([Item('Gem', 'misc', {}, 50, rarity='rare'), health_potion], self.p)
+            self.assertEqual(len(self.view), 3002)
+            last = self.view.tree.get_children()[-1]
+            self.assertEqual(self.view.tree.item(last, 'values')[0], 'Health Potion')
+            sell_item(self.p['inventory'][0], p=self.p)
+            self.assertEqual(self.view.tree.item(self.view.tree.get_children()[0], 'values')[0], 'Pebble 1')
+            reload.assert_not_called()
+        self.assertEqual(len(self.view), len(self.p['inventory']))
+
+    def test_equip_swaps_rows_and_other_players_are_ignored(self):
+        self.p['inventory'].append(iron_sword)
+        self.view.reload()
+        equip_item(iron_sword, self.p)
+        self.assertEqual(len(self.view), 3000)
+        other = new_player_state()
+        add_loot([health_potion], other)
+        self.assertEqual(len(self.view), 3000)
+
+    def test_stacks_are_one_row_with_a_quantity(self):
+        with patch.object(self.view, 'reload') as reload:
+            add_loot([health_potion, Item('Gem', 'misc', {}, 50), health_potion], self.p)
+            rows = self.view.tree.get_children()
+            self.assertEqual(len(rows), 3002)
+            potion = self.view.tree.item(rows[-2], 'values')
+            self.assertEqual((potion[0], str(potion[1])), ('Health Potion', '2'))
+            use_health_potion(self.p)
+            self.assertEqual(str(self.view.tree.item(rows[-2], 'values')[1]), '1')
+            use_health_potion(self.p)
+            self.assertEqual(len(self.view.tree.get_children()), 3001)
+            reload.assert_not_called()
+        self.assertEqual(len(self.view), len(self.p['inventory']))
+
+    def test_inspect_selected(self):
+        seen = []
+        self.view.on_inspect = seen.append
+        first = self.view.tree.get_children()[0]
+        self.view.tree.selection_set(first)
+        self.view.inspect_selected()
+        self.assertEqual([it.name for it in seen], ['Pebble 0'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import os
+import pickle
+import tempfile
+from functions import (_SAVE_FIXED, _deserialize_player, _serialize_player, decode_binary_save, encode_binary_save,
+                       item_ref, load_game, save_game)
+from items import Item, ItemDef, ItemInstance, health_potion, instantiate, iron_sword, plate_armor
+from player import new_player_state
+from player_helpers import add_loot, equip_item, sell_item
+from savestore import SaveStore
+from unittest.mock import patch
+
+
+class ItemInstanceTests(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('functions.TextFuncs.var_speed_print')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_definitions_are_immutable_shared_flyweights(self):
+        self.assertIs(Item, ItemDef)
+        with self.assertRaises(AttributeError):
+            iron_sword.value = 1
+        with self.assertRaises(TypeError):
+            iron_sword.effect['attack_power'] = 99
+        self.assertFalse(hasattr(iron_sword, '__dict__'))
+        self.assertIs(pickle.loads(pickle.dumps(iron_sword)), iron_sword)
+        gem = pickle.loads(pickle.dumps(Item('Gem', 'misc', {'luck': 1}, 5)))
+        self.assertEqual((gem.name, dict(gem.effect)), ('Gem', {'luck': 1}))
+
+    def test_instantiate(self):
+        self.assertIs(instantiate(health_potion), health_potion)
+        a, b = instantiate(iron_sword), instantiate(iron_sword)
+        self.assertIsInstance(a, ItemInstance)
+        self.assertIs(a.defn, iron_sword)
+        self.assertNotEqual(a.uid, b.uid)
+        self.assertIs(instantiate(a), a)
+        self.assertIsInstance(instantiate(health_potion, {'charges': 2}), ItemInstance)
+
+    def test_instance_reads_like_its_definition(self):
+        a = ItemInstance(iron_sword, {'durability': 40})
+        self.assertEqual((a.name, a.item_type, a.value, a.rarity), ('Iron Sword', 'equipment', 50, 'uncommon'))
+        self.assertEqual(a.effect, iron_sword.effect)
+        self.assertIn('durability: 40', a.description())
+        # instances are identified by uid alone
+        self.assertNotEqual(a, iron_sword)
+        self.assertNotEqual(a, ItemInstance(iron_sword, {'durability': 40}))
+        self.assertEqual(a, pickle.loads(pickle.dumps(a)))
+        self.assertEqual(len({a, iron_sword, ItemInstance(iron_sword)}), 3)
+
+    def test_two_swords_are_distinct_items(self):
+        p = new_player_state()
+        p['inventory'] = []
+        add_loot([iron_sword, iron_sword], p)
+        equipped = p['equipment']['weapon']
+        spare = p['inventory'][0]
+        self.assertIsNot(equipped, spare)
+        self.assertEqual(len(p['inventory'].by_slot('weapon')), 1)
+        sell_item(spare, p=p)
+        self.assertIs(p['equipment']['weapon'], equipped)
+        self.assertEqual(len(p['inventory']), 0)
+
+    def test_definition_refers_to_the_first_held_instance(self):
+        p = new_player_state()
+        worn, fresh = ItemInstance(iron_sword, {'durability': 1}), ItemInstance(iron_sword, {'durability': 9})
+        p['inventory'] = [worn, fresh]
+        self.assertIs(p['inventory'].find_item(iron_sword), worn)
+        self.assertIs(p['inventory'].find_item(fresh), fresh)
+        self.assertEqual(equip_item(iron_sword, p), 'weapon')
+        self.assertIs(p['equipment']['weapon'], worn)
+        self.assertEqual(list(p['inventory']), [fresh])
+        sell_item(iron_sword, p=p)
+        self.assertEqual(len(p['inventory']), 0)
+        self.assertIs(p['equipment']['weapon'], worn)
+
+    def test_instance_data_survives_json_saves(self):
+        p = new_player_state()
+        p['inventory'] = [ItemInstance(iron_sword, {'durability': 12}), health_potion]
+        d = _serialize_player(p)
+        self.assertEqual(d['inventory'], [{'item': 'Iron Sword', 'data': {'durability': 12}}, 'Health Potion'])
+        q = new_player_state()
+        _deserialize_player(d, q)
+        sword = q['inventory'].find('Iron Sword')
+        self.assertEqual(sword.data, {'durability': 12})
+        self.assertIs(q['inventory'].find('Health Potion'), health_potion)
+        equip_item(sword, q)
+        self.assertIs(q['equipment']['weapon'], sword)
+
+    def test_instance_data_survives_binary_saves(self):
+        p = new_player_state()
+        p['inventory'] = [health_potion, ItemInstance(iron_sword, {'durability': 3})]
+        p['equipment']['armor'] = ItemInstance(plate_armor, {'affix': 'of Thorns'})
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'slot.sav')
+            self.assertTrue(save_game(path, p))
+            q = new_player_state()
+            self.assertTrue(load_game(path, q))
+            store = SaveStore(d)
+            self.assertTrue(store.save('a', p))
+            r = new_player_state()
+            self.assertTrue(store.load('a', r))
+        for loaded in (q, r):
+            self.assertEqual(loaded['inventory'].find('Iron Sword').data, {'durability': 3})
+            self.assertIs(loaded['inventory'].find('Health Potion'), health_potion)
+            self.assertEqual(loaded['equipment']['armor'].data, {'affix': 'of Thorns'})
+
+    def test_version_1_binary_saves_still_load(self):
+        blob = encode_binary_save({'player': _serialize_player(
+            {'name': 'Old', 'inventory': [iron_sword], 'equipment': {}}, item_ids=True)})
+        # a version 1 blob is the same without the item data section
+        fixed = _SAVE_FIXED.size + 2
+        v1 = blob[:4] + bytes([1]) + blob[5:fixed] + blob[fixed + 4:]
+        d = decode_binary_save(v1)['player']
+        self.assertEqual((d['name'], d['inventory']), ('Old', [item_ref(iron_sword, item_ids=True)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
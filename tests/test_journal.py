@@ -0,0 +1,129 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+from functions import TextFuncs
+from items import health_potion, iron_sword, steel_axe
+from journal import SaveJournal, read_records, recover, load_journal
+from player import new_player_state
+from player_helpers import add_gold, add_experience, add_loot, equip_item, sell_item, use_health_potion
+from session import GameSession
+
+
+class JournalTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'player.journal')
+        self.p = new_player_state()
+        self.p['inventory'] = [health_potion]
+        patcher = patch.object(TextFuncs, 'var_speed_print')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_commit_appends_only_deltas(self):
+        j = SaveJournal(self.path, self.p)
+        self.addCleanup(j.close)
+        size = os.path.getsize(self.path)
+        add_gold(15, self.p)
+        self.assertEqual(j.commit(), 1)
+        recs = read_records(self.path)
+        self.assertEqual([r['op'] for r in recs], ['snapshot', 'stats'])
+        self.assertEqual(recs[-1]['fields'], {'gold': self.p['gold']})
+        self.assertLess(os.path.getsize(self.path) - size, 100)
+        self.assertEqual(j.commit(), 0)
+
+    def test_recover_matches_live_state(self):
+        j = SaveJournal(self.path, self.p)
+        self.addCleanup(j.close)
+        add_experience(500, self.p)
+        add_loot([iron_sword, steel_axe], self.p)
+        use_health_potion(self.p)
+        sell_item(iron_sword, p=self.p)
+        # a change made outside the helpers (e.g. combat damage) is picked up on commit
+        self.p['health'] -= 7
+        j.commit()
+
+        q = new_player_state()
+        self.assertTrue(load_journal(self.path, q))
+        for k in ('level', 'experience', 'gold', 'health', 'attack_power_bonus'):
+            self.assertEqual(q[k], self.p[k], k)
+        # a load makes new item instances: compare the definitions behind them
+        self.assertEqual([it.defn for it in q['inventory']], [it.defn for it in self.p['inventory']])
+        self.assertEqual({s: getattr(it, 'defn', None) for s, it in q['equipment'].items()},
+                         {s: getattr(it, 'defn', None) for s, it in self.p['equipment'].items()})
+
+    def test_point_in_time_recovery(self):
+        j = SaveJournal(self.path, self.p)
+        self.addCleanup(j.close)
+        start_gold = self.p['gold']
+        add_gold(10, self.p)
+        j.commit()
+        seq = read_records(self.path)[-1]['seq']
+        add_gold(90, self.p)
+        j.commit()
+        self.assertEqual(recover(self.path, until_seq=seq)['gold'], start_gold + 10)
+        self.assertEqual(recover(self.path)['gold'], start_gold + 100)
+
+    def test_compaction_and_torn_tail(self):
+        j = SaveJournal(self.path, self.p, compact_every=5)
+        self.addCleanup(j.close)
+        for _ in range(6):
+            add_gold(1, self.p)
+            j.commit()
+        self.assertLess(len(read_records(self.path)), 5)
+        with open(self.path, 'a') as fh:
+            fh.write('{"seq": 99, "op": "sta')
+        self.assertEqual(recover(self.path)['gold'], self.p['gold'])
+
+    def test_reopening_replays_the_journal_into_the_player(self):
+        j = SaveJournal(self.path, self.p)
+        add_gold(40, self.p)
+        add_loot([iron_sword], self.p)
+        j.commit()
+        j.close()
+
+        q = new_player_state()
+        j = SaveJournal(self.path, q)
+        self.addCleanup(j.close)
+        self.assertEqual(q['gold'], self.p['gold'])
+        self.assertEqual(q['equipment']['weapon'].defn, iron_sword)
+        # later deltas continue from the replayed state
+        add_gold(1, q)
+        self.assertEqual(j.commit(), 1)
+        self.assertEqual(recover(self.path)['gold'], self.p['gold'] + 1)
+
+    def test_reopening_a_torn_journal_compacts_it(self):
+        j = SaveJournal(self.path, self.p)
+        add_gold(5, self.p)
+        j.commit()
+        j.close()
+        with open(self.path, 'a') as fh:
+            fh.write('{"seq": 99, "op": "sta')
+        q = new_player_state()
+        j = SaveJournal(self.path, q)
+        self.addCleanup(j.close)
+        self.assertEqual([r['op'] for r in read_records(self.path)], ['snapshot'])
+        add_gold(1, q)
+        j.commit()
+        self.assertEqual(recover(self.path)['gold'], self.p['gold'] + 1)
+
+    def test_other_players_are_ignored(self):
+        j = SaveJournal(self.path, self.p)
+        self.addCleanup(j.close)
+        equip_item(iron_sword, new_player_state())
+        self.assertEqual(j.commit(), 0)
+
+    def test_session_save_uses_journal(self):
+        s = GameSession(self.p)
+        s.enable_journal(self.path)
+        self.addCleanup(s.journal.close)
+        s.add_gold(5)
+        self.assertTrue(s.save())
+        self.assertEqual(read_records(self.path)[-1]['op'], 'stats')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+import log_analytics
+import messagebus
+from combatlog import CombatLogWriter
+from enemy import Enemy
+from items import Item
+from log_analytics import (aggregate, loot_rarity_distribution, outcomes_per_enemy, records, rewards_per_hour,
+                           where, OutcomesPerEnemy, LootRarity)
+from persistence import fight_record
+from player import new_player_state
+
+
+class LogAnalyticsTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'combat_log.jsonl')
+        p = new_player_state()
+        p.update(name='Ann', level=3)
+        gem = Item('Gem', 'misc', {}, 50, rarity='rare')
+        ring = Item('Ring', 'misc', {}, 90, rarity='epic')
+        goblin = Enemy('Goblin', 0, 5, 2, 'tier1', xp_reward=10, gold_reward=4, loot=[gem])
+        orc = Enemy('Orc', 0, 15, 5, 'tier2', xp_reward=30, gold_reward=12, loot=[gem, ring])
+        fights = [(goblin, True), (goblin, True), (goblin, 'fled'), (orc, False), (orc, True)]
+        w = CombatLogWriter(self.path, max_bytes=600, backups=5, flush_interval=0, max_buffered=2)
+        for i, (enemy, outcome) in enumerate(fights):
+            rec = fight_record(p, enemy, outcome)
+            rec['ts'] = 7200.0 + i * 1200   # 20 minutes apart, spanning two hours
+            w.write(rec)
+        w.flush()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_outcomes_per_enemy(self):
+        self.assertEqual(outcomes_per_enemy(records(self.path)), {
+            'Goblin': {'win': 2, 'defeat': 0, 'fled': 1},
+            'Orc': {'win': 1, 'defeat': 1, 'fled': 0}})
+
+    def test_rewards_per_hour_and_filters(self):
+        self.assertEqual(rewards_per_hour(records(self.path)), {
+            7200: {'fights': 3, 'xp': 20, 'gold': 8},
+            10800: {'fights': 2, 'xp': 30, 'gold': 12}})
+        wins = rewards_per_hour(where(records(self.path, outcome='win'), tier='tier2'))
+        self.assertEqual(wins, {10800: {'fights': 1, 'xp': 30, 'gold': 12}})
+
+    def test_single_pass_aggregates(self):
+        per_enemy, rarity = aggregate(records(self.path, since=8400), OutcomesPerEnemy(), LootRarity())
+        self.assertEqual(set(per_enemy), {'Goblin', 'Orc'})
+        self.assertEqual(dict(rarity), {'rare': 2, 'epic': 1})
+        self.assertEqual(dict(loot_rarity_distribution(records(self.path))), {'rare': 3, 'epic': 1})
+
+    def test_cli_json(self):
+        # typewriter output queued by earlier tests must not land in the captured stdout
+        messagebus.get_sink().flush(hurry=True)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            log_analytics.main(['summary', '--log', self.path])
+        data = json.loads(out.getvalue())
+        self.assertEqual(data['loot'], {'rare': 3, 'epic': 1})
+        self.assertEqual(data['hours']['7200']['xp'], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,37 +1,49 @@
 import unittest
 import os
+import tempfile
 import enemy
 import player
 from combat import Combat
+from combatlog import LOG_FILENAME, INDEX_SUFFIX
+from persistence import get_backend
+from replay import iter_records
 
 
 class LoggingTests(unittest.TestCase):
     def setUp(self):
+        replays = tempfile.TemporaryDirectory()
+        self.addCleanup(replays.cleanup)
+        self.replay_path = os.path.join(replays.name, 'replays.bin')
         # ensure no log exists
         try:
             from functions import get_data_dir
-            p = os.path.join(get_data_dir(), 'combat_log.txt')
+            p = os.path.join(get_data_dir(), LOG_FILENAME)
             os.remove(p)
+            os.remove(p + INDEX_SUFFIX)
         except FileNotFoundError:
             pass
 
     def test_end_combat_writes_log(self):
         e = enemy.generate_enemy('tier1')
-        c = Combat(player.player, e)
+        c = Combat(player.player, e, replay_path=self.replay_path)
         # Call _end_combat in non-GUI mode
         c._end_combat(True)
+        get_backend().flush()
         from functions import get_data_dir
-        p = os.path.join(get_data_dir(), 'combat_log.txt')
+        p = os.path.join(get_data_dir(), LOG_FILENAME)
         self.assertTrue(os.path.exists(p))
         with open(p, 'r', encoding='utf-8') as fh:
             contents = fh.read()
         self.assertIn('Victory vs', contents)
+        # the replay went to the path given to Combat, not the user data directory
+        self.assertEqual(len(list(iter_records(self.replay_path))), 1)
 
     def tearDown(self):
         try:
             from functions import get_data_dir
-            p = os.path.join(get_data_dir(), 'combat_log.txt')
+            p = os.path.join(get_data_dir(), LOG_FILENAME)
             os.remove(p)
+            os.remove(p + INDEX_SUFFIX)
         except FileNotFoundError:
             pass
 
@@ -0,0 +1,45 @@
+import unittest
+import time
+import messagebus
+from functions import TextFuncs
+from messagebus import CallbackSink, NullSink, TypewriterSink
+
+
+class MessageBusTests(unittest.TestCase):
+    def setUp(self):
+        self.out = []
+        self.sink = TypewriterSink(write=self.out.append)
+        self.previous = messagebus.set_sink(self.sink)
+        self.old_logger = TextFuncs._gui_logger
+        TextFuncs.set_gui_logger(None)
+
+    def tearDown(self):
+        messagebus.set_sink(self.previous)
+        TextFuncs.set_gui_logger(self.old_logger)
+
+    def test_publishing_does_not_wait_for_typewriter(self):
+        start = time.perf_counter()
+        TextFuncs.var_speed_print('Leveled up! Now level 2', 0.05, 0.0)
+        TextFuncs.var_speed_print('Acquired Gem.', 0.05, 0.0)
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertTrue(self.sink.flush(5.0, hurry=True))
+        self.assertEqual(''.join(self.out), 'Leveled up! Now level 2\nAcquired Gem.\n')
+
+    def test_flush_waits_for_output_in_order(self):
+        for i in range(3):
+            TextFuncs.var_speed_print(f'msg {i}', 0.0, 0.0)
+        self.assertTrue(TextFuncs.flush_messages(2.0))
+        self.assertEqual(''.join(self.out), 'msg 0\nmsg 1\nmsg 2\n')
+
+    def test_other_sinks(self):
+        seen = []
+        messagebus.set_sink(CallbackSink(lambda text, rarity=None: seen.append((text, rarity))))
+        messagebus.publish('hello', rarity='rare')
+        messagebus.set_sink(NullSink())
+        TextFuncs.var_speed_print('dropped', 1.0, 1.0)
+        self.assertEqual(seen, [('hello', 'rare')])
+        self.assertEqual(self.out, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
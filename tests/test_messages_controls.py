@@ -11,10 +11,12 @@ class FakeText:
         self._state = 'normal'
     def configure(self, **k):
         self._state = k.get('state', self._state)
-    def insert(self, where, text):
-        # assume text ends in \n
-        for ln in text.splitlines():
-            self.lines.append(ln)
+    def insert(self, where, *segments):
+        # chars, tags, chars, tags, ...; assume text ends in \n
+        self.inserts = getattr(self, 'inserts', 0) + 1
+        for text in segments[0::2]:
+            for ln in text.splitlines():
+                self.lines.append(ln)
     def tag_names(self):
         return list(self.tags)
     def tag_configure(self, tag, **k):
@@ -48,6 +50,7 @@ class MessagesControlTests(unittest.TestCase):
 
         main.log_message('Hello world')
         main.log_message('Another')
+        main.flush_messages()
 
         # verify content present
         self.assertIn('Hello world', fake.get('1.0', 'end'))
@@ -80,6 +83,7 @@ class MessagesControlTests(unittest.TestCase):
 
         for i in range(6):
             main.log_message(f"Line {i}")
+        main.flush_messages()
 
         content = fake.get('1.0', 'end')
         lines = content.split('\n') if content else []
@@ -88,6 +92,21 @@ class MessagesControlTests(unittest.TestCase):
         self.assertLessEqual(len(lines), 3)
         self.assertIn('Line 5', lines)
 
+    def test_burst_is_written_in_one_insert(self):
+        fake = FakeText()
+        main.messages_box = fake
+        main.max_messages_lines = 500
+        main.clear_messages()
+
+        for i in range(40):
+            main.log_message(f"Burst {i}", rarity='rare' if i % 10 == 0 else None)
+        self.assertEqual(fake.lines, [])
+        main.flush_messages()
+
+        self.assertEqual(fake.inserts, 1)
+        self.assertEqual(len(fake.lines), 40)
+        self.assertIn('rarity_rare', fake.tags)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import json
+import os
+import tempfile
+import combatlog
+from items import health_potion, iron_sword
+from enemy import Enemy
+from factories import make_saved_player
+from functions import save_game, load_game
+from persistence import JsonFileBackend, SQLiteBackend, fight_record, get_backend, set_backend
+from player import new_player_state
+
+
+class SQLiteBackendTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.db = SQLiteBackend(os.path.join(self.dir.name, 'game.db'), batch_size=10)
+
+    def tearDown(self):
+        self.db.close()
+        self.dir.cleanup()
+
+    def test_wal_mode(self):
+        self.assertEqual(self.db.conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+    def test_save_load_and_top_players(self):
+        for i, (name, level) in enumerate((('Ann', 3), ('Bo', 9), ('Cy', 5))):
+            self.assertTrue(self.db.save_player(f'slot{i}', make_saved_player(name, level)))
+        self.db.save_player('slot0', make_saved_player('Ann', 12))
+        self.assertEqual([r[1] for r in self.db.top_players(2)], ['Ann', 'Bo'])
+
+        q = new_player_state()
+        self.assertTrue(self.db.load_player('slot1', q))
+        self.assertEqual((q['name'], q['level'], q['inventory']), ('Bo', 9, [health_potion]))
+        self.assertFalse(self.db.load_player('missing', q))
+
+    def test_background_saves_and_fight_batches_commit_on_the_writer_thread(self):
+        count = 'SELECT COUNT(*) FROM {}'
+        # holding the connection lock blocks the writer thread, not the caller
+        with self.db._lock:
+            self.assertTrue(self.db.save_player('bg', make_saved_player('Ann', 2), background=True))
+            p = make_saved_player('Ann', 2)
+            for _ in range(10):
+                self.db.record_fight(fight_record(p, Enemy('Rat', 0, 1, 0, 'tier1'), True))
+            self.assertEqual(self.db.conn.execute(count.format('players')).fetchone()[0], 0)
+            self.assertEqual(self.db.conn.execute(count.format('fights')).fetchone()[0], 0)
+        self.db.flush()
+        self.assertEqual(self.db.conn.execute(count.format('players')).fetchone()[0], 1)
+        self.assertEqual(self.db.conn.execute(count.format('fights')).fetchone()[0], 10)
+        self.assertEqual(self.db.writer.stats['written'], 2)
+
+    def test_fight_queries(self):
+        p = make_saved_player('Ann', 4)
+        goblin, orc = Enemy('Goblin', 0, 5, 2, 'tier1'), Enemy('Orc', 0, 15, 5, 'tier2')
+        rows = [fight_record(p, goblin, True), fight_record(p, goblin, 'fled'), fight_record(p, orc, False)]
+        self.db.record_fights(rows)
+        # buffered rows are flushed before queries
+        self.db.record_fight(fight_record(p, orc, True))
+        self.assertEqual(self.db.fights_per_tier(), {'tier1': {'win': 1, 'defeat': 0, 'fled': 1},
+                                                     'tier2': {'win': 1, 'defeat': 1, 'fled': 0}})
+        defeats = self.db.recent_defeats()
+        self.assertEqual([(d['enemy'], d['level']) for d in defeats], [('Orc', 4)])
+
+    def test_fights_also_go_to_the_combat_log_with_loot(self):
+        p = make_saved_player('Ann', 4)
+        orc = Enemy('Orc', 0, 15, 5, 'tier2', loot=[iron_sword])
+        self.db.record_fight(fight_record(p, orc, True))
+        self.db.flush()
+        log = list(combatlog.iter_records(os.path.join(self.dir.name, combatlog.LOG_FILENAME)))
+        self.assertEqual([(r['enemy'], r['loot']) for r in log], [('Orc', [{'name': 'Iron Sword', 'rarity': 'uncommon'}])])
+        loot = self.db.conn.execute('SELECT loot FROM fights').fetchone()[0]
+        self.assertEqual(json.loads(loot), log[0]['loot'])
+
+
+class BackendSelectionTests(unittest.TestCase):
+    def test_save_game_without_path_uses_backend(self):
+        with tempfile.TemporaryDirectory() as d:
+            db = SQLiteBackend(os.path.join(d, 'game.db'))
+            previous = set_backend(db)
+            try:
+                self.assertIs(get_backend(), db)
+                self.assertTrue(save_game(p=make_saved_player('Dee', 6)))
+                q = new_player_state()
+                self.assertTrue(load_game(p=q))
+                self.assertEqual(q['level'], 6)
+            finally:
+                set_backend(previous)
+                db.close()
+
+    def test_json_backend_slots_and_log(self):
+        with tempfile.TemporaryDirectory() as d:
+            backend = JsonFileBackend(d)
+            self.assertTrue(backend.save_player('alt', make_saved_player('Eve', 2)))
+            self.assertTrue(os.path.exists(os.path.join(d, 'savegame-alt.json')))
+            backend.record_fight(fight_record(make_saved_player('Eve', 2), Enemy('Rat', 0, 1, 0, 'tier1'), True, 'Victory vs Rat'))
+            backend.flush()
+            log = list(combatlog.iter_records(os.path.join(d, combatlog.LOG_FILENAME)))
+            self.assertEqual([(r['enemy'], r['summary']) for r in log], [('Rat', 'Victory vs Rat')])
+
+    def test_json_backend_queries(self):
+        with tempfile.TemporaryDirectory() as d:
+            backend = JsonFileBackend(d)
+            backend.save_player(p=make_saved_player('Ann', 3))
+            backend.save_player('alt', make_saved_player('Bo', 9))
+            self.assertEqual([r[:3] for r in backend.top_players()], [('alt', 'Bo', 9), ('default', 'Ann', 3)])
+            p = make_saved_player('Ann', 4)
+            goblin, orc = Enemy('Goblin', 0, 5, 2, 'tier1'), Enemy('Orc', 0, 15, 5, 'tier2')
+            for enemy, outcome in ((goblin, True), (goblin, 'fled'), (orc, False), (orc, True)):
+                backend.record_fight(fight_record(p, enemy, outcome))
+            self.assertEqual(backend.fights_per_tier(), {'tier1': {'win': 1, 'defeat': 0, 'fled': 1},
+                                                         'tier2': {'win': 1, 'defeat': 1, 'fled': 0}})
+            self.assertEqual([(r['enemy'], r['level']) for r in backend.recent_defeats()], [('Orc', 4)])
+
+
+if __name__ == '__main__':
+    unittest.main()
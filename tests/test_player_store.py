@@ -0,0 +1,99 @@
+import unittest
+import gc
+import pickle
+import weakref
+import player_store
+from items import health_potion, iron_sword, plate_armor
+from player import new_player_state
+from player_helpers import add_gold, add_loot, equip_item, sell_item
+from player_store import PlayerStore, batch
+from unittest.mock import patch
+
+
+class PlayerStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.p = new_player_state()
+        self.batches = []
+        player_store.subscribe(self._record, self.p)
+        self.addCleanup(player_store.unsubscribe, self._record, self.p)
+        patcher = patch('functions.TextFuncs.var_speed_print')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _record(self, p, events):
+        self.batches.append([ev.path for ev in events])
+
+    def test_direct_writes_emit_events(self):
+        self.assertIsInstance(self.p, PlayerStore)
+        self.p['health'] -= 5
+        self.p['health'] -= 0
+        self.p['inventory'].append(health_potion)
+        self.p['inventory'].remove(health_potion)
+        self.p['equipment']['weapon'] = iron_sword
+        self.assertEqual(self.batches, [['health'], ['inventory[+Health Potion]'],
+                                        ['inventory[-Health Potion]'], ['equipment.weapon']])
+
+    def test_one_batch_per_action_with_coalescing(self):
+        self.p['inventory'] = [iron_sword]
+        self.batches.clear()
+        equip_item(iron_sword, self.p)
+        self.assertEqual(self.batches, [['inventory[-Iron Sword]', 'equipment.weapon', 'attack_power_bonus']])
+
+        self.batches.clear()
+        with batch():
+            add_gold(5, self.p)
+            add_gold(7, self.p)
+            add_loot([plate_armor], self.p)
+            sell_item(plate_armor, p=self.p)
+        self.assertEqual(len(self.batches), 1)
+        paths = self.batches[0]
+        self.assertEqual(paths.count('gold'), 1)
+        self.assertIn('inventory[+Plate Armor]', paths)
+
+    def test_changes_that_cancel_out_are_dropped(self):
+        gold = self.p['gold']
+        with batch():
+            self.p['gold'] = gold + 10
+            self.p['gold'] = gold
+        self.assertEqual(self.batches, [])
+
+    def test_other_stores_and_pickling(self):
+        other = new_player_state()
+        other['gold'] = 99
+        self.assertEqual(self.batches, [])
+        self.p['inventory'] = [health_potion]
+        clone = pickle.loads(pickle.dumps(self.p))
+        self.assertEqual((clone['gold'], [it.name for it in clone['inventory']]), (self.p['gold'], ['Health Potion']))
+        self.assertIs(clone['inventory']._owner, clone)
+
+    def test_subscribers_are_kept_per_store(self):
+        other = new_player_state()
+        seen = []
+        player_store.subscribe(lambda store, events: seen.append(store), other)
+        everyone = player_store.subscribe(lambda store, events: seen.append('any'))
+        self.addCleanup(player_store.unsubscribe, everyone)
+        add_gold(1, self.p)
+        self.assertEqual((len(self.batches), seen), (1, ['any']))
+        add_gold(1, other)
+        self.assertEqual(seen, ['any', 'any', other])
+        # copies start without the original's subscribers
+        clone = pickle.loads(pickle.dumps(other))
+        seen.clear()
+        add_gold(1, clone)
+        self.assertEqual(seen, ['any'])
+        player_store.unsubscribe(everyone)
+        player_store.unsubscribe(self._record, self.p)
+        seen.clear()
+        add_gold(1, self.p)
+        self.assertEqual((len(self.batches), seen), (1, []))
+
+    def test_a_subscribed_store_is_collectable(self):
+        p = new_player_state()
+        player_store.subscribe(lambda store, events: None, p)
+        ref = weakref.ref(p)
+        del p
+        gc.collect()
+        self.assertIsNone(ref())
+
+if __name__ == '__main__':
+    unittest.main()
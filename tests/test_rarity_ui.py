@@ -1,16 +1,23 @@
 import unittest
 import os
+import tempfile
 import enemy
 import player
 from combat import Combat
+from combatlog import LOG_FILENAME, INDEX_SUFFIX
+from persistence import get_backend
 from items import plate_armor
 
 
 class RarityUITests(unittest.TestCase):
     def setUp(self):
+        replays = tempfile.TemporaryDirectory()
+        self.addCleanup(replays.cleanup)
+        self.replay_path = os.path.join(replays.name, 'replays.bin')
         try:
             from functions import get_data_dir
-            os.remove(os.path.join(get_data_dir(), 'combat_log.txt'))
+            os.remove(os.path.join(get_data_dir(), LOG_FILENAME))
+            os.remove(os.path.join(get_data_dir(), LOG_FILENAME + INDEX_SUFFIX))
         except FileNotFoundError:
             pass
 
@@ -18,17 +25,19 @@ class RarityUITests(unittest.TestCase):
         e = enemy.generate_enemy('tier1')
         # give a guaranteed epic item
         e.loot = [plate_armor]
-        c = Combat(player.player, e)
+        c = Combat(player.player, e, replay_path=self.replay_path)
         c._end_combat(True)
+        get_backend().flush()
         from functions import get_data_dir
-        with open(os.path.join(get_data_dir(), 'combat_log.txt'), 'r', encoding='utf-8') as fh:
+        with open(os.path.join(get_data_dir(), LOG_FILENAME), 'r', encoding='utf-8') as fh:
             content = fh.read()
         self.assertIn('(epic)', content)
 
     def tearDown(self):
         try:
             from functions import get_data_dir
-            os.remove(os.path.join(get_data_dir(), 'combat_log.txt'))
+            os.remove(os.path.join(get_data_dir(), LOG_FILENAME))
+            os.remove(os.path.join(get_data_dir(), LOG_FILENAME + INDEX_SUFFIX))
         except FileNotFoundError:
             pass
 
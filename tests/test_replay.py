@@ -0,0 +1,93 @@
+import unittest
+import os
+import tempfile
+import enemy
+from combat import CombatEngine, Combat
+from factories import make_player
+from items import health_potion
+from plugins.registry import PluginRegistry
+from replay import FightRecord, snapshot_player, snapshot_enemy, replay_fight, append_record, iter_records, verify_file
+from rng import GameRNG
+from simulate import ThresholdPolicy
+
+
+def record_fight(seed):
+    rng = GameRNG(seed)
+    e = enemy.generate_enemy('tier2', PluginRegistry(), rng)
+    p = make_player(inventory=[health_potion])
+    start = (snapshot_player(p), snapshot_enemy(e))
+    engine = CombatEngine(p, e, rng)
+    engine.run(ThresholdPolicy(flee_below=0.1))
+    return FightRecord.from_engine(engine, seed, *start)
+
+
+class ReplayTests(unittest.TestCase):
+    def test_encode_decode_roundtrip(self):
+        rec = record_fight(3)
+        back = FightRecord.decode(rec.encode()[4:])
+        self.assertEqual(back.seed, rec.seed)
+        self.assertEqual(back.actions, rec.actions)
+        self.assertEqual(back.events, rec.events)
+        self.assertEqual(back.outcome, rec.outcome)
+        self.assertEqual(back.player, rec.player)
+
+    def test_replay_is_identical(self):
+        for seed in range(20):
+            ok, engine, idx = replay_fight(record_fight(seed))
+            self.assertTrue(ok, (seed, idx))
+
+    def test_tampered_record_is_detected(self):
+        rec = record_fight(1)
+        rec.enemy['health'] = 1
+        ok, _, idx = replay_fight(rec)
+        self.assertFalse(ok)
+        self.assertIsNotNone(idx)
+
+    def test_file_append_and_verify(self):
+        fd, path = tempfile.mkstemp(suffix='.bin')
+        os.close(fd)
+        try:
+            for seed in range(5):
+                append_record(record_fight(seed), path)
+            self.assertEqual(len(list(iter_records(path))), 5)
+            total, bad = verify_file(path)
+            self.assertEqual((total, bad), (5, []))
+        finally:
+            os.remove(path)
+
+    def test_file_is_rotated_when_full(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'replays.bin')
+            records = [record_fight(seed) for seed in range(8)]
+            cap = max(len(r.encode()) for r in records) * 2
+            for rec in records:
+                append_record(rec, path, max_bytes=cap, backups=1)
+            self.assertFalse(os.path.exists(path + '.2'))
+            self.assertTrue(all(os.path.getsize(f) <= cap for f in (path, path + '.1')))
+            kept = [r.seed for f in (path + '.1', path) for r in iter_records(f)]
+            # the oldest fights were dropped; the rest are in order
+            self.assertEqual(kept, list(range(8 - len(kept), 8)))
+            self.assertLess(len(kept), 8)
+
+    def test_unknown_actions_are_recorded_and_replayed(self):
+        p, e = make_player(), enemy.Enemy('Dummy', 50, 5, 2, 'tier1')
+        start = (snapshot_player(p), snapshot_enemy(e))
+        engine = CombatEngine(p, e, GameRNG(4))
+        engine.player_action('dance')
+        engine.enemy_turn()
+        rec = FightRecord.decode(FightRecord.from_engine(engine, 4, *start).encode()[4:])
+        self.assertEqual(rec.actions, ['unknown'])
+        self.assertTrue(replay_fight(rec)[0])
+
+    def test_gui_combat_records_replayable_fight(self):
+        e = enemy.generate_enemy('tier1', PluginRegistry())
+        c = Combat(make_player(inventory=[health_potion]), e)
+        while not c.engine.ended:
+            c.engine.step()
+        rec = FightRecord.from_engine(c.engine, c.seed, *c._replay_start)
+        ok, _, _ = replay_fight(FightRecord.decode(rec.encode()[4:]))
+        self.assertTrue(ok)
+
+
+if __name__ == '__main__':
+    unittest.main()
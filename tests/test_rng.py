@@ -0,0 +1,52 @@
+import unittest
+from unittest.mock import patch
+import enemy
+from combat import CombatEngine
+from factories import make_player
+from plugins.registry import PluginRegistry
+from player_helpers import get_attack_power
+from rng import GameRNG, NumpyStream, stream
+
+
+def fight(seed):
+    rng = GameRNG(seed)
+    e = enemy.generate_enemy('tier1', PluginRegistry(), rng)
+    engine = CombatEngine(make_player(), e, rng)
+    engine.run()
+    return [(ev['kind'], ev['actor'], ev.get('amount')) for ev in engine.events]
+
+
+class RNGTests(unittest.TestCase):
+    def test_same_seed_replays_identically(self):
+        self.assertEqual(fight(42), fight(42))
+        self.assertNotEqual(fight(42), fight(43))
+
+    def test_subsystem_streams_are_independent(self):
+        a = GameRNG(5)
+        b = GameRNG(5)
+        for _ in range(100):
+            a.combat.random()
+        self.assertEqual(a.enemy.random(), b.enemy.random())
+
+    def test_default_context_uses_global_random(self):
+        self.assertIs(stream(None, 'combat').randint, __import__('random').randint)
+        with patch('random.randint', return_value=0):
+            self.assertEqual(get_attack_power({'strength': 10, 'attack_power_bonus': 0}), 5)
+
+    def test_spawn_is_deterministic(self):
+        self.assertEqual(GameRNG(1).spawn(3).combat.random(), GameRNG(1).spawn(3).combat.random())
+        self.assertNotEqual(GameRNG(1).spawn(3).combat.random(), GameRNG(1).spawn(4).combat.random())
+
+    def test_numpy_generator_context(self):
+        try:
+            import numpy as np
+        except Exception:
+            self.skipTest('NumPy not installed')
+        s = NumpyStream(np.random.default_rng(0))
+        self.assertTrue(all(-1 <= s.randint(-1, 1) <= 1 for _ in range(50)))
+        e = enemy.generate_enemy('tier1', PluginRegistry(), GameRNG.from_numpy(np.random.default_rng(0)))
+        self.assertTrue(e.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
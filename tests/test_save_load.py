@@ -34,7 +34,7 @@ class SaveLoadTests(unittest.TestCase):
             # check fields restored
             self.assertEqual(self.p['level'], 3)
             self.assertIn(health_potion, self.p['inventory'])
-            self.assertEqual(self.p['equipment']['weapon'], iron_sword)
+            self.assertIs(self.p['equipment']['weapon'].defn, iron_sword)
             self.assertEqual(self.p['gold'], 42)
         finally:
             os.remove(path)
@@ -0,0 +1,62 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest.mock import patch
+from functions import SaveWriter, save_game, load_game, flush_saves, write_atomic
+
+
+class SaveWriterTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'savegame.json')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_failed_write_keeps_previous_file(self):
+        write_atomic(self.path, b'old')
+        with patch('os.replace', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                write_atomic(self.path, b'new')
+        with open(self.path, 'rb') as fh:
+            self.assertEqual(fh.read(), b'old')
+        self.assertEqual(os.listdir(self.dir.name), ['savegame.json'])
+
+    def test_background_saves_are_coalesced(self):
+        w = SaveWriter()
+        # hold the write lock so every submit queues up behind the first write
+        with w._write_lock:
+            for i in range(10):
+                w.submit(self.path, str(i).encode())
+        self.assertTrue(w.flush(5))
+        with open(self.path, 'rb') as fh:
+            self.assertEqual(fh.read(), b'9')
+        self.assertEqual(w.stats['requested'], 10)
+        self.assertLess(w.stats['written'], 10)
+        self.assertGreater(w.stats['coalesced'], 0)
+        self.assertGreaterEqual(w.stats['max_queue_depth'], 1)
+        self.assertGreater(w.stats['max_latency_ms'], 0.0)
+
+    def test_older_snapshot_never_overwrites_newer(self):
+        w = SaveWriter()
+        old, new = w.next_seq(), w.next_seq()
+        self.assertTrue(w.write(self.path, b'new', new))
+        self.assertTrue(w.write(self.path, b'old', old))
+        with open(self.path, 'rb') as fh:
+            self.assertEqual(fh.read(), b'new')
+
+    def test_background_save_game_roundtrip(self):
+        p = {'name': 'Bg', 'level': 4, 'gold': 7, 'inventory': [],
+             'equipment': {'weapon': None, 'armor': None, 'accessory': None}}
+        self.assertTrue(save_game(self.path, p, background=True))
+        self.assertTrue(flush_saves(5))
+        with open(self.path, encoding='utf-8') as fh:
+            self.assertEqual(json.load(fh)['player']['level'], 4)
+        q = {'inventory': [], 'equipment': {}}
+        self.assertTrue(load_game(self.path, q))
+        self.assertEqual((q['name'], q['gold']), ('Bg', 7))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import os
+import tempfile
+import threading
+from factories import make_saved_player
+from items import health_potion, iron_sword
+from player import new_player_state
+from savestore import SaveStore
+
+
+class SaveStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.store = SaveStore(self.dir.name)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_save_list_and_load_slots(self):
+        self.assertTrue(self.store.save('alice', make_saved_player('Alice', 3)))
+        self.assertTrue(self.store.save('bob', make_saved_player('Bob', 7)))
+        rows = self.store.list_slots()
+        self.assertEqual([r['slot'] for r in rows], ['bob', 'alice'])
+        self.assertEqual((rows[0]['name'], rows[0]['level']), ('Bob', 7))
+
+        q = new_player_state()
+        self.assertTrue(self.store.load('alice', q))
+        self.assertEqual((q['name'], q['level']), ('Alice', 3))
+        self.assertEqual(q['inventory'], [health_potion])
+        self.assertIs(q['equipment']['weapon'].defn, iron_sword)
+        self.assertFalse(self.store.load('nobody', q))
+
+    def test_overwrite_delete_and_compact(self):
+        for gold in range(5):
+            self.store.save('alice', make_saved_player('Alice', 1, gold))
+        self.store.save('bob', make_saved_player('Bob', 2))
+        self.assertTrue(self.store.delete('bob'))
+        self.assertNotIn('bob', self.store)
+        before = sum(os.path.getsize(os.path.join(self.dir.name, f)) for f in os.listdir(self.dir.name) if f.endswith('.dat'))
+        self.store.compact()
+        self.assertEqual(self.store.read('alice')['player']['gold'], 4)
+        live = self.store.list_slots()[0]['size']
+        data_files = sorted(f for f in os.listdir(self.dir.name) if f.endswith('.dat'))
+        self.assertEqual(os.path.getsize(os.path.join(self.dir.name, data_files[-1])), live)
+        self.assertLess(live, before)
+
+    def test_export_import(self):
+        self.store.save('alice', make_saved_player('Alice', 3))
+        self.store.save('bob', make_saved_player('Bob', 7))
+        path = os.path.join(self.dir.name, 'export.json')
+        self.assertEqual(self.store.export_to(path), 2)
+        with tempfile.TemporaryDirectory() as other:
+            dst = SaveStore(other)
+            self.assertEqual(dst.import_from(path), 2)
+            self.assertEqual(dst.read('bob')['player']['level'], 7)
+            self.assertEqual(dst.import_from(path, overwrite=False), 0)
+
+    def test_readers_see_complete_saves_during_writes(self):
+        self.store.save('alice', make_saved_player('Alice', 1))
+        errors = []
+        stop = threading.Event()
+
+        def reader():
+            other = SaveStore(self.dir.name)
+            while not stop.is_set():
+                try:
+                    self.assertEqual(other.read('alice')['player']['name'], 'Alice')
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        threads = [threading.Thread(target=reader) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for i in range(100):
+            self.store.save('alice', make_saved_player('Alice', i % 50 + 1))
+            if i % 25 == 0:
+                self.store.compact()
+        stop.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
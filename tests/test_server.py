@@ -0,0 +1,118 @@
+import unittest
+import asyncio
+import json
+import tempfile
+from unittest.mock import patch
+from savestore import SaveStore
+from server import GameServer
+from loadgen import run_load
+
+
+async def send(reader, writer, msg):
+    writer.write(json.dumps(msg).encode('utf-8') + b'\n')
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+class ServerTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._quiet = patch('functions.TextFuncs._gui_logger', new=lambda text, rarity=None: None)
+        self._quiet.start()
+        self.server = GameServer(enemy_turn_delay=0, seed=1)
+        await self.server.start('127.0.0.1', 0)
+
+    async def asyncTearDown(self):
+        self.server._server.close()
+        await self.server._server.wait_closed()
+        self._quiet.stop()
+
+    async def test_fight_until_outcome(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.server.port)
+        reply = await send(reader, writer, {'cmd': 'start_combat'})
+        self.assertTrue(reply['ok'])
+        self.assertIn('enemy', reply)
+        for _ in range(200):
+            reply = await send(reader, writer, {'cmd': 'attack'})
+            self.assertTrue(reply['ok'])
+            if 'outcome' in reply:
+                break
+        self.assertIn(reply['outcome'], (True, False))
+        state = await send(reader, writer, {'cmd': 'state', 'id': 9})
+        self.assertEqual(state['id'], 9)
+        self.assertFalse(state['in_combat'])
+        writer.close()
+
+    async def test_errors_are_reported(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.server.port)
+        self.assertFalse((await send(reader, writer, {'cmd': 'attack'}))['ok'])
+        self.assertFalse((await send(reader, writer, {'cmd': 'nope'}))['ok'])
+        writer.write(b'not json\n')
+        await writer.drain()
+        self.assertIn('bad request', json.loads(await reader.readline())['error'])
+        writer.close()
+
+    async def test_enemy_delay_does_not_block_other_sessions(self):
+        self.server.enemy_turn_delay = 0.3
+        r1, w1 = await asyncio.open_connection('127.0.0.1', self.server.port)
+        r2, w2 = await asyncio.open_connection('127.0.0.1', self.server.port)
+        await send(r1, w1, {'cmd': 'start_combat'})
+        slow = asyncio.create_task(send(r1, w1, {'cmd': 'defend'}))
+        await asyncio.sleep(0.05)
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        await send(r2, w2, {'cmd': 'state'})
+        self.assertLess(loop.time() - t0, 0.2)
+        self.assertTrue((await slow)['ok'])
+        w1.close()
+        w2.close()
+
+    async def test_sessions_closed_with_connection(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.server.port)
+        reply = await send(reader, writer, {'cmd': 'new_session'})
+        self.assertIn(reply['session'], self.server.sessions)
+        writer.close()
+        await writer.wait_closed()
+        for _ in range(50):
+            if reply['session'] not in self.server.sessions:
+                break
+            await asyncio.sleep(0.01)
+        self.assertNotIn(reply['session'], self.server.sessions)
+
+    async def test_loadgen_reports_latency(self):
+        result = await run_load('127.0.0.1', self.server.port, connections=2, sessions=10, duration=0.3)
+        self.assertGreater(result['requests'], 0)
+        self.assertGreaterEqual(result['p99_ms'], result['p50_ms'])
+
+    async def test_save_and_load_slots(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.server.port)
+        self.assertFalse((await send(reader, writer, {'cmd': 'save'}))['ok'])
+        with tempfile.TemporaryDirectory() as d:
+            self.server.store = SaveStore(d)
+            self.assertTrue((await send(reader, writer, {'cmd': 'save', 'slot': 'alice'}))['ok'])
+            self.assertEqual([r['slot'] for r in (await send(reader, writer, {'cmd': 'list_saves'}))['saves']], ['alice'])
+            reply = await send(reader, writer, {'cmd': 'load', 'slot': 'alice'})
+            self.assertTrue(reply['ok'])
+            self.assertFalse((await send(reader, writer, {'cmd': 'load', 'slot': 'bob'}))['ok'])
+        writer.close()
+
+    async def test_other_connections_sessions_and_slots_are_refused(self):
+        r1, w1 = await asyncio.open_connection('127.0.0.1', self.server.port)
+        r2, w2 = await asyncio.open_connection('127.0.0.1', self.server.port)
+        own = (await send(r1, w1, {'cmd': 'new_session'}))['session']
+        self.assertTrue((await send(r1, w1, {'cmd': 'state', 'session': own}))['ok'])
+        reply = await send(r2, w2, {'cmd': 'rest', 'session': own})
+        self.assertFalse(reply['ok'])
+        self.assertIn('unknown session', reply['error'])
+        with tempfile.TemporaryDirectory() as d:
+            self.server.store = SaveStore(d)
+            self.assertTrue((await send(r1, w1, {'cmd': 'save', 'slot': 'alice'}))['ok'])
+            self.assertFalse((await send(r2, w2, {'cmd': 'save', 'slot': 'alice'}))['ok'])
+            self.assertFalse((await send(r2, w2, {'cmd': 'load', 'slot': 'alice'}))['ok'])
+            self.assertFalse((await send(r2, w2, {'cmd': 'save', 'slot': f'session-{own}'}))['ok'])
+            self.assertEqual((await send(r2, w2, {'cmd': 'list_saves'}))['saves'], [])
+        w1.close()
+        w2.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
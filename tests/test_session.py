@@ -0,0 +1,71 @@
+import unittest
+import gc
+import os
+import tempfile
+import weakref
+import player
+from items import health_potion, iron_sword
+from session import GameSession, DEFAULT_SESSION
+from player_helpers import add_gold, equip_item, use_health_potion
+from server import GameServer
+
+
+class SessionTests(unittest.TestCase):
+    def test_sessions_do_not_share_state(self):
+        a = GameSession()
+        b = GameSession()
+        a.add_gold(25)
+        a.player['inventory'].append(iron_sword)
+        self.assertEqual(b.player['gold'], a.player['gold'] - 25)
+        self.assertEqual(b.player['inventory'], [])
+        self.assertNotEqual(a.id, b.id)
+
+    def test_helpers_accept_session_or_dict(self):
+        s = GameSession()
+        s.player['inventory'] = [iron_sword]
+        global_gold = player.player['gold']
+        self.assertEqual(equip_item(iron_sword, s), 'weapon')
+        self.assertEqual(s.player['equipment']['weapon'], iron_sword)
+        add_gold(5, s.player)
+        self.assertEqual(s.player['gold'], 5 + player.PlayerSettings.STARTING_GOLD)
+        self.assertEqual(player.player['gold'], global_gold)
+
+    def test_potion_only_affects_own_session(self):
+        s = GameSession()
+        s.player['health'] = 10
+        s.player['inventory'] = [health_potion]
+        self.assertTrue(use_health_potion(s))
+        self.assertEqual(s.player['health'], 50)
+
+    def test_default_session_wraps_global_player(self):
+        self.assertIs(DEFAULT_SESSION.player, player.player)
+
+    def test_session_save_and_load(self):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            s = GameSession()
+            s.player['level'] = 7
+            self.assertTrue(s.save(path))
+            other = GameSession()
+            self.assertTrue(other.load(path))
+            self.assertEqual(other.player['level'], 7)
+        finally:
+            os.remove(path)
+
+    def test_closed_session_store_is_collectable(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            server = GameServer(enemy_turn_delay=0, seed=1)
+            s = server.new_session()
+            s.enable_journal(os.path.join(tmp, 'save.journal'))
+            s.add_gold(5)
+            store = weakref.ref(s.player)
+            server.close_session(s)
+            self.assertIsNone(s.journal)
+            del s
+            gc.collect()
+            self.assertIsNone(store())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from simulate import simulate_fights, ThresholdPolicy
+from factories import make_template
+
+
+class SimulateTests(unittest.TestCase):
+    def test_aggregates_are_consistent(self):
+        res = simulate_fights(make_template(), 'tier1', 50, seed=1)
+        self.assertEqual(res['fights'], 50)
+        self.assertEqual(res['wins'] + res['defeats'] + res['fled'] + res['undecided'], 50)
+        self.assertEqual(sum(res['turns_to_kill'].values()), res['wins'])
+        self.assertEqual(sum(res['potions_used'].values()), 50)
+
+    def test_same_seed_is_reproducible(self):
+        a = simulate_fights(make_template(), 'tier1', 30, seed=7)
+        b = simulate_fights(make_template(), 'tier1', 30, seed=7)
+        self.assertEqual(a, b)
+
+    def test_template_is_not_mutated(self):
+        template = make_template()
+        simulate_fights(template, 'tier2', 20, seed=3)
+        self.assertEqual(template['health'], 100)
+        self.assertEqual(len(template['inventory']), 2)
+
+    def test_flee_policy_records_attempts(self):
+        res = simulate_fights(make_template(), 'tier1', 20, seed=5, policy=ThresholdPolicy(flee_below=1.1))
+        self.assertEqual(res['wins'], 0)
+        self.assertEqual(res['flee_successes'], res['fled'])
+        self.assertGreaterEqual(res['flee_attempts'], res['fled'])
+
+    def test_result_independent_of_worker_count(self):
+        serial = simulate_fights(make_template(), 'tier1', 60, seed=11)
+        parallel = simulate_fights(make_template(), 'tier1', 60, seed=11, workers=2)
+        self.assertEqual(serial, parallel)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import patch
+import vector_combat
+from vector_combat import np
+from combat import CombatEngine
+from enemy import Enemy
+from factories import make_template
+from items import health_potion
+from simulate import ThresholdPolicy, simulate_fights
+
+
+class ConstantRolls:
+    """Stand-in for a NumPy Generator that always rolls the midpoint / a fixed float."""
+    def __init__(self, value):
+        self.value = value
+    def integers(self, low, high, size):
+        return np.zeros(size, dtype=np.int64)
+    def random(self, size):
+        return np.full(size, self.value)
+
+
+@unittest.skipIf(np is None, 'NumPy not installed')
+class VectorCombatTests(unittest.TestCase):
+    def _scalar(self, template, enemy, roll):
+        p = dict(template, inventory=list(template['inventory']))
+        with patch('random.randint', return_value=0), patch('random.random', return_value=roll):
+            engine = CombatEngine(p, enemy)
+            engine.run(ThresholdPolicy())
+        return engine, p
+
+    def test_matches_scalar_engine_with_fixed_rolls(self):
+        template = make_template(inventory=[health_potion])
+        for roll in (0.1, 0.5, 0.99):
+            specs = [(50, 5, 2, 0), (60, 9, 1, 1), (150, 15, 5, 1), (20, 30, 0, 0)]
+            enemies = [Enemy('E', hp, atk, arm, 'tier1', [health_potion] * pots) for hp, atk, arm, pots in specs]
+            arrays = vector_combat.enemy_arrays(enemies)
+            result = vector_combat.resolve_cohort(template, arrays, ConstantRolls(roll))
+            expected = {True: vector_combat.WIN, False: vector_combat.DEFEAT}
+            for i, (hp, atk, arm, pots) in enumerate(specs):
+                engine, p = self._scalar(template, Enemy('E', hp, atk, arm, 'tier1', [health_potion] * pots), roll)
+                self.assertEqual(result['outcome'][i], expected[engine.outcome], (roll, specs[i]))
+                self.assertEqual(result['turns'][i], engine.turns)
+                self.assertEqual(result['player_health'][i], p['health'])
+                self.assertEqual(result['enemy_health'][i], engine.enemy.health)
+
+    def test_win_rate_close_to_scalar_simulator(self):
+        template = make_template()
+        vec = vector_combat.simulate_fights_vectorized(template, 'tier1', 20000, seed=1)
+        scalar = simulate_fights(template, 'tier1', 2000, seed=1)
+        self.assertEqual(vec['fights'], 20000)
+        self.assertAlmostEqual(vec['win_rate'], scalar['win_rate'], delta=0.05)
+
+    def test_flee_lanes_stop(self):
+        arrays = vector_combat.enemy_arrays([Enemy('E', 500, 1, 0, 'tier1') for _ in range(10)])
+        result = vector_combat.resolve_cohort(make_template(inventory=[health_potion]), arrays, np.random.default_rng(0), flee_below=1.1)
+        self.assertTrue((result['outcome'] == vector_combat.FLED).all())
+        self.assertTrue((result['flee_attempts'] >= 1).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+"""NumPy-vectorized resolution of many independent player-vs-enemy duels.
+
+Each duel is one lane in a set of arrays (HP, attack, armor, potions, defending
+flags). Every step advances all still-running lanes by one full round using
+masked updates that mirror `CombatEngine` and `Enemy.decide_action`:
+
+- the player follows the same rules as `simulate.ThresholdPolicy` (flee below
+  `flee_below`, drink a potion below `potion_below`, otherwise attack);
+- the enemy uses the `AI_*` thresholds from `enemy.py`.
+
+Random draws come from a NumPy `Generator`, so individual fights do not match the
+scalar engine roll-for-roll, but the rules do. With constant rolls both paths
+produce identical fights (see tests/test_vector_combat.py).
+
+NumPy is optional; `np` is None when it is not installed.
+"""
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from enemy import (
+    AI_LOW_HP_PCT, AI_MID_HP_PCT, AI_LOW_HEAL_CHANCE, AI_LOW_DEFEND_CHANCE, AI_MID_DEFEND_CHANCE,
+    POTION_CARRY_CHANCE, EnemyBatch, get_catalog, invalidate_catalogs,
+)
+from inventory import count_named
+from items import health_potion
+
+# Outcome codes stored in the `outcome` array
+UNDECIDED = 0
+WIN = 1
+DEFEAT = 2
+FLED = 3
+
+POTION_HEAL = health_potion.effect.get('health', 0)
+
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy is required for vectorized combat")
+
+
+def enemy_arrays(enemies):
+    """Convert a list of `Enemy` objects (or an `EnemyBatch`) into the cohort array layout."""
+    _require_numpy()
+    if isinstance(enemies, EnemyBatch):
+        return enemies.to_arrays()
+    return {
+        'health': np.array([e.health for e in enemies], dtype=np.int64),
+        'max_health': np.array([e.max_health for e in enemies], dtype=np.int64),
+        'attack_power': np.array([e.attack_power for e in enemies], dtype=np.int64),
+        'armor': np.array([e.armor for e in enemies], dtype=np.int64),
+        'potions': np.array([count_named(e.inventory, 'Health Potion') for e in enemies], dtype=np.int64),
+    }
+
+
+def generate_enemy_arrays(tier, n, rng, registry=None, difficulty=None):
+    """Generate `n` enemies of `tier` directly as arrays (same rules as `generate_enemy`)."""
+    _require_numpy()
+    table = get_catalog(registry).tier_table(tier, difficulty)
+    weights = np.array(table.weights, dtype=float)
+
+    idx = rng.choice(len(table), size=n, p=weights / weights.sum())
+    hp = np.ceil(rng.uniform(np.array(table.hp_lo)[idx], np.array(table.hp_hi)[idx])).astype(np.int64)
+    return {
+        'health': hp,
+        'max_health': hp.copy(),
+        'attack_power': np.array(table.attack_power, dtype=np.int64)[idx],
+        'armor': np.array(table.armor, dtype=np.int64)[idx],
+        'potions': (rng.random(n) < POTION_CARRY_CHANCE).astype(np.int64),
+    }
+
+
+def resolve_cohort(player_template, enemies, rng, potion_below=0.3, flee_below=None, max_turns=1000):
+    """Fight `player_template` against every lane of `enemies` (see `enemy_arrays`).
+
+    Returns a dict of per-lane arrays: `outcome` (WIN/DEFEAT/FLED/UNDECIDED),
+    `turns` (completed rounds), `player_health`, `enemy_health`, `potions_used`
+    and `flee_attempts`. Input arrays are not modified.
+    """
+    _require_numpy()
+    n = len(enemies['health'])
+
+    e_hp = enemies['health'].astype(np.int64)
+    e_max = enemies['max_health'].astype(np.int64)
+    e_atk = enemies['attack_power'].astype(np.int64)
+    e_arm = enemies['armor'].astype(np.int64)
+    e_pot = enemies['potions'].astype(np.int64)
+    e_def = np.zeros(n, dtype=bool)
+
+    p_max = int(player_template['max_health'])
+    p_hp = np.full(n, int(player_template['health']), dtype=np.int64)
+    p_pot = np.full(n, count_named(player_template.get('inventory', []), 'Health Potion'), dtype=np.int64)
+    p_base_atk = player_template.get('strength', 10) // 2 + player_template.get('attack_power_bonus', 0)
+    p_defense = player_template.get('agility', 0) // 3
+
+    outcome = np.full(n, UNDECIDED, dtype=np.int8)
+    turns = np.zeros(n, dtype=np.int64)
+    potions_used = np.zeros(n, dtype=np.int64)
+    flee_attempts = np.zeros(n, dtype=np.int64)
+    active = np.ones(n, dtype=bool)
+
+    for _ in range(max_turns):
+        if not active.any():
+            break
+
+        # --- player turn ---
+        hp_pct = p_hp / p_max if p_max else np.zeros(n)
+        if flee_below is not None:
+            flee = active & (hp_pct < flee_below)
+        else:
+            flee = np.zeros(n, dtype=bool)
+        potion = active & ~flee & (hp_pct < potion_below) & (p_pot > 0)
+        attack = active & ~flee & ~potion
+
+        fled = flee & (rng.random(n) < 0.5)
+        flee_attempts += flee
+        outcome[fled] = FLED
+        active &= ~fled
+
+        heal = np.minimum(POTION_HEAL, p_max - p_hp)
+        p_hp = np.where(potion, p_hp + heal, p_hp)
+        p_pot -= potion
+        potions_used += potion
+
+        atk = np.maximum(1, p_base_atk + rng.integers(-2, 3, n))
+        dmg = np.maximum(1, atk - e_arm + rng.integers(-1, 2, n))
+        dmg = np.where(attack & e_def, dmg // 2, dmg)
+        e_def &= ~attack
+        e_hp = np.where(attack, np.maximum(0, e_hp - dmg), e_hp)
+
+        won = attack & (e_hp <= 0)
+        outcome[won] = WIN
+        active &= ~won
+
+        # --- enemy turn ---
+        e_pct = e_hp / np.maximum(e_max, 1)
+        r1 = rng.random(n)
+        r2 = rng.random(n)
+        low = e_pct < AI_LOW_HP_PCT
+        mid = ~low & (e_pct < AI_MID_HP_PCT)
+        e_heal = active & low & (e_pot > 0) & (r1 < AI_LOW_HEAL_CHANCE)
+        e_defend = active & ~e_heal & ((low & (r2 < AI_LOW_DEFEND_CHANCE)) | (mid & (r1 < AI_MID_DEFEND_CHANCE)))
+        e_attack = active & ~e_heal & ~e_defend
+
+        e_hp = np.where(e_heal, e_hp + np.minimum(POTION_HEAL, e_max - e_hp), e_hp)
+        e_pot -= e_heal
+        e_def |= e_defend
+
+        edmg = np.maximum(1, e_atk - p_defense + rng.integers(-1, 2, n))
+        p_hp = np.where(e_attack, np.maximum(0, p_hp - edmg), p_hp)
+
+        lost = e_attack & (p_hp <= 0)
+        outcome[lost] = DEFEAT
+        active &= ~lost
+
+        turns += active
+
+    return {
+        'outcome': outcome,
+        'turns': turns,
+        'player_health': p_hp,
+        'enemy_health': e_hp,
+        'potions_used': potions_used,
+        'flee_attempts': flee_attempts,
+    }
+
+
+def summarize(result):
+    """Aggregate `resolve_cohort` output in the same shape as `simulate.simulate_fights`."""
+    _require_numpy()
+    outcome = result['outcome']
+    fights = len(outcome)
+    wins = outcome == WIN
+    fled = outcome == FLED
+    kill_turns, kill_counts = np.unique(result['turns'][wins] + 1, return_counts=True)
+    pot_vals, pot_counts = np.unique(result['potions_used'], return_counts=True)
+    attempts = int(result['flee_attempts'].sum())
+    return {
+        'fights': fights,
+        'wins': int(wins.sum()),
+        'defeats': int((outcome == DEFEAT).sum()),
+        'fled': int(fled.sum()),
+        'undecided': int((outcome == UNDECIDED).sum()),
+        'win_rate': float(wins.sum()) / fights if fights else 0.0,
+        'flee_attempts': attempts,
+        'flee_successes': int(fled.sum()),
+        'flee_success_rate': (float(fled.sum()) / attempts) if attempts else 0.0,
+        'turns_to_kill': {int(k): int(v) for k, v in zip(kill_turns, kill_counts)},
+        'potions_used': {int(k): int(v) for k, v in zip(pot_vals, pot_counts)},
+    }
+
+
+def simulate_fights_vectorized(player_template, tier, n, seed=0, potion_below=0.3, flee_below=None,
+                               registry=None, chunk_size=1_000_000, max_turns=1000):
+    """Vectorized counterpart of `simulate.simulate_fights`, processed in chunks of lanes."""
+    _require_numpy()
+    invalidate_catalogs(registry)
+    rng = np.random.default_rng(seed)
+    parts = []
+    for start in range(0, n, chunk_size):
+        count = min(chunk_size, n - start)
+        enemies = generate_enemy_arrays(tier, count, rng, registry)
+        parts.append(resolve_cohort(player_template, enemies, rng, potion_below, flee_below, max_turns))
+    if not parts:
+        return summarize({k: np.zeros(0, dtype=np.int64) for k in ('outcome', 'turns', 'potions_used', 'flee_attempts')})
+    merged = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    return summarize(merged)